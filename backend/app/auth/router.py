@@ -6,10 +6,11 @@ from sqlalchemy.orm import Session
 from app.core import deps
 from app.core.config import settings
 from app.core.security import verify_password, create_access_token, get_password_hash
+from app.core.timing import TimedRoute
 from app.models.users import User, UserRole
 from app.schemas.users import Token, UserCreate, User as UserSchema
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/login/access-token", response_model=Token)
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import os
+from typing import Optional
 
 
 # Ensure the backend/.env file is always loaded, regardless of cwd.
@@ -23,6 +24,24 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
 
+    # Shift working-time rules (app/core/shift_rules.py)
+    SHIFT_MIN_REST_HOURS: float = 11.0
+    SHIFT_MAX_SHIFTS_PER_WEEK: int = 5
+    SHIFT_MAX_CONSECUTIVE_NIGHTS: int = 3
+    SHIFT_MAX_HOURS_PER_WEEK: float = 48.0
+
+    # Precomputed forecasts (app/ml/forecast_horizon.py)
+    FORECAST_HORIZON_DAYS: int = 14
+    FORECAST_HORIZON_MAX_AGE_MINUTES: int = 120
+
+    # Structured JSON logging (app/core/log.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: Optional[str] = None  # default: stdout
+    ACCESS_LOG: bool = True
+    # Access-log sampling per route template, e.g. "/api/v1/shifts/my-shifts=0.1,/metrics=0"
+    LOG_SAMPLE_RATES: str = ""
+    LOG_SLOW_REQUEST_MS: float = 1000.0  # always logged, like errors
+
     class Config:
         case_sensitive = True
         # env_file kept for compatibility, but load_dotenv above ensures
@@ -5,6 +5,7 @@ from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 from app.core.db import SessionLocal
 from app.core.config import settings
+from app.core import log, timing
 from app.models.users import User, UserRole
 from app.schemas.users import TokenData
 
@@ -23,17 +24,19 @@ def get_current_user(original_token: str = Depends(oauth2_scheme), db: Session =
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(original_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    with timing.span("auth"):
+        try:
+            payload = jwt.decode(original_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+            token_data = TokenData(email=email)
+        except JWTError:
+            raise credentials_exception
+        user = db.query(User).filter(User.email == token_data.email).first()
+        if user is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    user = db.query(User).filter(User.email == token_data.email).first()
-    if user is None:
-        raise credentials_exception
+    log.bind(user_id=user.id)
     return user
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
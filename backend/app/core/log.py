@@ -0,0 +1,264 @@
+"""
+Structured JSON logging that never blocks a request.
+
+Request threads only put records on a bounded queue (QueueHandler). A
+background thread drains it, formats each record as one JSON line and
+writes them in batches, so file/socket I/O stays off the hot path. If the
+writer falls behind and the queue fills up, records are dropped (and the
+number dropped is logged) instead of stalling requests.
+
+Every record logged during a request carries its request_id and, once
+authenticated, user_id (see bind()). AccessLogMiddleware writes one
+`access` line per request; audit() writes `audit` lines for admin actions.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.core import timing
+from app.core.metrics import route_template
+
+logger = logging.getLogger("app")
+access_logger = logging.getLogger("app.access")
+audit_logger = logging.getLogger("app.audit")
+
+QUEUE_SIZE = 10_000
+BATCH_SIZE = 500
+FLUSH_SECONDS = 0.5
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is logged as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_request_fields: ContextVar[Optional[Dict]] = ContextVar("request_log_fields", default=None)
+
+
+def bind(**fields) -> None:
+    """Attach fields (e.g. user_id) to the current request's log records and access line."""
+    current = _request_fields.get()
+    if current is not None:
+        current.update(fields)
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        fields = _request_fields.get()
+        if fields:
+            for key, value in fields.items():
+                if not hasattr(record, key):
+                    setattr(record, key, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full instead of raising."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only what can't wait: the message and traceback refer to objects that may change later.
+        # JSON formatting happens on the writer thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info))
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingWriter(threading.Thread):
+    """Drains the queue, writing up to BATCH_SIZE formatted lines per write."""
+
+    _STOP = object()
+
+    def __init__(self, log_queue: queue.Queue, stream, handler: NonBlockingQueueHandler):
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = log_queue
+        self.stream = stream
+        self.handler = handler
+        self.formatter = JsonFormatter()
+        self._reported_drops = 0
+
+    def run(self) -> None:
+        while True:
+            try:
+                first = self.queue.get(timeout=FLUSH_SECONDS)
+            except queue.Empty:
+                self._report_drops()
+                continue
+            batch = [first]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(record is self._STOP for record in batch)
+            self._write([record for record in batch if record is not self._STOP])
+            self._report_drops()
+            if stopping:
+                return
+
+    def _write(self, records) -> None:
+        if not records:
+            return
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:  # noqa: BLE001 — one bad record must not stop the writer
+                lines.append(json.dumps({"level": "ERROR", "logger": "app.log", "message": "Unformattable log record"}))
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:  # noqa: BLE001
+            pass
+
+    def _report_drops(self) -> None:
+        dropped = self.handler.dropped
+        if dropped != self._reported_drops:
+            record = logging.LogRecord("app.log", logging.WARNING, __file__, 0,
+                                       "Log queue full; records dropped", None, None)
+            record.dropped = dropped - self._reported_drops
+            self._reported_drops = dropped
+            self._write([record])
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self.queue.put(self._STOP)
+        self.join(timeout)
+
+
+_writer: Optional[BatchingWriter] = None
+
+
+def configure_logging(level: str = "INFO", path: Optional[str] = None) -> None:
+    """Route the `app` loggers through the queue to stdout (or `path`). Safe to call more than once."""
+    global _writer
+    if _writer is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+    stream = open(path, "a", encoding="utf-8", buffering=1 << 16) if path else sys.stdout
+
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+    _writer = BatchingWriter(log_queue, stream, handler)
+    _writer.start()
+    atexit.register(_writer.stop)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """'/api/v1/shifts/my-shifts=0.1,/metrics=0' -> {route template: rate}."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, rate = item.rpartition("=")
+        rates[route.strip()] = float(rate)
+    return rates
+
+
+def audit(action: str, **fields) -> None:
+    """Record an admin action (never sampled), e.g. audit("room.delete", room_number="101")."""
+    audit_logger.info(action, extra={"action": action, **fields})
+
+
+class AccessLogMiddleware:
+    """
+    One `access` line per request: route, status, latency, DB time and user.
+
+    Routes listed in `sample_rates` are logged at that rate (the line carries
+    `sample_rate` so counts can be scaled back up); errors and requests
+    slower than `slow_ms` are always logged.
+    """
+
+    def __init__(self, app, sample_rates: Optional[Dict[str, float]] = None, slow_ms: float = 1000.0):
+        self.app = app
+        self.sample_rates = sample_rates or {}
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        request_id = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex[:16]
+        fields = {"request_id": request_id}
+        token = _request_fields.set(fields)
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            try:
+                self._log(scope, fields, status_code[0], (time.perf_counter() - started) * 1000)
+            finally:
+                _request_fields.reset(token)
+
+    def _log(self, scope, fields: Dict, status: int, latency_ms: float) -> None:
+        if not access_logger.isEnabledFor(logging.INFO):
+            return
+        route = route_template(scope)
+        rate = self.sample_rates.get(route, 1.0)
+        if rate < 1.0 and status < 400 and latency_ms < self.slow_ms and random.random() >= rate:
+            return
+
+        entry = {
+            "method": scope["method"],
+            "route": route,
+            "path": scope["path"],
+            "status": status,
+            "latency_ms": round(latency_ms, 2),
+        }
+        request_timings = timing.current()
+        if request_timings is not None:
+            db_ms, db_queries = request_timings.phases.get("db", (0.0, 0))
+            entry["db_ms"] = round(db_ms * 1000, 2)
+            entry["db_queries"] = db_queries
+            entry["timings_ms"] = request_timings.as_dict(latency_ms / 1000)
+        if rate < 1.0:
+            entry["sample_rate"] = rate
+        access_logger.info("access", extra=entry)
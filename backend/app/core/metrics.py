@@ -0,0 +1,346 @@
+"""
+In-process metrics in the Prometheus text format, served at GET /metrics.
+
+Recording is on the request hot path, so counters and histograms keep one
+shard per thread: a thread only ever writes its own plain lists and dicts
+(no locks), and a scrape sums the shards. The only lock is taken once per
+thread, the first time it records a metric. Values that already exist
+elsewhere (pool size, cache hit counts) are read at scrape time through
+callbacks instead of being recorded.
+
+Each process has its own registry; with several uvicorn workers, scrape
+each worker or run one worker per container.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from app.core import timing
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond model calls up to slow optimizer requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    def _format_labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def expose(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _Sharded(_Metric):
+    """Per-thread storage: `_shard()` returns this thread's dict, creating it on first use."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _snapshot(self) -> List[List[tuple]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # list(dict.items()) is atomic under the GIL, so a concurrent insert can't break it
+        return [list(shard.items()) for shard in shards]
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        totals: Dict[LabelValues, float] = {}
+        for items in self._snapshot():
+            for labels, value in items:
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def expose(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(labels)} {_number(value)}"
+                for labels, value in sorted(self.values().items())]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # [count per bucket (+Inf last), sum]
+            series = shard[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def timed(self, *labels: str, span: Optional[str] = None):
+        """
+        Decorator form of time(), for instrumenting a method without touching its body.
+
+        With `span`, the time is also added to that Server-Timing phase of the current request.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - started
+                    self.observe(elapsed, *labels)
+                    if span is not None:
+                        timing.record(span, elapsed)
+            return wrapper
+        return decorator
+
+    def values(self) -> Dict[LabelValues, Tuple[List[int], float]]:
+        merged: Dict[LabelValues, Tuple[List[int], float]] = {}
+        for items in self._snapshot():
+            for labels, (counts, total) in items:
+                counts = list(counts)
+                if labels in merged:
+                    previous, previous_total = merged[labels]
+                    counts = [a + b for a, b in zip(previous, counts)]
+                    total += previous_total
+                merged[labels] = (counts, total)
+        return merged
+
+    def expose(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{self._format_labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Gauge or counter whose values are read from `callback` at scrape time ({label values: value})."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[LabelValues, float]],
+                 labelnames: Sequence[str] = (), kind: str = "gauge"):
+        self.kind = kind
+        self.callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    def expose(self) -> List[str]:
+        try:
+            values = self.callback()
+        except Exception:  # noqa: BLE001 — a broken callback must not break the scrape
+            return []
+        return [f"{self.name}{self._format_labels(labels)} {_number(value)}"
+                for labels, value in sorted(values.items())]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        # Same name replaces, so instrument_engine/register_cache can be re-run for a new engine or cache
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+    def expose(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+REGISTRY = Registry()
+
+
+# ─── Metrics ──────────────────────────────────────────────
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ["method", "route"]
+)
+HTTP_RESPONSES = Counter("http_responses_total", "Responses by route template and status", ["method", "route", "status"])
+
+DB_POOL_CHECKOUT_WAIT = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection")
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "Duration of each SQL statement")
+
+FORECAST_MODEL_LOAD = Histogram(
+    "forecast_model_load_seconds", "ForecastService model load time", buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+FORECAST_INFERENCE = Histogram("forecast_inference_seconds", "ForecastService prediction time", ["method"])
+FEATURE_BUILD = Histogram("feature_build_seconds", "FeatureBuilder time", ["method"])
+
+FORECAST_HORIZON_LOOKUPS = Counter(
+    "forecast_horizon_lookups_total", "/ml/forecast lookups in the precomputed table", ["result"]
+)
+
+
+# ─── Instrumentation ──────────────────────────────────────
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine) -> None:
+    """Query count/time via cursor events, and pool usage gauges read at scrape time."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_DURATION.observe(elapsed)
+        timing.record("db", elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        if context.connection is not None:
+            started = context.connection.info.get("query_started")
+            if started:
+                started.pop()
+
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        CallbackMetric("db_pool_size", "Configured pool size", lambda: {(): pool.size()})
+        CallbackMetric("db_pool_checked_out", "Connections currently in use", lambda: {(): pool.checkedout()})
+        CallbackMetric("db_pool_overflow", "Connections open beyond pool_size", lambda: {(): max(pool.overflow(), 0)})
+
+
+def register_cache(name: str, cache) -> None:
+    """Expose a cache's `hits`/`misses` attributes (e.g. PerUserCache) as counters."""
+    CallbackMetric(f"{name}_cache_hits_total", f"{name} cache hits", lambda: {(): cache.hits}, kind="counter")
+    CallbackMetric(f"{name}_cache_misses_total", f"{name} cache misses", lambda: {(): cache.misses}, kind="counter")
+
+
+def route_template(scope) -> str:
+    """
+    Full path template of the matched route (`/api/v1/appointments/{appointment_id}`), or "unmatched".
+
+    Routes of included routers may carry only their own part of the path
+    (`/{appointment_id}`), so the prefix is taken from the request path:
+    the longest-prefix split whose remainder the route itself matches.
+    """
+    route = scope.get("route")
+    route_path = getattr(route, "path", None)
+    if not route_path:
+        return "unmatched"
+    path = scope["path"]
+    regex = getattr(route, "path_regex", None)
+    if regex is None or regex.match(path):
+        return route_path
+    index = path.find("/", 1)
+    while index != -1:
+        if regex.match(path[index:]):
+            return path[:index] + route_path
+        index = path.find("/", index + 1)
+    return route_path
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status per route template.
+
+    Labels use the matched route's path (`/api/v1/appointments/{appointment_id}`),
+    not the raw URL, so the number of series stays bounded.
+    """
+
+    def __init__(self, app, skip_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            template = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method, template)
+            HTTP_RESPONSES.inc(method, template, str(status_code[0]))
+
+
+def render(registry: Optional[Registry] = None) -> str:
+    return (registry or REGISTRY).expose()
@@ -0,0 +1,202 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+WEEK = timedelta(days=7)
+
+
+@dataclass(frozen=True)
+class ShiftRules:
+    """Working-time limits applied when assigning or planning shifts."""
+    min_rest_hours: float = 11.0
+    max_shifts_per_week: int = 5
+    max_consecutive_nights: int = 3
+    max_hours_per_week: float = 48.0  # any rolling 7 days
+
+
+DEFAULT_RULES = ShiftRules(
+    min_rest_hours=settings.SHIFT_MIN_REST_HOURS,
+    max_shifts_per_week=settings.SHIFT_MAX_SHIFTS_PER_WEEK,
+    max_consecutive_nights=settings.SHIFT_MAX_CONSECUTIVE_NIGHTS,
+    max_hours_per_week=settings.SHIFT_MAX_HOURS_PER_WEEK,
+)
+
+
+def violates_rest(
+    start1: datetime,
+    end1: datetime,
+    start2: datetime,
+    end2: datetime,
+    rules: ShiftRules = DEFAULT_RULES,
+) -> bool:
+    """
+    Returns True if two shifts overlap or leave less than the minimum rest between them.
+    """
+    if start2 < start1:
+        start1, end1, start2, end2 = start2, end2, start1, end1
+    gap_hours = (start2 - end1).total_seconds() / 3600
+    return gap_hours < rules.min_rest_hours
+
+
+def busiest_week(starts: List[datetime], moment: datetime) -> Tuple[int, datetime]:
+    """
+    Most shifts in `starts` (sorted) starting within any 7 days, midnight to
+    midnight, that include moment's day; returns (count, first day).
+
+    The roster planner caps shifts per 7-day block of its horizon and a
+    horizon can begin on any day, so every block the shift could fall in counts.
+    """
+    first = datetime.combine(moment.date(), time(0, 0)) - timedelta(days=6)
+    best = (0, first)
+    for d in range(7):
+        lo = first + timedelta(days=d)
+        count = bisect_left(starts, lo + WEEK) - bisect_left(starts, lo)
+        if count > best[0]:
+            best = (count, lo)
+    return best
+
+
+def check_assignment(
+    timeline,
+    start: datetime,
+    end: datetime,
+    night: bool = False,
+    rules: ShiftRules = DEFAULT_RULES,
+) -> List[str]:
+    """
+    Rule violations if a staff member with this timeline also took [start, end).
+
+    `timeline` is a StaffTimeline (sorted starts/ends, durations aligned with
+    starts, sorted night dates). Rest and overlap are two binary searches; the
+    weekly-hours, weekly-shift and consecutive-night checks only look at the
+    few shifts within a week of the new one.
+    """
+    violations = []
+
+    if timeline.count_intersecting(start, end) > 0:
+        violations.append("overlaps an existing shift")
+    else:
+        rest = timedelta(hours=rules.min_rest_hours)
+        if timeline.count_intersecting(start - rest, end + rest) > 0:
+            violations.append(f"less than {rules.min_rest_hours:g}h rest from another shift")
+
+    # Heaviest rolling week containing the new shift; it starts at a shift start
+    hours = (end - start).total_seconds() / 3600
+    starts, durations = timeline.starts, timeline.durations
+    first = bisect_right(starts, start - WEEK)
+    window_starts = [start] + starts[first:bisect_right(starts, start)]
+    for window_start in window_starts:
+        lo = bisect_left(starts, window_start)
+        hi = bisect_left(starts, window_start + WEEK)
+        total = hours + sum(durations[lo:hi])
+        if total > rules.max_hours_per_week:
+            violations.append(
+                f"{total:g}h in the 7 days from {window_start:%Y-%m-%d %H:%M} "
+                f"(max {rules.max_hours_per_week:g}h)"
+            )
+            break
+
+    count, week_start = busiest_week(starts, start)
+    if count + 1 > rules.max_shifts_per_week:
+        violations.append(
+            f"{count + 1} shifts in the 7 days from {week_start:%Y-%m-%d} "
+            f"(max {rules.max_shifts_per_week})"
+        )
+
+    if night:
+        run = 1 + _night_run(timeline.night_days, start.date(), -1) + _night_run(timeline.night_days, start.date(), 1)
+        if run > rules.max_consecutive_nights:
+            violations.append(f"{run} consecutive nights (max {rules.max_consecutive_nights})")
+
+    return violations
+
+
+def _night_run(night_days: List[date], day: date, step: int) -> int:
+    """Consecutive night dates next to `day` in one direction."""
+    run = 0
+    day += timedelta(days=step)
+    while True:
+        i = bisect_left(night_days, day)
+        if i == len(night_days) or night_days[i] != day:
+            return run
+        run += 1
+        day += timedelta(days=step)
+
+
+def validate_roster(
+    staff_ids: Sequence[int],
+    starts: Sequence[datetime],
+    ends: Sequence[datetime],
+    nights: Sequence[bool],
+    rules: ShiftRules = DEFAULT_RULES,
+) -> List[Dict]:
+    """
+    Check a whole roster (existing plus proposed assignments) in one vectorised pass.
+
+    Returns one dict per violation: {"index", "staff_id", "rule"}, where index
+    points at the later of the offending shifts (or the first shift of an
+    offending week / night run).
+    """
+    n = len(staff_ids)
+    if n == 0:
+        return []
+
+    staff = np.asarray(staff_ids, dtype=np.int64)
+    start = np.asarray(starts, dtype="datetime64[s]").astype(np.int64) / 3600.0
+    end = np.asarray(ends, dtype="datetime64[s]").astype(np.int64) / 3600.0
+    night = np.asarray(nights, dtype=bool)
+
+    order = np.lexsort((start, staff))
+    staff, start, end, night = staff[order], start[order], end[order], night[order]
+
+    # Offset each staff member onto a separate stretch of the time axis so
+    # cumulative operations never cross from one staff member to the next.
+    span = max(end.max() - start.min(), 0.0) + 24 * 8
+    group = np.concatenate([[0], np.cumsum(staff[1:] != staff[:-1])])
+    offset = group * span
+    start_key, end_key = start + offset, end + offset
+
+    violations = []
+
+    def flag(positions, rule):
+        for p in positions:
+            violations.append({"index": int(order[p]), "staff_id": int(staff[p]), "rule": rule})
+
+    # Rest / overlap: gap to the latest end among the staff member's earlier shifts
+    latest_end = np.maximum.accumulate(end_key)
+    same_staff = staff[1:] == staff[:-1]
+    gap = start_key[1:] - latest_end[:-1]
+    flag(np.flatnonzero(same_staff & (gap < 0)) + 1, "overlap")
+    flag(np.flatnonzero(same_staff & (gap >= 0) & (gap < rules.min_rest_hours)) + 1, "min_rest")
+
+    # Rolling week hours: window [start_i, start_i + 7d) for every shift i
+    cumulative = np.concatenate([[0.0], np.cumsum(end - start)])
+    window_end = np.searchsorted(start_key, start_key + 24 * 7, side="left")
+    week_hours = cumulative[window_end] - cumulative[np.arange(n)]
+    flag(np.flatnonzero(week_hours > rules.max_hours_per_week), "max_hours_per_week")
+
+    # Shifts per 7 calendar days: a day-aligned week over the limit contains
+    # one that starts on the day of its first shift
+    day_key = np.floor(start / 24) + group * (span // 24 + 8)
+    week_end = np.searchsorted(day_key, day_key + 7, side="left")
+    flag(np.flatnonzero(week_end - np.arange(n) > rules.max_shifts_per_week), "max_shifts_per_week")
+
+    # Consecutive nights: runs of calendar days with a night shift
+    if night.any():
+        night_pos = np.flatnonzero(night)
+        day = np.floor(start[night_pos] / 24).astype(np.int64)
+        keyed = staff[night_pos] * (1 << 32) + day
+        keyed, first = np.unique(keyed, return_index=True)
+        night_pos = night_pos[first]
+        breaks = np.concatenate([[True], np.diff(keyed) != 1])
+        run_id = np.cumsum(breaks) - 1
+        run_length = np.bincount(run_id)
+        run_first = night_pos[breaks]
+        flag(run_first[run_length > rules.max_consecutive_nights], "max_consecutive_nights")
+
+    return violations
@@ -0,0 +1,347 @@
+import threading
+import time as _time
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from app.core.shift_rules import DEFAULT_RULES, ShiftRules, busiest_week, check_assignment, validate_roster
+from app.models.shift import AssignmentStatus, Shift, ShiftName, StaffShiftAssignment
+from app.models.users import User, UserRole
+
+# Assignments that still occupy the staff member's time
+ACTIVE_STATUSES = (AssignmentStatus.ASSIGNED, AssignmentStatus.SWAP_REQUESTED)
+
+# Roles that can hold (and swap) shifts, as in request_swap
+SHIFT_ROLES = (UserRole.STAFF, UserRole.DOCTOR)
+
+# Rebuild from the database after this long, to pick up new staff and
+# changes made by other API workers
+MAX_AGE_SECONDS = 300
+
+# Upcoming days the shared index covers (whole months, from the current one)
+INDEX_HORIZON_DAYS = 92
+
+
+class StaffTimeline:
+    """
+    One staff member's active shifts as independently sorted lists.
+
+    The number of shifts intersecting [a, b) is
+    #(start < b) - #(end <= a), so overlap and rest checks are two binary
+    searches regardless of how many shifts the staff member has.
+    `durations` (hours) is aligned with `starts`; `night_days` holds the
+    dates of night shifts.
+    """
+
+    __slots__ = ("starts", "ends", "durations", "night_days")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.durations: List[float] = []
+        self.night_days: List[date] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def load(cls, db: Session, staff_id: int, start: datetime, end: datetime,
+             rules: ShiftRules = DEFAULT_RULES) -> "StaffTimeline":
+        """Active shifts of one staff member close enough to [start, end) to matter for the rules."""
+        return load_timelines(db, [staff_id], start, end, rules)[staff_id]
+
+    def add(self, start: datetime, end: datetime, night: bool = False) -> None:
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.durations.insert(i, (end - start).total_seconds() / 3600)
+        insort(self.ends, end)
+        if night:
+            insort(self.night_days, start.date())
+
+    def remove(self, start: datetime, end: datetime, night: bool = False) -> None:
+        i = bisect_left(self.starts, start)
+        j = bisect_left(self.ends, end)
+        if i < len(self.starts) and self.starts[i] == start and j < len(self.ends) and self.ends[j] == end:
+            del self.starts[i]
+            del self.durations[i]
+            del self.ends[j]
+            if night:
+                k = bisect_left(self.night_days, start.date())
+                if k < len(self.night_days) and self.night_days[k] == start.date():
+                    del self.night_days[k]
+
+    def count_intersecting(self, lo: datetime, hi: datetime) -> int:
+        return bisect_left(self.starts, hi) - bisect_right(self.ends, lo)
+
+    def count_starting(self, lo: datetime, hi: datetime) -> int:
+        """Shifts starting in [lo, hi)."""
+        return bisect_left(self.starts, hi) - bisect_left(self.starts, lo)
+
+    def max_week_count(self, start: datetime) -> int:
+        """Most shifts in any 7-day block containing start's day (see busiest_week)."""
+        return busiest_week(self.starts, start)[0]
+
+    def conflicts(self, start: datetime, end: datetime, rules: ShiftRules = DEFAULT_RULES) -> bool:
+        """True if any shift overlaps [start, end) or leaves less than the minimum rest around it."""
+        rest = timedelta(hours=rules.min_rest_hours)
+        return self.count_intersecting(start - rest, end + rest) > 0
+
+    def violations(self, start: datetime, end: datetime, night: bool = False,
+                   rules: ShiftRules = DEFAULT_RULES) -> List[str]:
+        return check_assignment(self, start, end, night, rules)
+
+
+def load_shift_rows(
+    db: Session,
+    staff_ids,
+    start: datetime,
+    end: datetime,
+    rules: ShiftRules = DEFAULT_RULES,
+) -> List[Tuple[int, datetime, datetime, bool]]:
+    """Active (staff_id, start, end, night) rows for several staff members around [start, end), in start order."""
+    margin = rule_margin(rules)
+    rows = (
+        db.query(StaffShiftAssignment.staff_id, Shift.start_time, Shift.end_time, Shift.type)
+        .join(Shift, Shift.id == StaffShiftAssignment.shift_id)
+        .filter(
+            StaffShiftAssignment.staff_id.in_(list(staff_ids)),
+            StaffShiftAssignment.status.in_(ACTIVE_STATUSES),
+            Shift.start_time < end + margin,
+            Shift.end_time > start - margin,
+        )
+        .order_by(Shift.start_time)
+        .all()
+    )
+    return [
+        (staff_id, shift_start, shift_end, is_night(shift_type))
+        for staff_id, shift_start, shift_end, shift_type in rows
+    ]
+
+
+def load_timelines(
+    db: Session,
+    staff_ids,
+    start: datetime,
+    end: datetime,
+    rules: ShiftRules = DEFAULT_RULES,
+) -> Dict[int, StaffTimeline]:
+    """Timelines for several staff members around [start, end), in one query."""
+    timelines = {staff_id: StaffTimeline() for staff_id in staff_ids}
+    for staff_id, shift_start, shift_end, night in load_shift_rows(db, timelines, start, end, rules):
+        timelines[staff_id].add(shift_start, shift_end, night)
+    return timelines
+
+
+def check_batch(
+    existing: List[Tuple[int, datetime, datetime, bool]],
+    proposed: List[Tuple[int, datetime, datetime, bool]],
+    rules: ShiftRules = DEFAULT_RULES,
+) -> List[List[str]]:
+    """
+    Rule violations for each proposed (staff_id, start, end, night) row, as if
+    they were assigned one at a time, in order, on top of the existing rows.
+
+    One validate_roster pass over existing + proposed finds the staff members
+    with any violation at all; only their proposed rows are checked one by one
+    with check_assignment, accepted rows being added to the timeline as they
+    pass. A staff member whose existing shifts already break a rule is always
+    checked, since validate_roster reports a week or night run at its first
+    shift and would not tell a longer one apart from what is already rostered.
+    """
+    errors = [[] for _ in proposed]
+    if not proposed:
+        return errors
+
+    rows = list(existing) + list(proposed)
+    new_staff = {staff_id for staff_id, _, _, _ in proposed}
+    conflicted = {v["staff_id"] for v in validate_roster(*zip(*rows), rules=rules)} & new_staff
+
+    timelines = {staff_id: StaffTimeline() for staff_id in conflicted}
+    for staff_id, start, end, night in existing:
+        if staff_id in conflicted:
+            timelines[staff_id].add(start, end, night)
+
+    for i, (staff_id, start, end, night) in enumerate(proposed):
+        if staff_id not in conflicted:
+            continue
+        errors[i] = timelines[staff_id].violations(start, end, night, rules)
+        if not errors[i]:
+            timelines[staff_id].add(start, end, night)
+    return errors
+
+
+def rule_margin(rules: ShiftRules = DEFAULT_RULES) -> timedelta:
+    """How far from a shift other shifts can still affect its rule checks."""
+    return timedelta(days=max(7, rules.max_consecutive_nights + 1), hours=rules.min_rest_hours)
+
+
+def is_night(shift_type) -> bool:
+    return getattr(shift_type, "value", shift_type) == ShiftName.NIGHT.value
+
+
+def _month_bounds(day: date) -> Tuple[datetime, datetime]:
+    month_start = datetime(day.year, day.month, 1)
+    if day.month == 12:
+        return month_start, datetime(day.year + 1, 1, 1)
+    return month_start, datetime(day.year, day.month + 1, 1)
+
+
+class ShiftTimelineIndex:
+    """
+    Sorted shift timelines for every staff member, kept in memory.
+
+    Only shifts in [window_start, window_end) are loaded: whole months from
+    the anchor's month onwards, plus the rule margin either side.
+    """
+
+    def __init__(self, window_start: datetime, window_end: datetime):
+        self.timelines: Dict[int, StaffTimeline] = {}
+        self.staff: Dict[int, Tuple[str, str]] = {}  # staff_id -> (name, role)
+        self.window_start = window_start
+        self.window_end = window_end
+        self.built_at = _time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(
+        cls,
+        db: Session,
+        anchor: Optional[date] = None,
+        horizon_days: int = INDEX_HORIZON_DAYS,
+    ) -> "ShiftTimelineIndex":
+        anchor = anchor or datetime.now(ZoneInfo("Asia/Kolkata")).date()
+        margin = rule_margin()
+        first_month, _ = _month_bounds(anchor)
+        _, last_month_end = _month_bounds(anchor + timedelta(days=horizon_days))
+        index = cls(first_month - margin, last_month_end + margin)
+        for user_id, name, role in (
+            db.query(User.id, User.full_name, User.role)
+            .filter(User.role.in_(SHIFT_ROLES), User.is_active.is_(True))
+            .all()
+        ):
+            index.staff[user_id] = (name, role.value if hasattr(role, "value") else role)
+            index.timelines[user_id] = StaffTimeline()
+
+        rows = (
+            db.query(StaffShiftAssignment.staff_id, Shift.start_time, Shift.end_time, Shift.type)
+            .join(Shift, Shift.id == StaffShiftAssignment.shift_id)
+            .filter(
+                StaffShiftAssignment.status.in_(ACTIVE_STATUSES),
+                Shift.start_time < index.window_end,
+                Shift.end_time > index.window_start,
+            )
+            .order_by(Shift.start_time)
+            .all()
+        )
+        for staff_id, start, end, shift_type in rows:
+            timeline = index.timelines.setdefault(staff_id, StaffTimeline())
+            # Rows arrive sorted by start; ends and nights are sorted once below
+            timeline.starts.append(start)
+            timeline.durations.append((end - start).total_seconds() / 3600)
+            timeline.ends.append(end)
+            if is_night(shift_type):
+                timeline.night_days.append(start.date())
+        for timeline in index.timelines.values():
+            timeline.ends.sort()
+            timeline.night_days.sort()
+        return index
+
+    def covers(self, moment: datetime) -> bool:
+        """Whether a shift starting at `moment` has its whole month and rule margin loaded."""
+        month_start, month_end = _month_bounds(moment.date())
+        margin = rule_margin()
+        return self.window_start + margin <= month_start and month_end + margin <= self.window_end
+
+    def is_expired(self) -> bool:
+        return _time.monotonic() - self.built_at > MAX_AGE_SECONDS
+
+    def add(self, staff_id: int, start: datetime, end: datetime, night: bool = False) -> None:
+        with self.lock:
+            self.timelines.setdefault(staff_id, StaffTimeline()).add(start, end, night)
+
+    def remove(self, staff_id: int, start: datetime, end: datetime, night: bool = False) -> None:
+        with self.lock:
+            timeline = self.timelines.get(staff_id)
+            if timeline is not None:
+                timeline.remove(start, end, night)
+
+    def timeline(self, staff_id: int) -> StaffTimeline:
+        return self.timelines.get(staff_id) or StaffTimeline()
+
+    def swap_candidates(
+        self,
+        start: datetime,
+        end: datetime,
+        night: bool = False,
+        exclude: Optional[int] = None,
+        rules: ShiftRules = DEFAULT_RULES,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Staff who could take the shift [start, end) without breaking any shift
+        rule or the weekly shift limit, least loaded first (month, then last 7 days, then name).
+
+        The weekly limit is checked against every 7-day block containing the
+        shift (see busiest_week), so no roster horizon rejects a candidate
+        accepted here.
+        """
+        month_start, month_end = _month_bounds(start.date())
+        recent_start = start - timedelta(days=7)
+
+        candidates = []
+        with self.lock:
+            for staff_id, (name, role) in self.staff.items():
+                if staff_id == exclude:
+                    continue
+                timeline = self.timeline(staff_id)
+                if timeline.violations(start, end, night, rules):
+                    continue
+                candidates.append({
+                    "staff_id": staff_id,
+                    "name": name,
+                    "role": role,
+                    "monthly_assignments": timeline.count_starting(month_start, month_end),
+                    "recent_assignments": timeline.count_starting(recent_start, start),
+                    "week_assignments": timeline.max_week_count(start),
+                })
+
+        candidates.sort(key=lambda c: (c["monthly_assignments"], c["recent_assignments"], c["name"] or ""))
+        return candidates[:limit] if limit else candidates
+
+
+_index: Optional[ShiftTimelineIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_timeline_index(db: Session) -> ShiftTimelineIndex:
+    """
+    Shared index from the current month (IST, like the rest of the scheduling
+    code) to INDEX_HORIZON_DAYS ahead, built on first use and rebuilt once it
+    is MAX_AGE_SECONDS old.
+    """
+    global _index
+    with _index_lock:
+        if _index is None or _index.is_expired():
+            _index = ShiftTimelineIndex.build(db)
+        return _index
+
+
+def invalidate_timeline_index() -> None:
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def record_assignment(staff_id: int, shift: Shift) -> None:
+    """Add a new active assignment to the index, if it has been built."""
+    if _index is not None:
+        _index.add(staff_id, shift.start_time, shift.end_time, is_night(shift.type))
+
+
+def release_assignment(staff_id: int, shift: Shift) -> None:
+    """Drop an assignment that no longer occupies the staff member (swapped, deleted)."""
+    if _index is not None:
+        _index.remove(staff_id, shift.start_time, shift.end_time, is_night(shift.type))
@@ -0,0 +1,163 @@
+"""
+Per-request phase timings, sent as a Server-Timing header and included in
+each request's access log line (app/core/log.py).
+
+ServerTimingMiddleware opens a RequestTimings for every HTTP request and
+keeps it in a context variable. Code anywhere below it adds to the current
+request's phases with span("name") / record("name", seconds); outside a
+request both are no-ops. FastAPI runs sync endpoints and dependencies in a
+thread pool with a copy of the context, so spans recorded there land on the
+same RequestTimings.
+
+Phases recorded out of the box:
+    auth       token decode and user lookup (deps.get_current_user)
+    db         every SQL statement (cursor events, see metrics.instrument_engine)
+    features   FeatureBuilder
+    predict    ForecastService
+    app        the endpoint function itself (TimedRoute)
+    serialize  from the endpoint returning to the response starting (response model + JSON)
+    total      whole request
+
+Phases can overlap (features includes its db time), so they don't add up to total.
+"""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi.routing import APIRoute
+
+
+class RequestTimings:
+    __slots__ = ("started", "phases", "endpoint_finished")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # name -> [seconds, count]
+        self.phases: Dict[str, List[float]] = {}
+        self.endpoint_finished: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            phase[0] += seconds
+            phase[1] += 1
+
+    def header(self, total: float) -> str:
+        entries = []
+        for name, (seconds, count) in self.phases.items():
+            entry = f"{name};dur={seconds * 1000:.2f}"
+            if count > 1:
+                entry += f';desc="{count}x"'
+            entries.append(entry)
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+    def as_dict(self, total: float) -> Dict[str, float]:
+        timings = {name: round(seconds * 1000, 2) for name, (seconds, _) in self.phases.items()}
+        timings["total"] = round(total * 1000, 2)
+        return timings
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record(name: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as phase `name` of the current request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that records the endpoint function's own time as the "app" phase.
+
+    The moment it returns is kept so the middleware can attribute the rest
+    (response model validation and JSON rendering) to "serialize".
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+def _finish(started: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        finished = time.perf_counter()
+        timings.add("app", finished - started)
+        timings.endpoint_finished = finished
+
+
+def _timed_endpoint(endpoint):
+    # functools.wraps keeps the signature FastAPI reads for parameters and dependencies
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _finish(started)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _finish(started)
+    return wrapper
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that tracks each request's phases and adds the Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                if timings.endpoint_finished is not None:
+                    timings.add("serialize", now - timings.endpoint_finished)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header(now - timings.started).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
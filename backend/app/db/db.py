@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import InstrumentedQueuePool, instrument_engine
 
 
 # Central SQLAlchemy engine for Supabase Session Pooler.
@@ -9,10 +10,12 @@ from app.core.config import settings
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
+    poolclass=InstrumentedQueuePool,  # records checkout wait for /metrics
     pool_size=5,
     max_overflow=10,
     connect_args={"sslmode": "require", "connect_timeout": 10},
 )
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,138 @@
+import os
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.core import deps
+from app.core.log import audit
+from app.core.timing import TimedRoute
+from app.ml.dataset_builder import EXPORT_DIR
+from app.models.job import Job, JobStatus
+from app.models.users import User, UserRole
+from app.schemas.job import Job as JobSchema, JobCreate, TaskInfo, TaskList
+from app.workers import queue
+from app.workers.registry import TASKS, get_task
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/tasks", response_model=TaskList)
+def list_tasks(
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    List the tasks that can be submitted (Admin only).
+    """
+    import app.workers.tasks  # noqa: F401  (registers the built-in tasks)
+
+    return TaskList(tasks=[
+        TaskInfo(name=spec.name, description=spec.description,
+                 cpu_bound=spec.cpu_bound, max_attempts=spec.max_attempts)
+        for spec in sorted(TASKS.values(), key=lambda spec: spec.name)
+    ])
+
+
+@router.post("/", response_model=JobSchema, status_code=202)
+def submit_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_in: JobCreate,
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Queue a long-running task (Admin only). Returns immediately; poll
+    GET /jobs/{job_id} for progress and the result. A worker
+    (python -m app.workers) must be running to pick it up.
+    """
+    try:
+        get_task(job_in.task)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown task: {job_in.task}")
+
+    job = queue.enqueue(db, job_in.task, job_in.params, run_at=job_in.run_at, created_by=current_user.id)
+    audit("job.submit", actor_id=current_user.id, job_id=job.id, task=job.task)
+    return job
+
+
+@router.get("/", response_model=List[JobSchema])
+def list_jobs(
+    db: Session = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 50,
+    task: Optional[str] = None,
+    status: Optional[JobStatus] = None,
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    List jobs, newest first (Admin only).
+    """
+    query = db.query(Job)
+    if task:
+        query = query.filter(Job.task == task)
+    if status:
+        query = query.filter(Job.status == status)
+    return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+
+def _get_job(db: Session, job_id: int) -> Job:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=JobSchema)
+def get_job(
+    job_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Get a job's status, progress and (once finished) result (Admin only).
+    """
+    return _get_job(db, job_id)
+
+
+@router.get("/{job_id}/download")
+def download_job_output(
+    job_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Download the file a finished job produced, e.g. an export_dataset output (Admin only).
+    """
+    job = _get_job(db, job_id)
+    if job.status != JobStatus.SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}")
+
+    path = (job.result or {}).get("path") if isinstance(job.result, dict) else None
+    if not path:
+        raise HTTPException(status_code=404, detail="Job produced no file")
+    # Only serve files from the export directory
+    export_dir = os.path.realpath(EXPORT_DIR)
+    real_path = os.path.realpath(path)
+    if os.path.commonpath([export_dir, real_path]) != export_dir or not os.path.isfile(real_path):
+        raise HTTPException(status_code=404, detail="Job output file not found")
+
+    return FileResponse(real_path, filename=os.path.basename(real_path))
+
+
+@router.post("/{job_id}/cancel", response_model=JobSchema)
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Cancel a job that hasn't started yet (Admin only).
+    """
+    job = queue.cancel(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JobStatus.CANCELLED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value} and can't be cancelled")
+    audit("job.cancel", actor_id=current_user.id, job_id=job.id)
+    return job
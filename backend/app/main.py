@@ -1,5 +1,7 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
+from app.core import log, metrics, timing
 from app.core.db import engine, Base
 import app.models  # noqa: F401 — ensure all models are registered with Base
 from app.auth import router as auth_router
@@ -8,6 +10,8 @@ from app.rooms import router as rooms_router
 from app.shifts import router as shifts_router
 from app.users import router as users_router
 from app.ml import router as ml_router
+from app.jobs import router as jobs_router
+from app.profiling import router as profiling_router
 
 # NOTE:
 # For Supabase/managed Postgres in production, we avoid calling
@@ -22,6 +26,19 @@ app = FastAPI(
     version="0.1.0",
 )
 
+log.configure_logging(settings.LOG_LEVEL, settings.LOG_FILE)
+if not settings.ACCESS_LOG:
+    log.access_logger.disabled = True
+
+# Outermost last: timings must be open while the access log line is written
+app.add_middleware(
+    log.AccessLogMiddleware,
+    sample_rates=log.parse_sample_rates(settings.LOG_SAMPLE_RATES),
+    slow_ms=settings.LOG_SLOW_REQUEST_MS,
+)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(timing.ServerTimingMiddleware)
+
 # All routers mounted under /api/v1
 app.include_router(auth_router.router, prefix=settings.API_V1_STR, tags=["auth"])
 app.include_router(users_router.router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
@@ -29,9 +46,14 @@ app.include_router(scheduling_router.router, prefix=f"{settings.API_V1_STR}/appo
 app.include_router(rooms_router.router, prefix=f"{settings.API_V1_STR}/rooms", tags=["rooms"])
 app.include_router(shifts_router.router, prefix=f"{settings.API_V1_STR}/shifts", tags=["shifts"])
 app.include_router(ml_router.router, prefix=f"{settings.API_V1_STR}/ml", tags=["ml"])
+app.include_router(jobs_router.router, prefix=f"{settings.API_V1_STR}/jobs", tags=["jobs"])
+app.include_router(profiling_router.router, prefix=f"{settings.API_V1_STR}/profiling", tags=["profiling"])
 from app.health import router as health_router
 app.include_router(health_router.router, prefix=settings.API_V1_STR, tags=["health"])
 
+from app.shifts.cache import my_shifts_cache
+metrics.register_cache("my_shifts", my_shifts_cache)
+
 
 @app.get("/")
 def read_root() -> dict[str, str]:
@@ -41,3 +63,9 @@ def read_root() -> dict[str, str]:
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint() -> PlainTextResponse:
+    """Prometheus scrape endpoint (latency, DB pool, model and cache metrics)."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
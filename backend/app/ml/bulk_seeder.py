@@ -0,0 +1,301 @@
+# app/ml/bulk_seeder.py
+"""
+Bulk data seeder for load testing and large training sets.
+
+Same shape of data as production_data_seeder, but rows are streamed into
+Postgres with COPY FROM STDIN instead of being built as ORM objects, every
+user shares one precomputed password hash, and the volume is configurable:
+
+    python -m app.ml.bulk_seeder --days 365 --appointments-per-day 27000   # ~10M appointments
+    python -m app.ml.bulk_seeder --scale 4                                 # 4x doctors, staff and appointments
+
+Each table reports rows/sec. Existing data is truncated first.
+"""
+
+import random
+import time as _time
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+from sqlalchemy import text
+
+from app.core.db import SessionLocal
+from app.core.security import get_password_hash
+from app.ml.dataset_builder import reset_snapshot
+from app.ml.production_data_seeder import FEMALE_NAMES, LASTNAMES, MALE_NAMES, truncate_all_tables
+from app.ml.synthetic_data_generator import APPOINTMENT_COLUMNS, appointment_copy_chunks, resolve_seed
+
+# Bytes buffered per read() handed to COPY
+COPY_CHUNK_BYTES = 1 << 20
+
+ROOMS = [
+    ("G101", "General", "GENERAL", 2, 1),
+    ("G102", "General", "GENERAL", 2, 1),
+    ("G201", "General", "GENERAL", 4, 2),
+    ("ICU01", "ICU", "ICU", 1, 3),
+    ("ICU02", "ICU", "ICU", 1, 3),
+    ("P301", "Private", "PRIVATE", 1, 3),
+    ("P302", "Private", "PRIVATE", 1, 3),
+]
+
+
+@dataclass(frozen=True)
+class SeedScale:
+    """How much data to generate. The defaults match production_data_seeder."""
+    days: int = 120
+    doctors: int = 8
+    staff: int = 15
+    hr: int = 2
+    appointments_per_day: int = 125  # weekday mean; weekends get about half
+
+    def scaled(self, factor: float) -> "SeedScale":
+        """Multiply doctors, staff and appointment volume (not the date range) by `factor`."""
+        return replace(
+            self,
+            doctors=max(1, round(self.doctors * factor)),
+            staff=max(1, round(self.staff * factor)),
+            appointments_per_day=max(1, round(self.appointments_per_day * factor)),
+        )
+
+
+class CopyStream:
+    """
+    File-like object over COPY text, for cursor.copy_expert.
+
+    Takes single lines (str) or pre-encoded blocks of whole lines (bytes, e.g.
+    synthetic_data_generator shards) and hands them out in ~COPY_CHUNK_BYTES
+    reads, so rows are generated while Postgres consumes them and never held
+    in memory all at once.
+    """
+
+    def __init__(self, lines: Iterable[Union[str, bytes]]):
+        self._lines = iter(lines)
+        self._buffer = b""
+        self.rows = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = COPY_CHUNK_BYTES
+        parts = [self._buffer]
+        length = len(self._buffer)
+        for line in self._lines:
+            if isinstance(line, str):
+                encoded = line.encode()
+                self.rows += 1
+            else:
+                encoded = line
+                self.rows += line.count(b"\n")
+            parts.append(encoded)
+            length += len(encoded)
+            if length >= size:
+                break
+        data = b"".join(parts)
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def copy_rows(db, table: str, columns: List[str], lines: Iterable[Union[str, bytes]],
+              label: Optional[str] = None) -> int:
+    """
+    COPY tab-separated `lines` (one row each, newline-terminated, \\N for NULL) into `table`.
+
+    Values must not contain tabs, newlines or backslashes; the generators
+    here only emit plain names, numbers, dates and enum names.
+    Returns the number of rows and prints the load rate.
+    """
+    raw = db.connection().connection.driver_connection
+    cursor = raw.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        cursor.close()
+        raise RuntimeError("Bulk seeding needs a psycopg2 connection (COPY FROM STDIN)")
+
+    stream = CopyStream(lines)
+    started = _time.perf_counter()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream, size=COPY_CHUNK_BYTES)
+    finally:
+        cursor.close()
+    elapsed = _time.perf_counter() - started
+
+    rate = stream.rows / elapsed if elapsed > 0 else float("inf")
+    print(f"  ✓ {label or table}: {stream.rows:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+    return stream.rows
+
+
+def _reset_sequence(db, table: str) -> None:
+    # Rows were copied with explicit ids; move the sequence past them
+    db.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+    ))
+
+
+def _full_name(rng: random.Random, prefix: str = "") -> str:
+    first = rng.choice(MALE_NAMES if rng.random() < 0.5 else FEMALE_NAMES)
+    return f"{prefix}{first} {rng.choice(LASTNAMES)}"
+
+
+def user_lines(scale: SeedScale, rng: random.Random) -> Iterator[str]:
+    """users rows: id 1 admin, then HR, doctors (ids 2+hr ...), staff."""
+    admin_hash = get_password_hash("admin123")
+    password_hash = get_password_hash("password123")  # hashed once, shared by every generated user
+
+    yield f"1\tadmin@hospital.com\t{admin_hash}\tHospital Administrator\tADMIN\tt\n"
+    user_id = 2
+    for role, prefix, count, title in (
+        ("HR", "hr", scale.hr, ""),
+        ("DOCTOR", "doctor", scale.doctors, "Dr. "),
+        ("STAFF", "staff", scale.staff, ""),
+    ):
+        for i in range(count):
+            yield f"{user_id}\t{prefix}{i + 1}@hospital.com\t{password_hash}\t{_full_name(rng, title)}\t{role}\tt\n"
+            user_id += 1
+
+
+def doctor_ids_for(scale: SeedScale) -> range:
+    first = 2 + scale.hr
+    return range(first, first + scale.doctors)
+
+
+def _staff_ids(scale: SeedScale) -> range:
+    first = 2 + scale.hr + scale.doctors
+    return range(first, first + scale.staff)
+
+
+def availability_lines(scale: SeedScale, rng: random.Random) -> Iterator[str]:
+    for doctor_id in doctor_ids_for(scale):
+        for day in rng.sample(range(5), rng.randint(4, 5)):
+            yield f"{doctor_id}\t{day}\t08:00:00\t13:00:00\n"
+            if rng.random() > 0.3:
+                yield f"{doctor_id}\t{day}\t14:00:00\t19:00:00\n"
+
+
+def shift_lines(start: date, days: int) -> Iterator[str]:
+    """Three shifts per day; shift ids are 3 * day + (1, 2, 3)."""
+    shift_id = 1
+    for day in range(days):
+        d = start + timedelta(days=day)
+        for name, kind, begins, ends in (
+            ("Morning", "MORNING", f"{d} 08:00:00", f"{d} 16:00:00"),
+            ("Afternoon", "AFTERNOON", f"{d} 16:00:00", f"{d} 23:59:00"),
+            ("Night", "NIGHT", f"{d} 00:00:00", f"{d} 08:00:00"),
+        ):
+            yield f"{shift_id}\t{name}\t{begins}\t{ends}\t{kind}\n"
+            shift_id += 1
+
+
+def assignment_lines(scale: SeedScale, days: int, rng: random.Random) -> Iterator[str]:
+    staff_ids = list(_staff_ids(scale))
+    per_shift_factor = max(1, scale.staff // 15)
+    for shift_id in range(1, 3 * days + 1):
+        count = min(rng.randint(2, 4) * per_shift_factor, len(staff_ids))
+        for staff_id in rng.sample(staff_ids, count):
+            yield f"{staff_id}\t{shift_id}\tASSIGNED\n"
+
+
+def appointment_chunks(scale: SeedScale, start: date, seed: int, workers: Optional[int] = None,
+                       progress: Optional[Callable[..., None]] = None) -> Iterator[bytes]:
+    """Appointments as COPY text, generated vectorized across processes (synthetic_data_generator)."""
+    generated = 0
+    for chunk in appointment_copy_chunks(start, scale.days, scale.appointments_per_day,
+                                         doctor_ids_for(scale), seed, workers):
+        generated += chunk.count(b"\n")
+        if progress:
+            progress(appointments_seeded=generated)
+        yield chunk
+
+
+def run_bulk_seed(scale: SeedScale = SeedScale(), seed: Optional[int] = None,
+                  progress: Optional[Callable[..., None]] = None, workers: Optional[int] = None) -> dict:
+    """
+    Truncate and reseed every table via COPY. Returns row counts, timings and the seed used.
+
+    The same `seed` reproduces the same data (a random one is picked and
+    reported if None); appointments are generated by `workers` processes.
+    `progress`, if given, is called with step/steps_done/steps_total and
+    appointments_seeded.
+    """
+    seed = resolve_seed(seed)
+    print("=" * 60)
+    print("BULK DATA SEEDER (COPY)")
+    print(f"{scale.days} days, {scale.doctors} doctors, {scale.staff} staff, "
+          f"~{scale.appointments_per_day}/weekday appointments, seed {seed}")
+    print("=" * 60 + "\n")
+
+    rng = random.Random(seed)
+    start = (datetime.now() - timedelta(days=scale.days)).date()
+    steps = [
+        ("users", "users", ["id", "email", "hashed_password", "full_name", "role", "is_active"],
+         lambda: user_lines(scale, rng)),
+        ("doctor_availability", "doctor_availability", ["doctor_id", "day_of_week", "start_time", "end_time"],
+         lambda: availability_lines(scale, rng)),
+        ("rooms", "rooms", ["room_number", "ward_name", "room_type", "bed_capacity", "floor_number", "is_active"],
+         lambda: (f"{number}\t{ward}\t{kind}\t{beds}\t{floor}\tt\n" for number, ward, kind, beds, floor in ROOMS)),
+        ("shifts", "shifts", ["id", "name", "start_time", "end_time", "type"],
+         lambda: shift_lines(start, scale.days)),
+        ("staff_assignments", "staff_shift_assignments", ["staff_id", "shift_id", "status"],
+         lambda: assignment_lines(scale, scale.days, rng)),
+        ("appointments", "appointments", APPOINTMENT_COLUMNS,
+         lambda: appointment_chunks(scale, start, seed, workers, progress)),
+    ]
+
+    db = SessionLocal()
+    counts = {}
+    started = _time.perf_counter()
+    try:
+        truncate_all_tables(db)
+        # Losing the last commits on a crash is fine for generated data
+        db.execute(text("SET synchronous_commit TO OFF"))
+
+        print("Loading (COPY FROM STDIN)...")
+        for done, (name, table, columns, lines) in enumerate(steps, start=1):
+            counts[name] = copy_rows(db, table, columns, lines(), label=name)
+            if table in ("users", "shifts"):
+                _reset_sequence(db, table)
+            db.commit()
+            if progress:
+                progress(step=name, steps_done=done, steps_total=len(steps))
+
+        for table in ("users", "shifts", "staff_shift_assignments", "appointments"):
+            db.execute(text(f"ANALYZE {table}"))
+        db.commit()
+        # Every snapshotted day was just regenerated
+        reset_snapshot()
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Bulk seeding failed: {e}")
+        raise
+    finally:
+        db.close()
+
+    elapsed = _time.perf_counter() - started
+    total = sum(counts.values())
+    print("\n" + "=" * 60)
+    print(f"✅ {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    print("=" * 60)
+    return {"rows": counts, "seconds": round(elapsed, 2), "rows_per_second": round(total / elapsed), "seed": seed}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    defaults = SeedScale()
+    parser = argparse.ArgumentParser(description="Truncate and bulk-seed the database with synthetic data via COPY.")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply doctors, staff and appointments per day")
+    parser.add_argument("--days", type=int, default=defaults.days)
+    parser.add_argument("--doctors", type=int, default=None)
+    parser.add_argument("--staff", type=int, default=None)
+    parser.add_argument("--appointments-per-day", type=int, default=None, help="Weekday mean")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
+    parser.add_argument("--workers", type=int, default=None, help="Processes generating appointments")
+    args = parser.parse_args()
+
+    scale = replace(defaults, days=args.days).scaled(args.scale)
+    overrides = {
+        "doctors": args.doctors,
+        "staff": args.staff,
+        "appointments_per_day": args.appointments_per_day,
+    }
+    scale = replace(scale, **{key: value for key, value in overrides.items() if value is not None})
+    run_bulk_seed(scale, seed=args.seed, workers=args.workers)
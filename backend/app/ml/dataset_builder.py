@@ -1,16 +1,36 @@
 # app/ml/dataset_builder.py
 
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Optional
+
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract, case
+from sqlalchemy.dialects import postgresql
 from app.core.db import SessionLocal
 from app.models.appointment import Appointment
 from app.models.users import User
 import pandas as pd
 
+SNAPSHOT_DIR = "app/ml/snapshots/appointments_hourly"
+WATERMARK_FILE = "_watermark.json"
+# Parquet readers skip "_"-prefixed paths, so neither is ever read as data
+LOCK_FILE = "_sync.lock"
+STAGING_DIR = "_staging"
+EXPORT_DIR = "app/ml/exports"
+
+# Rows per chunk when COPY isn't available and we stream through the ORM
+STREAM_CHUNK_SIZE = 50_000
 
-def build_ml_dataset() -> pd.DataFrame:
-    db: Session = SessionLocal()
 
+def _hourly_query(db: Session, after: Optional[date] = None, before: Optional[date] = None):
+    """Hourly aggregate over appointments, optionally bounded to (after, before)."""
     query = (
         db.query(
             Appointment.appointment_date.label("appointment_date"),
@@ -25,6 +45,14 @@ def build_ml_dataset() -> pd.DataFrame:
                 )
             ).label("emergency_count"),
         )
+    )
+    if after is not None:
+        query = query.filter(Appointment.appointment_date > after)
+    if before is not None:
+        query = query.filter(Appointment.appointment_date < before)
+
+    return (
+        query
         .group_by(
             Appointment.appointment_date,
             extract("hour", Appointment.start_time)
@@ -32,12 +60,266 @@ def build_ml_dataset() -> pd.DataFrame:
         .order_by(Appointment.appointment_date)
     )
 
-    df = pd.read_sql(query.statement, db.bind)
+
+def build_ml_dataset() -> pd.DataFrame:
+    db: Session = SessionLocal()
+
+    try:
+        query = _hourly_query(db)
+        df = pd.read_sql(query.statement, db.bind)
+    finally:
+        db.close()
 
     if df.empty:
         raise ValueError("Dataset is empty. Please seed data first.")
 
     df["appointment_date"] = pd.to_datetime(df["appointment_date"])
-    db.close()
 
-    return df
\ No newline at end of file
+    return df
+
+
+# ─── Parquet snapshot ─────────────────────────────────────
+
+def _read_watermark_file(snapshot_dir: str) -> Optional[dict]:
+    path = os.path.join(snapshot_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def read_watermark(snapshot_dir: str = SNAPSHOT_DIR) -> Optional[date]:
+    """Last appointment_date already written to the snapshot, or None."""
+    recorded = _read_watermark_file(snapshot_dir)
+    if recorded is None:
+        return None
+    return date.fromisoformat(recorded["high_water_mark"])
+
+
+def _write_watermark(snapshot_dir: str, high_water_mark: date, rows: int, source: dict) -> None:
+    path = os.path.join(snapshot_dir, WATERMARK_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "high_water_mark": high_water_mark.isoformat(),
+            "rows_appended": rows,
+            "source": source,
+            "updated_at": datetime.now().isoformat(),
+        }, f)
+    os.replace(tmp_path, path)
+
+
+def _source_fingerprint(before: Optional[date] = None, through: Optional[date] = None) -> dict:
+    """
+    Row count and latest updated_at of the appointments the snapshot covers.
+
+    Deleting, reseeding, backdating or editing any of them changes it; one
+    aggregate over the table instead of re-reading the hourly data.
+    """
+    db: Session = SessionLocal()
+    try:
+        query = db.query(func.count(Appointment.id), func.max(Appointment.updated_at))
+        if before is not None:
+            query = query.filter(Appointment.appointment_date < before)
+        if through is not None:
+            query = query.filter(Appointment.appointment_date <= through)
+        rows, updated_at = query.one()
+    finally:
+        db.close()
+    return {"rows": rows, "updated_at": updated_at.isoformat() if updated_at else None}
+
+
+def _copy_to_csv(db: Session, query, out) -> bool:
+    """
+    Stream the query result as CSV via COPY ... TO STDOUT.
+
+    Returns False when the driver has no COPY support, so callers can fall
+    back to chunked streaming.
+    """
+    raw = db.connection().connection.driver_connection
+    cursor = raw.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        cursor.close()
+        return False
+
+    sql = str(query.statement.compile(
+        dialect=postgresql.psycopg2.dialect(),
+        compile_kwargs={"literal_binds": True},
+    ))
+    try:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", out)
+    finally:
+        cursor.close()
+    return True
+
+
+def _fetch_new_rows(after: Optional[date], before: date):
+    """Pull hourly aggregates for days in (after, before) as a pyarrow Table."""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    db: Session = SessionLocal()
+    try:
+        query = _hourly_query(db, after=after, before=before)
+        with tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024, mode="w+b") as buffer:
+            if _copy_to_csv(db, query, buffer):
+                buffer.seek(0)
+                table = pa_csv.read_csv(buffer)
+            else:
+                chunks = [
+                    pa.Table.from_pandas(chunk, preserve_index=False)
+                    for chunk in pd.read_sql(
+                        query.statement,
+                        db.connection().execution_options(stream_results=True),
+                        chunksize=STREAM_CHUNK_SIZE,
+                    )
+                ]
+                if not chunks:
+                    return None
+                table = pa.concat_tables(chunks)
+    finally:
+        db.close()
+
+    if table.num_rows == 0:
+        return None
+    return table
+
+
+@contextmanager
+def _sync_lock(snapshot_dir: str):
+    """Exclusive lock so concurrent syncs (scheduler, train, update) don't fetch the same days."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    with open(os.path.join(snapshot_dir, LOCK_FILE), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _commit_parts(staging: str, snapshot_dir: str) -> None:
+    """Move staged part files into their month partitions."""
+    for root, _, files in os.walk(staging):
+        target = os.path.join(snapshot_dir, os.path.relpath(root, staging))
+        for name in files:
+            os.makedirs(target, exist_ok=True)
+            os.replace(os.path.join(root, name), os.path.join(target, name))
+
+
+def _clear_snapshot(snapshot_dir: str) -> None:
+    """Drop the watermark, then every part, keeping only the lock file."""
+    watermark = os.path.join(snapshot_dir, WATERMARK_FILE)
+    if os.path.exists(watermark):
+        os.remove(watermark)
+    for name in os.listdir(snapshot_dir):
+        if name == LOCK_FILE:
+            continue
+        path = os.path.join(snapshot_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+
+def reset_snapshot(snapshot_dir: str = SNAPSHOT_DIR) -> None:
+    """Empty the snapshot so the next sync rebuilds it from the database (after reseeding)."""
+    with _sync_lock(snapshot_dir):
+        _clear_snapshot(snapshot_dir)
+
+
+def sync_snapshot(snapshot_dir: str = SNAPSHOT_DIR, until: Optional[date] = None, rebuild: bool = False) -> int:
+    """
+    Append days newer than the recorded high-water mark to the Parquet snapshot.
+
+    Only complete days (strictly before `until`, default today) are fetched.
+    The watermark records a fingerprint of the appointments it covers (row
+    count, latest updated_at); if that no longer matches the database (a
+    reseed, backdated or edited appointments), or with rebuild=True, the
+    snapshot is cleared and rebuilt from scratch. The snapshot is partitioned
+    by month. Parts are written to a staging directory and moved into place
+    before the watermark advances, all under a file lock. Returns the number
+    of hourly rows written.
+    """
+    with _sync_lock(snapshot_dir):
+        return _sync_snapshot_locked(snapshot_dir, until, rebuild)
+
+
+def _sync_snapshot_locked(snapshot_dir: str, until: Optional[date], rebuild: bool) -> int:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    until = until or date.today()
+    recorded = _read_watermark_file(snapshot_dir)
+    watermark = date.fromisoformat(recorded["high_water_mark"]) if recorded else None
+
+    if watermark is not None and not rebuild:
+        if recorded.get("source") != _source_fingerprint(through=watermark):
+            print(f"Appointments up to {watermark} changed since the last sync; rebuilding the snapshot")
+            rebuild = True
+    # Parts without a watermark are left over from a reset or a crashed first sync
+    if rebuild or watermark is None:
+        _clear_snapshot(snapshot_dir)
+        watermark = None
+
+    # Leftovers from a sync that died before committing
+    staging = os.path.join(snapshot_dir, STAGING_DIR)
+    shutil.rmtree(staging, ignore_errors=True)
+
+    # Taken before the fetch: a change that lands in between makes the next
+    # sync rebuild rather than go unnoticed
+    source = _source_fingerprint(before=until)
+    table = _fetch_new_rows(after=watermark, before=until)
+    if table is None:
+        if watermark is not None:
+            _write_watermark(snapshot_dir, watermark, 0, source)
+        return 0
+
+    dates = pc.cast(table["appointment_date"], pa.date32())
+    table = table.set_column(table.schema.get_field_index("appointment_date"), "appointment_date", dates)
+    table = table.set_column(table.schema.get_field_index("hour"), "hour", pc.cast(table["hour"], pa.int32()))
+    table = table.append_column("month", pc.strftime(dates, format="%Y-%m"))
+
+    pq.write_to_dataset(
+        table,
+        root_path=staging,
+        partition_cols=["month"],
+        basename_template=f"part-{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+    )
+    _commit_parts(staging, snapshot_dir)
+    shutil.rmtree(staging, ignore_errors=True)
+
+    high_water_mark = pc.max(dates).as_py()
+    _write_watermark(snapshot_dir, high_water_mark, table.num_rows, source)
+    return table.num_rows
+
+
+def load_snapshot(snapshot_dir: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    """Load the Parquet snapshot (memory-mapped) in build_ml_dataset's shape."""
+    import pyarrow.parquet as pq
+
+    if read_watermark(snapshot_dir) is None:
+        raise ValueError("Dataset snapshot is empty. Run sync_snapshot() first.")
+
+    table = pq.read_table(snapshot_dir, memory_map=True)
+    df = table.drop_columns(["month"]).to_pandas()
+
+    df["appointment_date"] = pd.to_datetime(df["appointment_date"])
+    df = df.sort_values(["appointment_date", "hour"], kind="stable")
+    # A crash after parts are committed but before the watermark moves makes
+    # the next sync append those days again; the rows are identical.
+    df = df.drop_duplicates(["appointment_date", "hour"], keep="last").reset_index(drop=True)
+
+    return df
+
+
+def build_ml_dataset_from_snapshot(snapshot_dir: str = SNAPSHOT_DIR, rebuild: bool = False) -> pd.DataFrame:
+    """Bring the snapshot up to date (only the new days unless rebuilt), then load it."""
+    appended = sync_snapshot(snapshot_dir, rebuild=rebuild)
+    print(f"Snapshot sync appended {appended} hourly rows (high-water mark: {read_watermark(snapshot_dir)})")
+
+    df = load_snapshot(snapshot_dir)
+    if df.empty:
+        raise ValueError("Dataset is empty. Please seed data first.")
+
+    return df
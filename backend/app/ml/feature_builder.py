@@ -5,11 +5,13 @@ All features are derived from historical data - no manual inputs required.
 """
 
 from datetime import date, time, datetime, timedelta
-from typing import Dict
+from typing import Dict, List
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case
 from app.models.appointment import Appointment, DoctorAvailability
 from app.models.shift import StaffShiftAssignment
+from app.core.metrics import FEATURE_BUILD
 
 
 class FeatureBuilder:
@@ -18,6 +20,7 @@ class FeatureBuilder:
     def __init__(self, db: Session):
         self.db = db
     
+    @FEATURE_BUILD.timed("build_features", span="features")
     def build_features(self, target_date: date, target_hour: int) -> Dict:
         """
         Build complete feature vector for ML model.
@@ -39,6 +42,98 @@ class FeatureBuilder:
         
         return features
     
+    @FEATURE_BUILD.timed("build_features_range", span="features")
+    def build_features_range(self, start_date: date, end_date: date) -> List[Dict]:
+        """
+        Build feature vectors for every hour in [start_date, end_date).
+
+        Same definitions as build_features, but computed from three grouped
+        queries over the whole range instead of three queries per hour.
+        Feature dicts are returned in chronological order.
+
+        Args:
+            start_date: First date (inclusive)
+            end_date: Last date (exclusive)
+
+        Returns:
+            List of feature dictionaries, 24 per day
+        """
+        days = (end_date - start_date).days
+        if days <= 0:
+            return []
+
+        # Doctor availability per (weekday, hour)
+        doctor_counts = np.zeros((7, 24), dtype=np.int64)
+        for day_of_week, start_time, end_time in self.db.query(
+            DoctorAvailability.day_of_week,
+            DoctorAvailability.start_time,
+            DoctorAvailability.end_time,
+        ).all():
+            for hour in range(24):
+                if start_time <= time(hour, 0) < end_time:
+                    doctor_counts[day_of_week, hour] += 1
+
+        # Per-day, per-hour history covering the longest lookback (60 days)
+        history_start = start_date - timedelta(days=60)
+        history_days = (end_date - history_start).days
+        age_sum = np.zeros((history_days, 24))
+        age_n = np.zeros((history_days, 24))
+        emergencies = np.zeros((history_days, 24))
+
+        hour_expr = func.extract('hour', Appointment.start_time)
+        rows = self.db.query(
+            Appointment.appointment_date,
+            hour_expr,
+            func.sum(Appointment.patient_age),
+            func.count(Appointment.patient_age),
+            func.count(case(
+                (or_(
+                    Appointment.appointment_type == 'EMERGENCY',
+                    Appointment.appointment_type == 'Emergency'
+                ), 1)
+            )),
+        ).filter(
+            Appointment.appointment_date >= history_start,
+            Appointment.appointment_date < end_date,
+        ).group_by(Appointment.appointment_date, hour_expr).all()
+
+        for appointment_date, hour, total_age, n_ages, n_emergency in rows:
+            offset = (appointment_date - history_start).days
+            hour = int(hour)
+            age_sum[offset, hour] = float(total_age or 0)
+            age_n[offset, hour] = n_ages
+            emergencies[offset, hour] = n_emergency
+
+        # Prefix sums turn each trailing window into a subtraction
+        zero = np.zeros((1, 24))
+        age_sum_cum = np.vstack([zero, np.cumsum(age_sum, axis=0)])
+        age_n_cum = np.vstack([zero, np.cumsum(age_n, axis=0)])
+        emergency_cum = np.vstack([zero, np.cumsum(emergencies, axis=0)])
+
+        features = []
+        for day in range(days):
+            target_date = start_date + timedelta(days=day)
+            end = (target_date - history_start).days  # exclusive: target_date itself
+            age_window_sum = age_sum_cum[end] - age_sum_cum[end - 60]
+            age_window_n = age_n_cum[end] - age_n_cum[end - 60]
+            emergency_window = emergency_cum[end] - emergency_cum[end - 30]
+            weekday = target_date.weekday()
+
+            for hour in range(24):
+                if age_window_n[hour]:
+                    avg_age = float(age_window_sum[hour] / age_window_n[hour])
+                else:
+                    avg_age = 40.0
+                features.append({
+                    "appointment_date": datetime.combine(target_date, time(hour, 0)),
+                    "hour": hour,
+                    "doctor_count": max(int(doctor_counts[weekday, hour]), 2),
+                    "avg_patient_age": avg_age,
+                    "emergency_count": max(int(emergency_window[hour] / 30), 1),
+                })
+
+        return features
+
     def get_doctor_count(self, target_date: date, target_hour: int) -> int:
         """
         Count doctors available at the specified date and hour.
@@ -147,6 +242,7 @@ class FeatureBuilder:
         # Default assuming some emergency load
         return 1
     
+    @FEATURE_BUILD.timed("get_available_staff", span="features")
     def get_available_staff(self, target_date: date, shift_type: str = None):
         """
         Get available staff with rolling workload window (7 days + current).
@@ -156,6 +252,10 @@ class FeatureBuilder:
         - Monthly assignments for fairness
         - Deterministic alphabetical fallback
         
+        Only shifts starting inside the 7-day/month window are joined, via a
+        range on shifts.start_time (indexed), so the cost depends on the
+        window rather than on how much roster history is kept.
+        
         Args:
             target_date: Date to check
             shift_type: Shift type (MORNING/AFTERNOON/NIGHT) - currently unused
@@ -165,35 +265,40 @@ class FeatureBuilder:
         """
         from sqlalchemy import text
         
+        # Window bounds as timestamps so the predicates stay sargable
+        recent_start = datetime.combine(target_date - timedelta(days=7), time(0, 0))
+        recent_end = datetime.combine(target_date + timedelta(days=1), time(0, 0))
+        month_start = datetime.combine(target_date.replace(day=1), time(0, 0))
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
+        
         query = """
+        WITH window_assignments AS (
+            SELECT ssa.staff_id, s.start_time
+            FROM shifts s
+            JOIN staff_shift_assignments ssa
+                ON ssa.shift_id = s.id
+            WHERE s.start_time >= :window_start
+              AND s.start_time < :window_end
+        )
         SELECT
             u.id AS staff_id,
             u.full_name,
             
             -- Workload in last 7 days (including target date)
-            COUNT(
-                CASE
-                    WHEN DATE(s.start_time) BETWEEN
-                         :target_date - INTERVAL '7 days'
-                         AND :target_date
-                    THEN 1
-                END
+            COUNT(w.start_time) FILTER (
+                WHERE w.start_time >= :recent_start
+                  AND w.start_time < :recent_end
             ) AS recent_assignments,
             
             -- Workload in same calendar month (fairness metric)
-            COUNT(
-                CASE
-                    WHEN DATE_TRUNC('month', s.start_time)
-                         = DATE_TRUNC('month', CAST(:target_date AS DATE))
-                    THEN 1
-                END
+            COUNT(w.start_time) FILTER (
+                WHERE w.start_time >= :month_start
+                  AND w.start_time < :month_end
             ) AS monthly_assignments
         
         FROM users u
-        LEFT JOIN staff_shift_assignments ssa
-            ON u.id = ssa.staff_id
-        LEFT JOIN shifts s
-            ON ssa.shift_id = s.id
+        LEFT JOIN window_assignments w
+            ON w.staff_id = u.id
         
         WHERE u.role IN ('DOCTOR', 'STAFF')
           AND u.is_active = true
@@ -208,7 +313,14 @@ class FeatureBuilder:
         
         result = self.db.execute(
             text(query),
-            {"target_date": target_date}
+            {
+                "window_start": min(recent_start, month_start),
+                "window_end": max(recent_end, month_end),
+                "recent_start": recent_start,
+                "recent_end": recent_end,
+                "month_start": month_start,
+                "month_end": month_end,
+            }
         ).mappings().all()
         
         return [
@@ -0,0 +1,97 @@
+# app/ml/forecast_horizon.py
+"""
+Precomputed demand forecasts for the coming days.
+
+A scheduled job (`precompute_forecasts`, app/workers) predicts every hour of
+the next FORECAST_HORIZON_DAYS days with the current model and stores the
+predictions and their features in `forecast_horizon`, keyed by
+(model_version, date, hour). /ml/forecast then answers covered slots with a
+primary-key lookup and only computes features and predictions live for
+slots outside the horizon, after a model change, or when the stored rows are
+older than FORECAST_HORIZON_MAX_AGE_MINUTES (new appointments change the
+features, so rows are refreshed hourly).
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.ml.feature_builder import FeatureBuilder
+from app.ml.forecast_service import ForecastService
+from app.models.forecast import ForecastHorizon
+
+
+def precompute_horizon(
+    db: Session,
+    service: ForecastService,
+    start: Optional[date] = None,
+    days: Optional[int] = None,
+) -> dict:
+    """
+    Replace the stored forecasts for [start, start + days) (default: from today, IST).
+
+    Rows of other model versions and of past days are removed in the same
+    transaction, so readers see either the old or the new horizon.
+    """
+    start = start or datetime.now(ZoneInfo("Asia/Kolkata")).date()
+    days = days or settings.FORECAST_HORIZON_DAYS
+    end = start + timedelta(days=days)
+
+    features = FeatureBuilder(db).build_features_range(start, end)
+    predictions = service.predict_many(features)
+    computed_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "model_version": service.model_version,
+            "forecast_date": f["appointment_date"].date(),
+            "hour": f["hour"],
+            "predicted_demand": predicted,
+            "doctor_count": f["doctor_count"],
+            "avg_patient_age": f["avg_patient_age"],
+            "emergency_count": f["emergency_count"],
+            "computed_at": computed_at,
+        }
+        for f, predicted in zip(features, predictions.tolist())
+    ]
+
+    db.query(ForecastHorizon).filter(
+        or_(
+            ForecastHorizon.model_version != service.model_version,
+            ForecastHorizon.forecast_date < end,
+        )
+    ).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(ForecastHorizon), rows)
+    db.commit()
+
+    return {
+        "model_version": service.model_version,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "rows": len(rows),
+    }
+
+
+def lookup(db: Session, service: ForecastService, target_date: date, hour: int) -> Optional[ForecastHorizon]:
+    """Stored forecast for the slot under the current model, or None if missing or too old."""
+    try:
+        row = db.get(ForecastHorizon, (service.model_version, target_date, hour))
+    except SQLAlchemyError:
+        # Table not created yet (scripts/create_forecast_horizon_table.py)
+        db.rollback()
+        return None
+    if row is None:
+        return None
+
+    computed_at = row.computed_at
+    if computed_at.tzinfo is None:
+        computed_at = computed_at.replace(tzinfo=timezone.utc)
+    max_age = timedelta(minutes=settings.FORECAST_HORIZON_MAX_AGE_MINUTES)
+    if datetime.now(timezone.utc) - computed_at > max_age:
+        return None
+    return row
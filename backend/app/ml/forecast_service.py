@@ -1,31 +1,178 @@
 # app/ml/forecast_service.py
 
+import hashlib
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
 import joblib
+import numpy as np
 import pandas as pd
-from app.ml.preprocessing import preprocess_dataset
+from app.core.metrics import FORECAST_INFERENCE, FORECAST_MODEL_LOAD
+from app.ml.preprocessing import FEATURE_COLUMNS, build_feature_matrix, build_feature_row, preprocess_dataset
 
 MODEL_PATH = "app/ml/best_model.pkl"
 
+# Rows used to check that a compiled predictor reproduces the pandas path
+# exactly before it is trusted (weekday/weekend, night/peak, sparse/busy).
+_PROBE_FEATURES = [
+    {"appointment_date": datetime(2024, 1, 1, 0), "hour": 0, "doctor_count": 2,
+     "avg_patient_age": 40.0, "emergency_count": 1},
+    {"appointment_date": datetime(2024, 3, 6, 14), "hour": 14, "doctor_count": 6,
+     "avg_patient_age": 47.25, "emergency_count": 3},
+    {"appointment_date": datetime(2024, 6, 15, 9), "hour": 9, "doctor_count": 3,
+     "avg_patient_age": 52.5, "emergency_count": 2},
+    {"appointment_date": datetime(2024, 12, 29, 19), "hour": 19, "doctor_count": 8,
+     "avg_patient_age": 33.125, "emergency_count": 5},
+]
+
+
+def _compile_linear(model) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """StandardScaler + LinearRegression pipeline with the same numpy ops sklearn uses."""
+    steps = [step for _, step in model.steps]
+    if len(steps) != 2:
+        return None
+    scaler, regressor = steps
+    if type(scaler).__name__ != "StandardScaler" or not hasattr(regressor, "coef_"):
+        return None
+    if regressor.coef_.ndim != 1:
+        return None
+
+    mean = scaler.mean_ if scaler.with_mean else None
+    scale = scaler.scale_ if scaler.with_std else None
+    coef = regressor.coef_
+    intercept = regressor.intercept_
+
+    def predict(row: np.ndarray) -> np.ndarray:
+        x = row.copy()
+        if mean is not None:
+            x -= mean
+        if scale is not None:
+            x /= scale
+        return x @ coef + intercept
+
+    return predict
+
+
+def _compile_forest(model) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """RandomForestRegressor: accumulate tree outputs in order, as sklearn does."""
+    estimators = model.estimators_
+    if getattr(model, "n_outputs_", 1) != 1:
+        return None
+
+    def predict(row: np.ndarray) -> np.ndarray:
+        x = row.astype(np.float32)
+        total = np.zeros(x.shape[0], dtype=np.float64)
+        for tree in estimators:
+            total += tree.predict(x, check_input=False)
+        total /= len(estimators)
+        return total
+
+    return predict
+
+
+def _compile_xgboost(model) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """XGBRegressor: call the booster's in-place predictor directly."""
+    booster = model.get_booster()
+    iteration_range = (0, model.best_iteration + 1) if hasattr(model, "best_iteration") else (0, 0)
+
+    def predict(row: np.ndarray) -> np.ndarray:
+        return booster.inplace_predict(row, iteration_range=iteration_range, validate_features=False)
+
+    return predict
+
+
+def compile_predictor(model) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """
+    Build a fast single-row predictor for the estimators train_forecasting produces.
+
+    Returns None for unknown estimator types; callers then use the pandas path.
+    """
+    kind = type(model).__name__
+    try:
+        if kind == "Pipeline":
+            return _compile_linear(model)
+        if kind == "RandomForestRegressor":
+            return _compile_forest(model)
+        if kind == "XGBRegressor":
+            return _compile_xgboost(model)
+    except AttributeError:
+        return None
+    return None
+
 
 class ForecastService:
 
+    @FORECAST_MODEL_LOAD.timed()
     def __init__(self):
+        self.model_mtime = os.path.getmtime(MODEL_PATH)
+        with open(MODEL_PATH, "rb") as f:
+            # Content hash, so API and workers on other machines agree on the version
+            self.model_version = hashlib.sha256(f.read()).hexdigest()[:16]
         self.model = joblib.load(MODEL_PATH)
+        # Per-thread preallocated feature rows: FastAPI runs sync endpoints
+        # in a thread pool, so a single shared buffer would race.
+        self._local = threading.local()
+        self._fast_predict = compile_predictor(self.model)
+        if self._fast_predict is not None and not self._fast_path_matches():
+            self._fast_predict = None
+
+    def is_stale(self) -> bool:
+        """True once a newer model has been saved (full retrain or incremental update)."""
+        try:
+            return os.path.getmtime(MODEL_PATH) != self.model_mtime
+        except OSError:
+            return False
 
+    @property
+    def has_fast_path(self) -> bool:
+        return self._fast_predict is not None
+
+    def _row_buffer(self) -> np.ndarray:
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = np.zeros((1, len(FEATURE_COLUMNS)), dtype=np.float64)
+            self._local.row = row
+        return row
+
+    def _fast_path_matches(self) -> bool:
+        for features in _PROBE_FEATURES:
+            expected = self.predict(pd.DataFrame([features]))
+            row = build_feature_row(features)
+            actual = self._fast_predict(row).tolist()
+            if actual != expected:
+                return False
+        return True
+
+    @FORECAST_INFERENCE.timed("predict", span="predict")
     def predict(self, df: pd.DataFrame):
 
         df = preprocess_dataset(df)
 
-        features = [
-            "hour",
-            "day_of_week",
-            "month",
-            "is_weekend",
-            "doctor_count",
-            "avg_patient_age",
-            "emergency_count",
-        ]
+        prediction = self.model.predict(df[FEATURE_COLUMNS])
+
+        return prediction.tolist()
+
+    @FORECAST_INFERENCE.timed("predict_one", span="predict")
+    def predict_one(self, features: Dict) -> float:
+        """
+        Predict a single feature dict (as built by FeatureBuilder.build_features).
+
+        Uses the compiled NumPy path when available, which returns exactly
+        the same value as predict(pd.DataFrame([features]))[0].
+        """
+        if self._fast_predict is None:
+            return self.predict(pd.DataFrame([features]))[0]
 
-        prediction = self.model.predict(df[features])
+        row = build_feature_row(features, out=self._row_buffer())
+        return self._fast_predict(row).tolist()[0]
 
-        return prediction.tolist()
\ No newline at end of file
+    @FORECAST_INFERENCE.timed("predict_many", span="predict")
+    def predict_many(self, features_list: List[Dict]) -> np.ndarray:
+        """Predict a batch of feature dicts (e.g. from FeatureBuilder.build_features_range) in one call."""
+        if not features_list:
+            return np.zeros(0)
+        if self._fast_predict is None:
+            return np.asarray(self.predict(pd.DataFrame(features_list)), dtype=np.float64)
+        return np.asarray(self._fast_predict(build_feature_matrix(features_list)), dtype=np.float64)
@@ -0,0 +1,275 @@
+# app/ml/hyperparameter_search.py
+"""
+Time-budgeted successive-halving search over candidate hyperparameters.
+
+Each rung scores the surviving configurations on more rolling-origin folds
+and keeps the best 1/eta of them. Trials run in one process pool whose
+workers hold the feature matrix in memory for the whole search. Trial
+history is persisted to JSON so the next run starts from the previous best
+configuration and its neighbours instead of searching from scratch.
+"""
+
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+
+from app.ml.train_forecasting import (
+    CANDIDATE_PARAMS,
+    _init_worker,
+    _resolve_workers,
+    fit_and_score,
+    time_series_folds,
+)
+
+SEARCH_HISTORY_PATH = "app/ml/search_history.json"
+
+SEARCH_SPACE = {
+    "LinearRegression": {},
+    "RandomForest": {
+        "n_estimators": [100, 200, 300, 500],
+        "max_depth": [None, 8, 12, 16],
+        "min_samples_leaf": [1, 2, 5],
+        "max_features": [1.0, 0.7, 0.5],
+    },
+    "XGBoost": {
+        "n_estimators": [100, 300, 600],
+        "max_depth": [3, 4, 6, 8],
+        "learning_rate": [0.03, 0.1, 0.3],
+        "subsample": [0.7, 0.9, 1.0],
+    },
+}
+
+
+def load_history(path: str = SEARCH_HISTORY_PATH) -> Dict:
+    if not os.path.exists(path):
+        return {"trials": [], "best": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(history: Dict, path: str = SEARCH_HISTORY_PATH) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _config_key(name: str, params: Dict) -> str:
+    return f"{name}:{json.dumps(params, sort_keys=True)}"
+
+
+def _neighbours(params: Dict, space: Dict, rng: random.Random, count: int) -> List[Dict]:
+    """Configurations that differ from `params` in exactly one hyperparameter."""
+    result = []
+    keys = list(space)
+    for _ in range(count * 4):
+        if len(result) >= count or not keys:
+            break
+        key = rng.choice(keys)
+        candidate = dict(params)
+        candidate[key] = rng.choice(space[key])
+        if candidate != params and candidate not in result:
+            result.append(candidate)
+    return result
+
+
+def sample_configs(name: str, n_configs: int, history: Dict, seed: int = 42) -> List[Dict]:
+    """
+    Initial configurations for one model.
+
+    With history, the previous best and its neighbours fill half the slots;
+    the rest (or all, on a cold start) are sampled uniformly from the space.
+    """
+    space = SEARCH_SPACE[name]
+    if not space:
+        return [dict(CANDIDATE_PARAMS[name])]
+
+    rng = random.Random(seed)
+    configs = []
+    previous_best = history.get("best", {}).get(name)
+    if previous_best is not None:
+        configs.append(previous_best["params"])
+        configs.extend(_neighbours(previous_best["params"], space, rng, n_configs // 2 - 1))
+    else:
+        configs.append(dict(CANDIDATE_PARAMS[name]))
+
+    attempts = 0
+    while len(configs) < n_configs and attempts < n_configs * 10:
+        attempts += 1
+        candidate = {key: rng.choice(values) for key, values in space.items()}
+        if candidate not in configs:
+            configs.append(candidate)
+    return configs
+
+
+def _stop_pool(pool: ProcessPoolExecutor, terminate: bool) -> None:
+    """
+    Shut the trial pool down.
+
+    On timeout the fits still running are killed rather than left to finish,
+    so they don't compete for cores with the cross-validation pool that
+    train_models starts next.
+    """
+    if not terminate:
+        pool.shutdown(wait=True)
+        return
+    if hasattr(pool, "terminate_workers"):  # Python 3.14+
+        pool.terminate_workers()
+        return
+    # Older executors have no public way to stop a running task; capture the
+    # worker processes before shutdown() drops its reference to them.
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+
+
+def search_hyperparameters(
+    X,
+    y,
+    models: List[str] = None,
+    time_budget_seconds: float = 600,
+    n_configs: int = 12,
+    eta: int = 3,
+    n_folds: int = 5,
+    max_workers: int = None,
+    history_path: str = SEARCH_HISTORY_PATH,
+) -> Dict[str, Dict]:
+    """
+    Run successive halving for each model within a shared wall-clock budget.
+
+    Returns {name: best params}. When the deadline passes, queued trials are
+    cancelled, running ones are terminated, and the best configuration from
+    completed trials is kept. Trials that raise are recorded as failed.
+    """
+    models = models or list(CANDIDATE_PARAMS)
+    history = load_history(history_path)
+    folds = time_series_folds(len(X), n_folds)
+    deadline = time.perf_counter() + time_budget_seconds
+
+    # model name -> configurations still in the race
+    survivors = {
+        name: sample_configs(name, n_configs, history) for name in models
+    }
+    best = {}
+
+    workers, threads = _resolve_workers(max_workers, n_configs * len(models))
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(X, y, threads),
+    )
+    timed_out = False
+    try:
+        rung = 0
+        while any(survivors.values()) and time.perf_counter() < deadline:
+            # Rung r scores on the eta**r most recent folds
+            rung_folds = folds[-min(len(folds), eta ** rung):]
+            futures = {}
+            for name, configs in survivors.items():
+                for params in configs:
+                    for train_end, val_end in rung_folds:
+                        future = pool.submit(fit_and_score, name, params, train_end, val_end)
+                        futures[future] = (name, _config_key(name, params), params)
+
+            scores: Dict[str, Dict] = {}
+            pending = set(futures)
+            while pending:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key, params = futures[future]
+                    entry = scores.setdefault(
+                        key, {"name": name, "params": params, "folds": [], "seconds": 0.0, "error": None}
+                    )
+                    try:
+                        metrics, elapsed = future.result()
+                    except Exception as e:
+                        # One bad configuration shouldn't abort the search
+                        entry["error"] = entry["error"] or f"{type(e).__name__}: {e}"
+                        continue
+                    entry["folds"].append(metrics)
+                    entry["seconds"] += elapsed
+
+            for future in pending:
+                future.cancel()
+
+            for entry in scores.values():
+                if entry["error"]:
+                    print(f"{entry['name']} rung {rung}: trial {entry['params']} failed: {entry['error']}")
+                    history["trials"].append({
+                        "model": entry["name"],
+                        "params": entry["params"],
+                        "rung": rung,
+                        "folds": len(rung_folds),
+                        "error": entry["error"],
+                        "finished_at": datetime.now(timezone.utc).isoformat(),
+                    })
+
+            complete = [
+                e for e in scores.values() if not e["error"] and len(e["folds"]) == len(rung_folds)
+            ]
+            for entry in complete:
+                rmse = float(np.mean([m["RMSE"] for m in entry["folds"]]))
+                history["trials"].append({
+                    "model": entry["name"],
+                    "params": entry["params"],
+                    "rung": rung,
+                    "folds": len(rung_folds),
+                    "RMSE": rmse,
+                    "MAE": float(np.mean([m["MAE"] for m in entry["folds"]])),
+                    "seconds": entry["seconds"],
+                    "finished_at": datetime.now(timezone.utc).isoformat(),
+                })
+                entry["RMSE"] = rmse
+
+            if pending:
+                timed_out = True
+                print(f"Time budget reached during rung {rung}; keeping completed trials.")
+
+            next_survivors = {}
+            for name in survivors:
+                ranked = sorted(
+                    (e for e in complete if e["name"] == name), key=lambda e: e["RMSE"]
+                )
+                if ranked:
+                    best[name] = {
+                        "params": ranked[0]["params"],
+                        "RMSE": ranked[0]["RMSE"],
+                        "rung": rung,
+                        "folds": len(rung_folds),
+                    }
+                    print(f"{name} rung {rung}: best RMSE {ranked[0]['RMSE']:.4f} "
+                          f"over {len(rung_folds)} fold(s), {len(ranked)} config(s)")
+                # Stop once a model is down to one config scored on every fold
+                if len(ranked) > 1 and len(rung_folds) < len(folds):
+                    keep = max(1, len(ranked) // eta)
+                    next_survivors[name] = [e["params"] for e in ranked[:keep]]
+            survivors = next_survivors
+            rung += 1
+    finally:
+        _stop_pool(pool, terminate=timed_out)
+
+    # A search cut short may only have scored its best on a few folds; keep a
+    # stored best that was validated on more of them.
+    for name, result in best.items():
+        stored = history["best"].get(name)
+        if not timed_out or stored is None or result["folds"] >= stored.get("folds", 0):
+            history["best"][name] = result
+    save_history(history, history_path)
+
+    # Models that never completed a rung fall back to the last known best
+    return {
+        name: history["best"][name]["params"] if name in history["best"] else dict(CANDIDATE_PARAMS[name])
+        for name in models
+    }
@@ -0,0 +1,148 @@
+# app/ml/incremental_update.py
+"""
+Incremental model updates from days added since the saved model's watermark.
+
+New days are split chronologically: the older ones update a copy of the
+served model, and the newest ones form a holdout that both the served and
+the updated model are scored on. The update is promoted only if holdout RMSE
+doesn't get worse by more than the tolerance. The watermark then moves to
+the last day used for the update, so today's holdout days become tomorrow's
+update data.
+"""
+
+import copy
+from datetime import date, datetime, timedelta, timezone
+
+import joblib
+import pandas as pd
+
+from app.ml.evaluation import evaluate_model
+from app.ml.preprocessing import FEATURE_COLUMNS
+from app.ml.train_forecasting import (
+    MODEL_PATH,
+    load_model_meta,
+    load_prepared_dataset,
+    pin_single_thread,
+    save_model,
+)
+
+# Extra boosting rounds added to an XGBoost model per update
+BOOST_ROUNDS = 50
+# Share of a random forest replaced by trees fit on recent data per update
+FOREST_REFRESH_FRACTION = 0.1
+# Window of history the refreshed forest trees are fit on
+FOREST_RECENT_DAYS = 90
+
+
+def _frame(X) -> pd.DataFrame:
+    return pd.DataFrame(X, columns=FEATURE_COLUMNS)
+
+
+def _update_xgboost(model, X_new, y_new):
+    """Continue boosting from the current booster for a few rounds on the new rows."""
+    updated = type(model)(**model.get_params())
+    updated.set_params(n_estimators=BOOST_ROUNDS)
+    updated.fit(_frame(X_new), y_new, xgb_model=model.get_booster())
+    return updated
+
+
+def _update_forest(model, X_recent, y_recent):
+    """Grow trees on recent data with warm_start, then drop the same number of oldest trees."""
+    updated = copy.deepcopy(model)
+    size = len(updated.estimators_)
+    refresh = max(1, int(size * FOREST_REFRESH_FRACTION))
+
+    updated.set_params(warm_start=True, n_estimators=size + refresh)
+    updated.fit(_frame(X_recent), y_recent)
+    updated.estimators_ = updated.estimators_[refresh:]
+    updated.set_params(warm_start=False, n_estimators=size)
+    return updated
+
+
+def _update_partial_fit(model, X_new, y_new):
+    updated = copy.deepcopy(model)
+    updated.partial_fit(_frame(X_new), y_new)
+    return updated
+
+
+def _update_linear(model, X_seen, y_seen):
+    """Closed-form models have no incremental step; refitting on all seen rows takes milliseconds."""
+    updated = copy.deepcopy(model)
+    updated.fit(_frame(X_seen), y_seen)
+    return updated
+
+
+def update_model(holdout_fraction: float = 0.3, tolerance: float = 0.02) -> dict:
+    """
+    Update the saved model with days newer than its watermark and promote if holdout metrics hold.
+
+    Returns a summary dict with "status" one of: no_new_data, promoted, rejected.
+    """
+    meta = load_model_meta()
+    if not meta.get("watermark"):
+        raise ValueError("Saved model has no watermark. Run train_models() first.")
+    watermark = date.fromisoformat(meta["watermark"])
+
+    X, y, dates = load_prepared_dataset(refresh=True)
+    new_days = sorted({d for d in dates if d > watermark})
+    if len(new_days) < 2:
+        print(f"Only {len(new_days)} new day(s) since {watermark}; need 2 to update and validate.")
+        return {"status": "no_new_data", "watermark": watermark.isoformat()}
+
+    holdout_days = max(1, int(len(new_days) * holdout_fraction))
+    update_end = new_days[-holdout_days - 1]
+
+    update_mask = (dates > watermark) & (dates <= update_end)
+    holdout_mask = dates > update_end
+    X_new, y_new = X[update_mask], y[update_mask]
+    X_holdout, y_holdout = X[holdout_mask], y[holdout_mask]
+
+    model = joblib.load(MODEL_PATH)
+    kind = type(model).__name__
+
+    if kind == "XGBRegressor":
+        method = "xgboost_warm_start"
+        updated = _update_xgboost(model, X_new, y_new)
+    elif kind == "RandomForestRegressor":
+        method = "forest_refresh"
+        recent_mask = (dates > update_end - timedelta(days=FOREST_RECENT_DAYS)) & (dates <= update_end)
+        updated = _update_forest(model, X[recent_mask], y[recent_mask])
+    elif hasattr(model, "partial_fit"):
+        method = "partial_fit"
+        updated = _update_partial_fit(model, X_new, y_new)
+    else:
+        method = "refit"
+        seen_mask = dates <= update_end
+        updated = _update_linear(model, X[seen_mask], y[seen_mask])
+
+    current_metrics = evaluate_model(y_holdout, model.predict(_frame(X_holdout)))
+    updated_metrics = evaluate_model(y_holdout, updated.predict(_frame(X_holdout)))
+    print(f"Holdout ({holdout_days} day(s), {len(y_holdout)} rows) current:", current_metrics)
+    print(f"Holdout updated via {method} on {len(y_new)} new rows:", updated_metrics)
+
+    summary = {
+        "method": method,
+        "new_rows": int(len(y_new)),
+        "holdout_rows": int(len(y_holdout)),
+        "current_metrics": {k: float(v) for k, v in current_metrics.items()},
+        "updated_metrics": {k: float(v) for k, v in updated_metrics.items()},
+    }
+
+    if updated_metrics["RMSE"] > current_metrics["RMSE"] * (1 + tolerance):
+        print("Updated model rejected: holdout RMSE got worse.")
+        return {"status": "rejected", "watermark": watermark.isoformat(), **summary}
+
+    # Models saved before n_jobs was pinned would carry cpu_count into the update
+    save_model(pin_single_thread(updated), {
+        **meta,
+        "watermark": update_end.isoformat(),
+        "test_metrics": summary["updated_metrics"],
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "method": method,
+    })
+    print(f"Updated model promoted (watermark {watermark} -> {update_end}).")
+    return {"status": "promoted", "watermark": update_end.isoformat(), **summary}
+
+
+if __name__ == "__main__":
+    update_model()
@@ -1,8 +1,22 @@
 # app/ml/preprocessing.py
 
+from typing import Dict, List, Optional
+
+import numpy as np
 import pandas as pd
 
 
+FEATURE_COLUMNS = [
+    "hour",
+    "day_of_week",
+    "month",
+    "is_weekend",
+    "doctor_count",
+    "avg_patient_age",
+    "emergency_count",
+]
+
+
 def preprocess_dataset(df: pd.DataFrame) -> pd.DataFrame:
     df["day_of_week"] = df["appointment_date"].dt.weekday
     df["month"] = df["appointment_date"].dt.month
@@ -13,17 +27,48 @@ def preprocess_dataset(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def get_features_and_target(df: pd.DataFrame):
-    features = [
-        "hour",
-        "day_of_week",
-        "month",
-        "is_weekend",
-        "doctor_count",
-        "avg_patient_age",
-        "emergency_count",
-    ]
+def _fill_missing(value) -> float:
+    # Mirrors DataFrame.fillna(0): both None and NaN become 0
+    if value is None or value != value:
+        return 0
+    return value
+
+
+def build_feature_row(features: Dict, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Pandas-free equivalent of preprocess_dataset for a single feature dict.
+
+    Writes the values into `out` (shape (1, len(FEATURE_COLUMNS)), float64)
+    in FEATURE_COLUMNS order, so callers can reuse one preallocated row.
+    Missing values become 0, exactly like the fillna(0) in the pandas path.
+    """
+    if out is None:
+        out = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float64)
 
+    appointment_date = features["appointment_date"]
+    day_of_week = appointment_date.weekday()
+
+    row = out[0]
+    row[0] = _fill_missing(features.get("hour"))
+    row[1] = day_of_week
+    row[2] = appointment_date.month
+    row[3] = 1 if day_of_week >= 5 else 0
+    row[4] = _fill_missing(features.get("doctor_count"))
+    row[5] = _fill_missing(features.get("avg_patient_age"))
+    row[6] = _fill_missing(features.get("emergency_count"))
+
+    return out
+
+
+def build_feature_matrix(features_list: List[Dict]) -> np.ndarray:
+    """build_feature_row for many feature dicts, one row each."""
+    matrix = np.empty((len(features_list), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for i, features in enumerate(features_list):
+        build_feature_row(features, out=matrix[i:i + 1])
+    return matrix
+
+
+def get_features_and_target(df: pd.DataFrame):
     target = "appointment_count"
 
-    return df[features], df[target]
\ No newline at end of file
+    return df[FEATURE_COLUMNS], df[target]
@@ -9,6 +9,7 @@ from datetime import datetime, timedelta, time, date
 from sqlalchemy import text
 from app.core.db import SessionLocal
 from app.core.security import get_password_hash
+from app.ml.dataset_builder import reset_snapshot
 from app.models.users import User, UserRole
 from app.models.appointment import Appointment, DoctorAvailability
 from app.models.room import Room
@@ -250,7 +251,7 @@ def seed_staff_assignments(db, shifts, staff):
     print(f"  ✓ Created {len(assignments)} staff assignments\n")
 
 
-def seed_appointments(db, doctors):
+def seed_appointments(db, doctors, progress=None):
     """Create 14,000+ realistic appointments."""
     print("Seeding appointments (this may take a minute)...")
     
@@ -319,6 +320,8 @@ def seed_appointments(db, doctors):
                 db.add_all(appointments)
                 db.commit()
                 print(f"  ✓ Committed {len(appointments)} appointments...")
+                if progress:
+                    progress(appointments_seeded=patient_id_counter - 1000)
                 appointments = []
     
     # Commit remaining
@@ -330,8 +333,17 @@ def seed_appointments(db, doctors):
     print(f"  ✓ Created {total_count} total appointments\n")
 
 
-def run_full_seed():
-    """Execute complete database seeding."""
+def run_full_seed(progress=None):
+    """
+    Execute complete database seeding.
+
+    `progress`, if given, is called as progress(step=..., steps_done=..., steps_total=...)
+    after each step and with appointments_seeded while appointments are inserted.
+    """
+    def step_done(name, done):
+        if progress:
+            progress(step=name, steps_done=done, steps_total=7)
+
     print("="*60)
     print("PRODUCTION DATA SEEDER - ML Training Dataset")
     print("="*60 + "\n")
@@ -342,25 +354,41 @@ def run_full_seed():
         # Step 1: Truncate
         truncate_all_tables(db)
         
+        step_done("truncate", 1)
+
         # Step 2: Seed users
         users = seed_users(db)
         doctors = [u for u in users if u.role == UserRole.DOCTOR]
         staff = [u for u in users if u.role == UserRole.STAFF]
         
+        step_done("users", 2)
+
         # Step 3: Seed doctor availability
         seed_doctor_availability(db, doctors)
         
+        step_done("doctor_availability", 3)
+
         # Step 4: Seed rooms
         seed_rooms(db)
         
+        step_done("rooms", 4)
+
         # Step 5: Seed shifts
         shifts = seed_shifts(db)
         
+        step_done("shifts", 5)
+
         # Step 6: Seed staff assignments
         seed_staff_assignments(db, shifts, staff)
         
+        step_done("staff_assignments", 6)
+
         # Step 7: Seed appointments (MOST IMPORTANT)
-        seed_appointments(db, users)
+        seed_appointments(db, users, progress)
+        step_done("appointments", 7)
+
+        # Every snapshotted day was just regenerated
+        reset_snapshot()
         
         print("="*60)
         print("✅ DATABASE SEEDING COMPLETE")
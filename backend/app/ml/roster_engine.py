@@ -0,0 +1,748 @@
+# app/ml/roster_engine.py
+"""
+Week-horizon roster planning as an integer program.
+
+One binary variable per (staff, shift slot). Constraints:
+- coverage: assigned staff (plus a heavily penalised shortfall) >= required
+- at most one shift per staff per calendar day
+- no pair of shifts that overlap or leave less than the minimum rest
+- at most `max_shifts_per_week` shifts per staff in each 7-day block of the
+  horizon (days 0-6, 7-13, ...)
+- at most `max_consecutive_nights` nights in a row within the horizon, and
+  `max_hours_per_week` in any 7 days starting on a horizon day
+- fairness: every staff member's monthly total stays below a shared ceiling,
+  and that ceiling is minimised
+
+Solved locally with HiGHS through scipy.optimize.milp.
+
+The last solution per horizon is kept as a RosterState so that a single
+swap can be checked and repaired locally instead of re-solving the week.
+"""
+
+import copy as _copy
+import threading
+import time as _time
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import coo_matrix
+
+from app.core.shift_rules import DEFAULT_RULES, ShiftRules, check_assignment, violates_rest
+from app.core.shift_timeline import StaffTimeline
+
+# One staff member per this many predicted patients (same ratio as /ml/shift-optimize)
+PATIENTS_PER_STAFF = 5
+
+# Default shift layout, matching the seeded shifts: (start hour, duration)
+SHIFT_TEMPLATES = {
+    "NIGHT": (0, timedelta(hours=8)),
+    "MORNING": (8, timedelta(hours=8)),
+    "AFTERNOON": (16, timedelta(hours=8)),
+}
+
+# Objective weights: uncovered demand dominates, then the fairness ceiling,
+# then each staff member's existing workload.
+SHORTFALL_WEIGHT = 1000.0
+FAIRNESS_WEIGHT = 10.0
+WORKLOAD_WEIGHT = 0.1
+RECENT_WEIGHT = 0.05
+
+
+def required_staff(predicted_demand: float) -> int:
+    """Staff needed for one hour of predicted demand."""
+    return max(1, int(predicted_demand / PATIENTS_PER_STAFF))
+
+
+@dataclass
+class ShiftSlot:
+    """One shift to be staffed. shift_id is None for slots not yet created."""
+    shift_type: str
+    start_time: datetime
+    end_time: datetime
+    required: int = 1
+    shift_id: Optional[int] = None
+
+    @property
+    def day(self) -> date:
+        return self.start_time.date()
+
+
+@dataclass
+class StaffWorkload:
+    staff_id: int
+    name: str
+    monthly_assignments: int = 0
+    recent_assignments: int = 0
+
+
+@dataclass
+class RosterSolution:
+    slots: List[ShiftSlot]
+    staff: List[StaffWorkload]
+    # (staff index, slot index) pairs chosen by the solver
+    assignments: List[tuple]
+    shortfall: List[int]
+    status: str
+    solve_seconds: float
+    # (staff_id, slot index) pairs that were already assigned before solving
+    fixed: List[tuple] = field(default_factory=list)
+
+    def staff_for_slot(self, slot_index: int) -> List[StaffWorkload]:
+        return [self.staff[s] for s, k in self.assignments if k == slot_index]
+
+    def monthly_totals(self) -> Dict[int, int]:
+        totals = {member.staff_id: member.monthly_assignments for member in self.staff}
+        for s, _ in self.assignments:
+            totals[self.staff[s].staff_id] += 1
+        return totals
+
+    def to_assignments(self) -> List[Dict]:
+        """New assignments in a shape that can be bulk-applied."""
+        return [
+            {
+                "staff_id": self.staff[s].staff_id,
+                "shift_id": self.slots[k].shift_id,
+                "shift_type": self.slots[k].shift_type,
+                "start_time": self.slots[k].start_time,
+                "end_time": self.slots[k].end_time,
+            }
+            for s, k in sorted(self.assignments, key=lambda pair: (pair[1], pair[0]))
+        ]
+
+
+def week_slots(week_start: date, days: int = 7) -> List[ShiftSlot]:
+    """Template slots (NIGHT, MORNING, AFTERNOON) for each day, in start order."""
+    slots = []
+    for offset in range(days):
+        day = week_start + timedelta(days=offset)
+        for shift_type, (start_hour, duration) in sorted(SHIFT_TEMPLATES.items(), key=lambda t: t[1][0]):
+            start = datetime.combine(day, time(start_hour, 0))
+            slots.append(ShiftSlot(shift_type=shift_type, start_time=start, end_time=start + duration))
+    return slots
+
+
+def horizon_weeks(slots: Sequence[ShiftSlot]) -> List[int]:
+    """Index of the 7-day block (counted from the first slot's day) each slot falls in."""
+    if not slots:
+        return []
+    first = min(slot.day for slot in slots)
+    return [(slot.day - first).days // 7 for slot in slots]
+
+
+def apply_hourly_demand(slots: Sequence[ShiftSlot], hourly_demand: Dict[datetime, float]) -> None:
+    """Set each slot's requirement to the peak hourly staffing need within it."""
+    for slot in slots:
+        needs = []
+        hour = slot.start_time
+        while hour < slot.end_time:
+            if hour in hourly_demand:
+                needs.append(required_staff(hourly_demand[hour]))
+            hour += timedelta(hours=1)
+        slot.required = max(needs) if needs else 1
+
+
+def solve_roster(
+    slots: List[ShiftSlot],
+    staff: List[StaffWorkload],
+    existing: Sequence[tuple] = (),
+    rules: ShiftRules = DEFAULT_RULES,
+    time_limit: float = 30.0,
+) -> RosterSolution:
+    """
+    Assign staff to slots.
+
+    Args:
+        slots: Shift slots in the horizon
+        staff: Candidate staff with their current workload
+        existing: (staff_id, start_time, end_time, slot index or None) for
+            assignments that already exist in or next to the horizon. Those in
+            a slot count towards its coverage; all of them block conflicting
+            slots for that staff member.
+        rules: Rest and weekly limits
+        time_limit: Solver time limit in seconds
+
+    Returns:
+        RosterSolution with the new assignments
+    """
+    started = _time.perf_counter()
+    n_staff, n_slots = len(staff), len(slots)
+    index_of = {member.staff_id: i for i, member in enumerate(staff)}
+
+    # Slot pairs one person can't work both of (overlap or too little rest)
+    conflicts = [
+        (a, b)
+        for a in range(n_slots)
+        for b in range(a + 1, n_slots)
+        if violates_rest(slots[a].start_time, slots[a].end_time,
+                         slots[b].start_time, slots[b].end_time, rules)
+    ]
+    days = sorted({slot.day for slot in slots})
+    slots_by_day = {day: [k for k, slot in enumerate(slots) if slot.day == day] for day in days}
+    # The weekly shift cap applies to each 7-day block from the first horizon day
+    week_of = horizon_weeks(slots)
+    n_weeks = max(week_of, default=-1) + 1
+
+    # Runs of max_consecutive_nights + 1 calendar days: at most that many nights in each
+    run = rules.max_consecutive_nights + 1
+    night_windows = []
+    for first in days:
+        window_days = {first + timedelta(days=i) for i in range(run)}
+        if window_days <= set(days):
+            night_windows.append([k for k, slot in enumerate(slots)
+                                  if slot.shift_type == "NIGHT" and slot.day in window_days])
+
+    # Rolling-week hours only need their own rows if the weekly shift cap doesn't already imply them
+    slot_hours = [(slot.end_time - slot.start_time).total_seconds() / 3600 for slot in slots]
+    hour_windows = []
+    if slots and rules.max_shifts_per_week * max(slot_hours) > rules.max_hours_per_week:
+        for first in days:
+            window_start = datetime.combine(first, time(0, 0))
+            window_end = window_start + timedelta(days=7)
+            hour_windows.append((
+                window_start,
+                window_end,
+                [k for k, slot in enumerate(slots) if window_start <= slot.start_time < window_end],
+            ))
+
+    # Existing assignments: pre-count coverage and block conflicting variables
+    upper = np.ones((n_staff, n_slots))
+    covered = np.zeros(n_slots)
+    already = np.zeros((n_staff, n_weeks))
+    window_hours = np.zeros((n_staff, len(hour_windows)))
+    fixed = []
+    for staff_id, start, end, slot_index in existing:
+        s = index_of.get(staff_id)
+        if s is None:
+            continue
+        for w, (window_start, window_end, _) in enumerate(hour_windows):
+            if window_start <= start < window_end:
+                window_hours[s, w] += (end - start).total_seconds() / 3600
+        if slot_index is not None:
+            covered[slot_index] += 1
+            already[s, week_of[slot_index]] += 1
+            upper[s, slot_index] = 0
+            fixed.append((staff_id, slot_index))
+        for k, slot in enumerate(slots):
+            if k == slot_index:
+                continue
+            if slot.day == start.date() or violates_rest(start, end, slot.start_time, slot.end_time, rules):
+                upper[s, k] = 0
+
+    # Variable layout: x (n_staff * n_slots), shortfall (n_slots), ceiling (1)
+    n_x = n_staff * n_slots
+    n_vars = n_x + n_slots + 1
+    short_offset, ceiling_index = n_x, n_x + n_slots
+
+    def x(s, k):
+        return s * n_slots + k
+
+    monthly = np.array([m.monthly_assignments for m in staff], dtype=float)
+    recent = np.array([m.recent_assignments for m in staff], dtype=float)
+    cost = np.zeros(n_vars)
+    cost[:n_x] = np.repeat(1.0 + WORKLOAD_WEIGHT * monthly + RECENT_WEIGHT * recent, n_slots)
+    cost[short_offset:ceiling_index] = SHORTFALL_WEIGHT
+    cost[ceiling_index] = FAIRNESS_WEIGHT
+
+    rows, cols, vals, lower_b, upper_b = [], [], [], [], []
+    row = 0
+
+    def add_row(entries, lo, hi):
+        nonlocal row
+        for col, val in entries:
+            rows.append(row)
+            cols.append(col)
+            vals.append(val)
+        lower_b.append(lo)
+        upper_b.append(hi)
+        row += 1
+
+    # Coverage
+    for k, slot in enumerate(slots):
+        need = max(0.0, slot.required - covered[k])
+        add_row([(x(s, k), 1.0) for s in range(n_staff)] + [(short_offset + k, 1.0)], need, np.inf)
+
+    for s in range(n_staff):
+        # One shift per day (days already worked were blocked above)
+        for day_slots in slots_by_day.values():
+            if len(day_slots) > 1:
+                add_row([(x(s, k), 1.0) for k in day_slots], -np.inf, 1.0)
+        # Rest between shifts
+        for a, b in conflicts:
+            if upper[s, a] and upper[s, b]:
+                add_row([(x(s, a), 1.0), (x(s, b), 1.0)], -np.inf, 1.0)
+        # Weekly cap per 7-day block, counting assignments that already exist in it
+        for w in range(n_weeks):
+            add_row(
+                [(x(s, k), 1.0) for k in range(n_slots) if week_of[k] == w],
+                -np.inf,
+                max(0.0, rules.max_shifts_per_week - already[s, w]),
+            )
+        # Consecutive nights within the horizon
+        for window in night_windows:
+            add_row([(x(s, k), 1.0) for k in window], -np.inf, rules.max_consecutive_nights)
+        # Hours per rolling week, counting existing assignments
+        for w, (_, _, window) in enumerate(hour_windows):
+            add_row(
+                [(x(s, k), slot_hours[k]) for k in window],
+                -np.inf,
+                max(0.0, rules.max_hours_per_week - window_hours[s, w]),
+            )
+        # Fairness ceiling: monthly (which includes existing assignments) + new <= ceiling
+        add_row(
+            [(x(s, k), 1.0) for k in range(n_slots)] + [(ceiling_index, -1.0)],
+            -np.inf,
+            -monthly[s],
+        )
+
+    matrix = coo_matrix((vals, (rows, cols)), shape=(row, n_vars)).tocsr()
+    integrality = np.zeros(n_vars)
+    integrality[:n_x] = 1
+    var_upper = np.concatenate([upper.ravel(), np.full(n_slots, np.inf), [np.inf]])
+
+    result = milp(
+        cost,
+        constraints=LinearConstraint(matrix, lower_b, upper_b),
+        integrality=integrality,
+        bounds=Bounds(np.zeros(n_vars), var_upper),
+        options={"time_limit": time_limit, "disp": False},
+    )
+
+    if result.x is None:
+        return RosterSolution(slots, staff, [], [slot.required for slot in slots],
+                              status=result.message, solve_seconds=_time.perf_counter() - started, fixed=fixed)
+
+    chosen = np.argwhere(result.x[:n_x].reshape(n_staff, n_slots) > 0.5)
+    shortfall = np.rint(result.x[short_offset:ceiling_index]).astype(int).tolist()
+
+    return RosterSolution(
+        slots=slots,
+        staff=staff,
+        assignments=[(int(s), int(k)) for s, k in chosen],
+        shortfall=shortfall,
+        status="optimal" if result.status == 0 else result.message,
+        solve_seconds=_time.perf_counter() - started,
+        fixed=fixed,
+    )
+
+
+def roster_inputs(db, start_date: date, forecast_service, days: int = 7) -> tuple:
+    """
+    Cheap fingerprint of what plan_roster reads for this horizon.
+
+    Covers the model version, the horizon's shifts, the assignments in the
+    window workload is counted over, and the active staff (row counts and
+    latest updated_at). A cached plan with the same fingerprint is current.
+    Appointment data only moves the forecast and doesn't invalidate a plan.
+    """
+    from sqlalchemy import func
+    from app.models.shift import Shift, StaffShiftAssignment
+    from app.models.users import User, UserRole
+
+    horizon_start = datetime.combine(start_date, time(0, 0))
+    horizon_end = horizon_start + timedelta(days=days)
+    window_start = min(horizon_start.replace(day=1), horizon_start - timedelta(days=7))
+    window_end = max((horizon_start.replace(day=1) + timedelta(days=32)).replace(day=1),
+                     horizon_end + timedelta(days=1))
+
+    shifts = db.query(func.count(Shift.id), func.max(Shift.updated_at)).filter(
+        Shift.start_time >= horizon_start,
+        Shift.start_time < horizon_end,
+    ).one()
+    assignments = db.query(
+        func.count(StaffShiftAssignment.id), func.max(StaffShiftAssignment.updated_at)
+    ).join(Shift, Shift.id == StaffShiftAssignment.shift_id).filter(
+        Shift.start_time >= window_start,
+        Shift.start_time < window_end,
+    ).one()
+    staff = db.query(func.count(User.id), func.max(User.updated_at)).filter(
+        User.role.in_([UserRole.DOCTOR, UserRole.STAFF]),
+        User.is_active.is_(True),
+    ).one()
+    return (
+        start_date,
+        days,
+        getattr(forecast_service, "model_version", None),
+        tuple(shifts),
+        tuple(assignments),
+        tuple(staff),
+    )
+
+
+def plan_roster(
+    db,
+    start_date: date,
+    forecast_service,
+    days: int = 7,
+    rules: ShiftRules = DEFAULT_RULES,
+) -> RosterSolution:
+    """
+    Plan [start_date, start_date + days) from the database and the demand forecast.
+
+    Existing Shift rows in the horizon are used as slots (missing
+    day/type combinations fall back to SHIFT_TEMPLATES), and their active
+    assignments are kept and counted towards coverage.
+    """
+    inputs = roster_inputs(db, start_date, forecast_service, days)
+    solution = _solve_horizon(db, start_date, forecast_service, days, rules)
+    remember_solution(solution, rules, inputs)
+    return solution
+
+
+def current_state(
+    db,
+    start_date: date,
+    forecast_service,
+    days: int = 7,
+    rules: ShiftRules = DEFAULT_RULES,
+) -> "RosterState":
+    """
+    The cached plan for this horizon, solved again only if its inputs changed.
+
+    Costs three aggregate queries when the cached plan is still current.
+    """
+    inputs = roster_inputs(db, start_date, forecast_service, days)
+    with _roster_states_lock:
+        state = _roster_states.get(start_date)
+    if state is not None and state.inputs == inputs and state.rules == rules:
+        return state
+    solution = _solve_horizon(db, start_date, forecast_service, days, rules)
+    return remember_solution(solution, rules, inputs)
+
+
+def _solve_horizon(db, start_date: date, forecast_service, days: int, rules: ShiftRules) -> RosterSolution:
+    from app.ml.feature_builder import FeatureBuilder
+    from app.models.shift import Shift, StaffShiftAssignment, AssignmentStatus
+
+    end_date = start_date + timedelta(days=days)
+    horizon_start = datetime.combine(start_date, time(0, 0))
+    horizon_end = datetime.combine(end_date, time(0, 0))
+
+    # Slots: real shifts where they exist, templates elsewhere
+    slots = week_slots(start_date, days)
+    slot_index = {(slot.day, slot.shift_type): k for k, slot in enumerate(slots)}
+    shifts = db.query(Shift).filter(
+        Shift.start_time >= horizon_start,
+        Shift.start_time < horizon_end,
+    ).order_by(Shift.start_time, Shift.id).all()
+    shift_slot = {}
+    for shift in shifts:
+        shift_type = getattr(shift.type, "value", shift.type)
+        k = slot_index.get((shift.start_time.date(), shift_type))
+        if k is None or slots[k].shift_id is not None:
+            continue
+        slots[k].shift_id = shift.id
+        slots[k].start_time = shift.start_time
+        slots[k].end_time = shift.end_time
+        shift_slot[shift.id] = k
+
+    # Demand: batch features for every hour, one compiled prediction each
+    feature_builder = FeatureBuilder(db)
+    hourly_demand = {
+        features["appointment_date"]: forecast_service.predict_one(features)
+        for features in feature_builder.build_features_range(start_date, end_date)
+    }
+    apply_hourly_demand(slots, hourly_demand)
+
+    staff = [
+        StaffWorkload(
+            staff_id=row["staff_id"],
+            name=row["name"],
+            monthly_assignments=row["monthly_assignments"],
+            recent_assignments=row["recent_assignments"],
+        )
+        for row in feature_builder.get_available_staff(start_date)
+    ]
+
+    # Active assignments in (and one day either side of) the horizon
+    existing_rows = db.query(
+        StaffShiftAssignment.staff_id, Shift.id, Shift.start_time, Shift.end_time
+    ).join(Shift, Shift.id == StaffShiftAssignment.shift_id).filter(
+        Shift.start_time >= horizon_start - timedelta(days=1),
+        Shift.start_time < horizon_end + timedelta(days=1),
+        StaffShiftAssignment.status.in_([AssignmentStatus.ASSIGNED, AssignmentStatus.SWAP_REQUESTED]),
+    ).all()
+    existing = [
+        (staff_id, start, end, shift_slot.get(shift_id))
+        for staff_id, shift_id, start, end in existing_rows
+    ]
+
+    return solve_roster(slots, staff, existing, rules)
+
+
+# ─── Local repair ─────────────────────────────────────────
+
+@dataclass
+class RosterAdjustment:
+    action: str  # "assign" or "unassign"
+    staff_id: int
+    slot_index: int
+
+
+@dataclass
+class RepairResult:
+    slot_index: int
+    from_staff_id: int
+    to_staff_id: Optional[int]
+    feasible: bool
+    violations: List[str]
+    adjustments: List[RosterAdjustment]
+    required: int
+    assigned_after: int
+    # staff_id -> (monthly total before, after)
+    fairness_delta: Dict[int, tuple]
+    repair_seconds: float
+
+
+class RosterState:
+    """
+    Mutable index over a solved roster for constant-time local checks.
+
+    Keeps staff <-> slot membership (existing and planned assignments) and
+    each slot's conflicting slots, so a single changed assignment can be
+    rechecked without re-solving.
+    """
+
+    def __init__(self, solution: RosterSolution, rules: ShiftRules = DEFAULT_RULES, inputs: Optional[tuple] = None):
+        self.solution = solution
+        self.rules = rules
+        # roster_inputs() fingerprint the solution was planned from
+        self.inputs = inputs
+        self.slots = solution.slots
+        self.staff = {member.staff_id: member for member in solution.staff}
+        self.horizon_start = min(slot.start_time for slot in self.slots)
+        self.horizon_end = max(slot.end_time for slot in self.slots)
+        self.lock = threading.Lock()
+
+        self.slot_staff = [set() for _ in self.slots]
+        self.staff_slots = {staff_id: set() for staff_id in self.staff}
+        for staff_id, k in solution.fixed:
+            self._add(staff_id, k)
+        for s, k in solution.assignments:
+            self._add(solution.staff[s].staff_id, k)
+
+        self.monthly = solution.monthly_totals()
+        self.week_of = horizon_weeks(self.slots)
+        # Same-day or rest-violating slot pairs
+        self.conflicts = [
+            {
+                j for j, other in enumerate(self.slots)
+                if j != k and (
+                    other.day == slot.day
+                    or violates_rest(slot.start_time, slot.end_time, other.start_time, other.end_time, rules)
+                )
+            }
+            for k, slot in enumerate(self.slots)
+        ]
+
+    def _add(self, staff_id: int, k: int) -> None:
+        self.slot_staff[k].add(staff_id)
+        self.staff_slots.setdefault(staff_id, set()).add(k)
+
+    def _remove(self, staff_id: int, k: int) -> None:
+        self.slot_staff[k].discard(staff_id)
+        self.staff_slots.get(staff_id, set()).discard(k)
+
+    def _week_count(self, slot_indices, k: int) -> int:
+        """How many of slot_indices fall in the same 7-day block as slot k."""
+        return sum(1 for j in slot_indices if self.week_of[j] == self.week_of[k])
+
+    def covers(self, moment: datetime) -> bool:
+        return self.horizon_start <= moment < self.horizon_end
+
+    def slot_for(self, shift_id: Optional[int], start_time: datetime) -> Optional[int]:
+        for k, slot in enumerate(self.slots):
+            if shift_id is not None and slot.shift_id == shift_id:
+                return k
+        for k, slot in enumerate(self.slots):
+            if slot.start_time == start_time:
+                return k
+        return None
+
+    def violations_for(self, staff_id: int, k: int, ignore: Sequence[int] = ()) -> List[str]:
+        """Rule violations if staff_id also worked slot k (slots in `ignore` are being vacated)."""
+        current = self.staff_slots.get(staff_id, set()) - set(ignore)
+        problems = []
+        if k in current:
+            problems.append(f"staff {staff_id} is already on this shift")
+        for j in sorted(current & self.conflicts[k]):
+            slot = self.slots[j]
+            problems.append(
+                f"staff {staff_id} works {slot.shift_type} {slot.start_time:%Y-%m-%d %H:%M}, "
+                f"less than {self.rules.min_rest_hours:g}h rest or same day"
+            )
+        if self._week_count(current, k) + 1 > self.rules.max_shifts_per_week:
+            problems.append(f"staff {staff_id} would exceed {self.rules.max_shifts_per_week} shifts")
+        if not problems:
+            problems.extend(f"staff {staff_id}: {problem}" for problem in self._fatigue(current, k))
+        return problems
+
+    def _fatigue(self, slot_indices, k: int) -> List[str]:
+        """Consecutive-night and rolling-hours rules for slot k on top of the given slots."""
+        timeline = StaffTimeline()
+        for j in slot_indices:
+            other = self.slots[j]
+            timeline.add(other.start_time, other.end_time, other.shift_type == "NIGHT")
+        slot = self.slots[k]
+        return check_assignment(timeline, slot.start_time, slot.end_time, slot.shift_type == "NIGHT", self.rules)
+
+    def best_replacement(self, k: int, exclude: Sequence[int] = ()) -> Optional[int]:
+        """Fairest staff member who can take slot k without breaking any rule."""
+        excluded = set(exclude) | self.slot_staff[k]
+        best, best_key = None, None
+        for staff_id, slots in self.staff_slots.items():
+            if staff_id in excluded or self._week_count(slots, k) >= self.rules.max_shifts_per_week:
+                continue
+            if slots & self.conflicts[k] or self._fatigue(slots, k):
+                continue
+            member = self.staff.get(staff_id)
+            key = (self.monthly.get(staff_id, 0), getattr(member, "recent_assignments", 0), staff_id)
+            if best_key is None or key < best_key:
+                best, best_key = staff_id, key
+        return best
+
+    def propose_swap(self, k: int, from_staff_id: int, to_staff_id: Optional[int]) -> RepairResult:
+        """
+        Evaluate moving slot k from one staff member to another (or to nobody).
+
+        Only slot k, the two staff members and the slots they give up are
+        touched. If the target conflicts with their own shifts, those shifts
+        are proposed for hand-over to the fairest eligible colleague
+        (preferring the original holder, i.e. a straight swap). If slot k
+        ends up short, a replacement is proposed for it too.
+        """
+        started = _time.perf_counter()
+        with self.lock:
+            violations, adjustments = [], []
+            slot = self.slots[k]
+            touched = {from_staff_id}
+
+            if to_staff_id is not None:
+                touched.add(to_staff_id)
+                if to_staff_id not in self.staff:
+                    violations.append(f"staff {to_staff_id} is not on the active roster")
+                conflicting = sorted(self.staff_slots.get(to_staff_id, set()) & self.conflicts[k])
+                target_problems = self.violations_for(to_staff_id, k, ignore=conflicting)
+                violations.extend(target_problems)
+                if not target_problems:
+                    adjustments.append(RosterAdjustment("unassign", from_staff_id, k))
+                    adjustments.append(RosterAdjustment("assign", to_staff_id, k))
+                    for j in conflicting:
+                        adjustments.append(RosterAdjustment("unassign", to_staff_id, j))
+                        # Prefer handing the target's clashing shift back to the requester
+                        if not self.violations_for(from_staff_id, j, ignore=[k]):
+                            cover = from_staff_id
+                        else:
+                            cover = self.best_replacement(j, exclude=[from_staff_id, to_staff_id])
+                        if cover is None:
+                            violations.append(
+                                f"no eligible cover for {self.slots[j].shift_type} "
+                                f"{self.slots[j].start_time:%Y-%m-%d %H:%M} given up by staff {to_staff_id}"
+                            )
+                        else:
+                            touched.add(cover)
+                            adjustments.append(RosterAdjustment("assign", cover, j))
+            else:
+                adjustments.append(RosterAdjustment("unassign", from_staff_id, k))
+                assigned = len(self.slot_staff[k]) - (from_staff_id in self.slot_staff[k])
+                if assigned < slot.required:
+                    cover = self.best_replacement(k, exclude=[from_staff_id])
+                    if cover is None:
+                        violations.append("no eligible replacement keeps this shift covered")
+                    else:
+                        touched.add(cover)
+                        adjustments.append(RosterAdjustment("assign", cover, k))
+
+            delta = {staff_id: 0 for staff_id in touched}
+            assigned_after = len(self.slot_staff[k])
+            for adjustment in adjustments:
+                step = 1 if adjustment.action == "assign" else -1
+                delta[adjustment.staff_id] += step
+                if adjustment.slot_index == k:
+                    assigned_after += step
+
+            fairness_delta = {
+                staff_id: (self.monthly.get(staff_id, 0), self.monthly.get(staff_id, 0) + change)
+                for staff_id, change in delta.items()
+            }
+
+        return RepairResult(
+            slot_index=k,
+            from_staff_id=from_staff_id,
+            to_staff_id=to_staff_id,
+            feasible=not violations,
+            violations=violations,
+            adjustments=adjustments,
+            required=slot.required,
+            assigned_after=assigned_after,
+            fairness_delta=fairness_delta,
+            repair_seconds=_time.perf_counter() - started,
+        )
+
+    def copy(self) -> "RosterState":
+        """Independent membership and monthly totals, for what-if checks that mustn't touch the cache."""
+        with self.lock:
+            clone = _copy.copy(self)
+            clone.slot_staff = [set(members) for members in self.slot_staff]
+            clone.staff_slots = {staff_id: set(slots) for staff_id, slots in self.staff_slots.items()}
+            clone.monthly = dict(self.monthly)
+        clone.lock = threading.Lock()
+        return clone
+
+    def sync(self, k: int, assign: Sequence[int] = (), unassign: Sequence[int] = ()) -> None:
+        """
+        Bring slot k in line with committed assignments.
+
+        Unlike apply(), changes the state already reflects are skipped, so
+        monthly totals aren't counted twice.
+        """
+        with self.lock:
+            for staff_id in unassign:
+                if staff_id in self.slot_staff[k]:
+                    self._remove(staff_id, k)
+                    self.monthly[staff_id] = self.monthly.get(staff_id, 0) - 1
+            for staff_id in assign:
+                if staff_id not in self.slot_staff[k]:
+                    self._add(staff_id, k)
+                    self.monthly[staff_id] = self.monthly.get(staff_id, 0) + 1
+
+    def apply(self, adjustments: Sequence[RosterAdjustment]) -> None:
+        """Record changes that were actually made so later checks see them."""
+        with self.lock:
+            for adjustment in adjustments:
+                if adjustment.action == "assign":
+                    self._add(adjustment.staff_id, adjustment.slot_index)
+                    self.monthly[adjustment.staff_id] = self.monthly.get(adjustment.staff_id, 0) + 1
+                else:
+                    self._remove(adjustment.staff_id, adjustment.slot_index)
+                    self.monthly[adjustment.staff_id] = self.monthly.get(adjustment.staff_id, 0) - 1
+
+
+# Last solved roster per horizon start, kept for local repair
+_roster_states: Dict[date, RosterState] = {}
+_roster_states_lock = threading.Lock()
+MAX_CACHED_ROSTERS = 8
+
+
+def remember_solution(
+    solution: RosterSolution,
+    rules: ShiftRules = DEFAULT_RULES,
+    inputs: Optional[tuple] = None,
+) -> RosterState:
+    state = RosterState(solution, rules, inputs)
+    with _roster_states_lock:
+        _roster_states[state.horizon_start.date()] = state
+        while len(_roster_states) > MAX_CACHED_ROSTERS:
+            _roster_states.pop(min(_roster_states))
+    return state
+
+
+def cached_state(moment: datetime) -> Optional[RosterState]:
+    """Most recently planned roster whose horizon covers `moment`."""
+    with _roster_states_lock:
+        for state in reversed(list(_roster_states.values())):
+            if state.covers(moment):
+                return state
+    return None
@@ -1,17 +1,22 @@
 from typing import Any
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-import pandas as pd
 
 from app.core import deps
+from app.core.metrics import FORECAST_HORIZON_LOOKUPS
+from app.core.timing import TimedRoute, span
+from app.models.shift import AssignmentStatus, Shift, StaffShiftAssignment
 from app.models.users import User, UserRole
 from app.schemas import ml as schemas
+from app.ml import forecast_horizon
 from app.ml.forecast_service import ForecastService
 from app.ml.feature_builder import FeatureBuilder
+from app.ml.roster_engine import PATIENTS_PER_STAFF, RosterSolution, current_state, plan_roster, required_staff
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 # Singleton instance to avoid reloading model on each request
 _forecast_service: ForecastService | None = None
@@ -20,6 +25,9 @@ _forecast_service: ForecastService | None = None
 def get_forecast_service() -> ForecastService:
     """Get or create singleton ForecastService instance."""
     global _forecast_service
+    # Pick up a promoted model without restarting the API
+    if _forecast_service is not None and _forecast_service.is_stale():
+        _forecast_service = None
     if _forecast_service is None:
         try:
             _forecast_service = ForecastService()
@@ -51,7 +59,26 @@ def predict_demand(
     automatically extracted from database.
     
     **Returns**: Predicted demand with features used for transparency.
+    Slots covered by the precomputed horizon (precompute_forecasts job) are
+    served from the forecast_horizon table; others are computed live.
     """
+    service = get_forecast_service()
+
+    stored = forecast_horizon.lookup(db, service, request.date, request.hour)
+    FORECAST_HORIZON_LOOKUPS.inc("hit" if stored is not None else "miss")
+    if stored is not None:
+        return schemas.ForecastResponse(
+            date=request.date,
+            hour=request.hour,
+            predicted_demand=stored.predicted_demand,
+            features_used={
+                "doctor_count": stored.doctor_count,
+                "avg_patient_age": stored.avg_patient_age,
+                "emergency_count": stored.emergency_count
+            },
+            source="precomputed"
+        )
+
     # Build features from database
     feature_builder = FeatureBuilder(db)
     
@@ -63,15 +90,9 @@ def predict_demand(
             detail=f"Failed to extract features from database: {str(e)}"
         )
     
-    # Convert to DataFrame for ML service
-    df = pd.DataFrame([features])
-    
-    # Get forecast service and make prediction
-    service = get_forecast_service()
-    
+    # Make prediction (compiled single-row path)
     try:
-        predictions = service.predict(df)
-        predicted_count = predictions[0]
+        predicted_count = service.predict_one(features)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -87,7 +108,8 @@ def predict_demand(
             "doctor_count": features["doctor_count"],
             "avg_patient_age": features["avg_patient_age"],
             "emergency_count": features["emergency_count"]
-        }
+        },
+        source="live"
     )
 
 
@@ -120,50 +142,60 @@ def optimize_shift(
         )
     
     # Predict demand
-    df = pd.DataFrame([features])
     service = get_forecast_service()
     
     try:
-        predictions = service.predict(df)
-        predicted_demand = predictions[0]
+        predicted_demand = service.predict_one(features)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Prediction failed: {str(e)}"
         )
     
-    # Step 2: Get available staff from database
+    # Step 2: The week plan containing this date (cached; re-planned only when its inputs changed)
+    week_start = request.date - timedelta(days=request.date.weekday())
     try:
-        # Map hour to shift type for potential future filtering
-        if request.hour < 8:
-            shift_type = "NIGHT"
-        elif request.hour < 16:
-            shift_type = "MORNING"
-        else:
-            shift_type = "AFTERNOON"
-        
-        available_staff = feature_builder.get_available_staff(
-            target_date=request.date,
-            shift_type=shift_type
-        )
+        with span("roster"):
+            state = current_state(db, week_start, service)
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to fetch staff: {str(e)}"
+            detail=f"Failed to plan roster: {str(e)}"
         )
     
-    if not available_staff:
+    if not state.staff:
         raise HTTPException(
             status_code=404,
             detail="No staff available in database"
         )
     
     # Step 3: Calculate staffing needs (1 staff per 5-7 patients)
-    recommended_count = max(1, int(predicted_demand / 5))
+    recommended_count = required_staff(predicted_demand)
     
-    # Step 4: Staff already sorted by SQL query (recent_assignments, monthly_assignments, name)
-    # No additional sorting needed - just take top N
-    assigned_staff = available_staff[:recommended_count]
+    # Step 4: Staff on the shift covering this hour (already assigned + solver picks),
+    # ranked by workload (recent_assignments, monthly_assignments, name)
+    target_time = datetime.combine(request.date, time(request.hour, 0))
+    slot_index = next(
+        (k for k, slot in enumerate(state.slots) if slot.start_time <= target_time < slot.end_time),
+        None,
+    )
+    if slot_index is not None:
+        with state.lock:
+            slot_staff = [state.staff[staff_id] for staff_id in state.slot_staff[slot_index] if staff_id in state.staff]
+        slot_staff.sort(key=lambda m: (m.recent_assignments, m.monthly_assignments, m.name or ""))
+        assigned_staff = [
+            {"name": m.name, "recent_assignments": m.recent_assignments}
+            for m in slot_staff[:recommended_count]
+        ]
+        basis = "Staff chosen by the weekly roster plan (coverage, rest rules, monthly fairness)."
+    else:
+        # No planned shift covers this hour (e.g. a gap between custom shift times):
+        # fall back to the fairest available staff, already sorted by SQL
+        assigned_staff = [
+            {"name": s["name"], "recent_assignments": s["recent_assignments"]}
+            for s in feature_builder.get_available_staff(target_date=request.date)[:recommended_count]
+        ]
+        basis = "No planned shift covers this hour; staff prioritized by workload balance (7-day window + monthly fairness)."
     
     # Build response
     priority_order = [s["name"] for s in assigned_staff]
@@ -179,7 +211,7 @@ def optimize_shift(
     
     recommendation_text = (
         f"Assign {', '.join(priority_order)} based on predicted load of "
-        f"{predicted_demand:.1f} patients. Staff prioritized by workload balance (7-day window + monthly fairness)."
+        f"{predicted_demand:.1f} patients. {basis}"
     )
     
     return schemas.ShiftOptimizeResponse(
@@ -191,3 +223,150 @@ def optimize_shift(
         staff_details=staff_details,
         recommendation_text=recommendation_text
     )
+
+
+def _roster_response(solution: RosterSolution, start_date, days: int) -> schemas.RosterOptimizeResponse:
+    existing_by_slot = {}
+    for staff_id, k in solution.fixed:
+        existing_by_slot.setdefault(k, []).append(staff_id)
+    new_by_slot = {}
+    for s, k in solution.assignments:
+        new_by_slot.setdefault(k, []).append(solution.staff[s].staff_id)
+
+    totals = solution.monthly_totals()
+    return schemas.RosterOptimizeResponse(
+        start_date=start_date,
+        days=days,
+        status=solution.status,
+        solve_seconds=solution.solve_seconds,
+        slots=[
+            schemas.RosterSlot(
+                shift_id=slot.shift_id,
+                shift_type=slot.shift_type,
+                start_time=slot.start_time,
+                end_time=slot.end_time,
+                required=slot.required,
+                existing_staff_ids=existing_by_slot.get(k, []),
+                new_staff_ids=new_by_slot.get(k, []),
+                shortfall=solution.shortfall[k],
+            )
+            for k, slot in enumerate(solution.slots)
+        ],
+        assignments=solution.to_assignments(),
+        max_monthly_assignments=max(totals.values(), default=0),
+        min_monthly_assignments=min(totals.values(), default=0),
+    )
+
+
+@router.post("/roster-optimize", response_model=schemas.RosterOptimizeResponse)
+def optimize_roster(
+    *,
+    request: schemas.RosterOptimizeRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.HR])),
+) -> Any:
+    """
+    Plan MORNING/AFTERNOON/NIGHT shifts for a whole horizon (Admin/HR only).
+    
+    Demand comes from the forecaster for every hour; the roster engine then
+    solves coverage, rest rules, weekly limits and monthly fairness together.
+    
+    **Returns**: Per-shift coverage and the full set of new assignments to apply.
+    """
+    service = get_forecast_service()
+    
+    try:
+        solution = plan_roster(db, request.start_date, service, days=request.days)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to plan roster: {str(e)}"
+        )
+    
+    return _roster_response(solution, request.start_date, request.days)
+
+
+MAX_COVERAGE_DAYS = 62
+
+
+@router.get("/coverage-gaps", response_model=schemas.CoverageGapsResponse)
+def coverage_gaps(
+    start_date: date,
+    end_date: date,
+    include_all: bool = False,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.HR])),
+) -> Any:
+    """
+    Compare forecast demand with assigned staff for every hour in [start_date, end_date] (Admin/HR only).
+    
+    Demand is forecast for the whole range in one batch; headcount per hour comes
+    from one query over shifts and assignments. Required staff uses the same
+    1-per-5-patients ratio as /shift-optimize.
+    
+    **Returns**: Understaffed hours (every hour with include_all=true) and totals.
+    """
+    days = (end_date - start_date).days + 1
+    if days < 1 or days > MAX_COVERAGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must be 1-{MAX_COVERAGE_DAYS} days")
+    horizon_start = datetime.combine(start_date, time(0, 0))
+    horizon_end = horizon_start + timedelta(days=days)
+    n_hours = days * 24
+    
+    feature_builder = FeatureBuilder(db)
+    try:
+        features = feature_builder.build_features_range(start_date, start_date + timedelta(days=days))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to extract features: {str(e)}"
+        )
+    
+    service = get_forecast_service()
+    try:
+        demand = service.predict_many(features)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction failed: {str(e)}"
+        )
+    
+    # Headcount per hour: +1 at the first hour a shift touches, -1 after the last
+    rows = db.query(Shift.start_time, Shift.end_time).join(
+        StaffShiftAssignment, StaffShiftAssignment.shift_id == Shift.id
+    ).filter(
+        Shift.start_time < horizon_end,
+        Shift.end_time > horizon_start,
+        StaffShiftAssignment.status != AssignmentStatus.SWAPPED,
+    ).all()
+    change = np.zeros(n_hours + 1, dtype=np.int64)
+    if rows:
+        bounds = np.array(rows, dtype="datetime64[s]")
+        offsets = (bounds - np.datetime64(horizon_start, "s")).astype(np.int64)
+        first_hour = np.clip(offsets[:, 0] // 3600, 0, n_hours)
+        end_hour = np.clip(-(-offsets[:, 1] // 3600), 0, n_hours)
+        np.add.at(change, first_hour, 1)
+        np.add.at(change, end_hour, -1)
+    assigned = np.cumsum(change)[:n_hours]
+    
+    required = np.maximum(1, np.floor(demand / PATIENTS_PER_STAFF)).astype(np.int64)
+    shortfall = np.maximum(0, required - assigned)
+    
+    hours = np.arange(n_hours) if include_all else np.flatnonzero(shortfall)
+    return schemas.CoverageGapsResponse(
+        start_date=start_date,
+        end_date=end_date,
+        hours=n_hours,
+        understaffed_hours=int(np.count_nonzero(shortfall)),
+        total_shortfall=int(shortfall.sum()),
+        gaps=[
+            schemas.CoverageHour(
+                hour=horizon_start + timedelta(hours=int(h)),
+                predicted_demand=float(demand[h]),
+                required_staff=int(required[h]),
+                assigned_staff=int(assigned[h]),
+                shortfall=int(shortfall[h]),
+            )
+            for h in hours
+        ],
+    )
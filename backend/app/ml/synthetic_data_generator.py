@@ -1,51 +1,263 @@
 # app/ml/synthetic_data_generator.py
+"""
+Vectorized, reproducible synthetic appointment generator.
 
-import random
-from datetime import datetime, timedelta
-from app.core.db import SessionLocal
-from app.models.appointment import Appointment
-from app.models.users import User
+Appointments are drawn column by column with NumPy (hour profile, Gaussian
+ages, emergency ratio as in production_data_seeder) in shards of
+SHARD_DAYS days. Each shard has its own seed derived from (seed, shard
+index) and its row offset is fixed up front, so the output depends only on
+the seed and the scale, not on how many processes generate it.
 
+Shards go either to Parquet files or straight into the COPY loader:
 
-def seed_synthetic_data(days=90):
+    python -m app.ml.synthetic_data_generator --out data/bench --days 365 --appointments-per-day 27000 --seed 7
+    python -m app.ml.bulk_seeder --days 365 --appointments-per-day 27000 --seed 7   # same rows, into Postgres
+"""
 
-    db = SessionLocal()
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ml.production_data_seeder import (
+    CONSULTATION_REASONS,
+    EMERGENCY_REASONS,
+    FEMALE_NAMES,
+    LASTNAMES,
+    MALE_NAMES,
+)
+
+SHARD_DAYS = 14
+FIRST_PATIENT_ID = 1000
+
+# Hour profile of production_data_seeder.seed_appointments (peak at 2-3 PM)
+APPOINTMENT_HOURS = np.arange(8, 20)
+APPOINTMENT_HOUR_WEIGHTS = np.array([5, 8, 10, 12, 15, 14, 12, 10, 8, 6, 5, 4], dtype=np.float64)
+EMERGENCY_RATE = 0.175
+
+APPOINTMENT_COLUMNS = [
+    "patient_id", "doctor_id", "appointment_date", "start_time", "end_time", "patient_name",
+    "patient_phone", "patient_gender", "patient_age", "appointment_type", "status", "reason_for_visit",
+]
+
+
+@dataclass(frozen=True)
+class Shard:
+    index: int
+    start: date
+    daily_counts: Tuple[int, ...]
+    first_patient_id: int
+
+    @property
+    def rows(self) -> int:
+        return sum(self.daily_counts)
+
+
+def daily_counts(start: date, days: int, appointments_per_day: int, seed: Optional[int]) -> np.ndarray:
+    """Appointments per day: 80-120% of the weekday mean on weekdays, 40-64% on weekends."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(0,)))
+    weekdays = (np.arange(days) + start.weekday()) % 7
+    weekend = weekdays >= 5
+    low = np.where(weekend, round(appointments_per_day * 0.4), round(appointments_per_day * 0.8))
+    high = np.where(weekend, round(appointments_per_day * 0.64), round(appointments_per_day * 1.2))
+    return rng.integers(low, np.maximum(low, high), endpoint=True)
+
+
+def plan_shards(start: date, days: int, appointments_per_day: int,
+                seed: Optional[int], shard_days: int = SHARD_DAYS) -> List[Shard]:
+    counts = daily_counts(start, days, appointments_per_day, seed)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return [
+        Shard(
+            index=index,
+            start=start + timedelta(days=first),
+            daily_counts=tuple(int(c) for c in counts[first:first + shard_days]),
+            first_patient_id=FIRST_PATIENT_ID + int(offsets[first]),
+        )
+        for index, first in enumerate(range(0, days, shard_days))
+    ]
+
+
+def generate_shard(shard: Shard, doctor_ids: Sequence[int], seed: Optional[int]):
+    """One shard's appointments as a pyarrow Table (columns as in the appointments table, enum names)."""
+    import pyarrow as pa
+
+    # Depends only on (seed, shard index), not on which process runs the shard
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(1, shard.index)))
+    counts = np.asarray(shard.daily_counts, dtype=np.int64)
+    n = int(counts.sum())
+
+    day_offsets = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+    dates = np.datetime64(shard.start, "D") + day_offsets
+
+    hours = rng.choice(APPOINTMENT_HOURS, size=n, p=APPOINTMENT_HOUR_WEIGHTS / APPOINTMENT_HOUR_WEIGHTS.sum())
+    minutes = rng.choice(np.array([0, 15, 30, 45]), size=n)
+    start_seconds = (hours * 60 + minutes) * 60
+    end_seconds = start_seconds + 30 * 60  # 30-minute slots
 
-    doctors = db.query(User).filter(User.role == "doctor").all()
+    female = rng.random(n) < 0.5
+    first_names = np.where(
+        female,
+        np.asarray(FEMALE_NAMES, dtype=object)[rng.integers(0, len(FEMALE_NAMES), n)],
+        np.asarray(MALE_NAMES, dtype=object)[rng.integers(0, len(MALE_NAMES), n)],
+    )
+    last_names = np.asarray(LASTNAMES, dtype=object)[rng.integers(0, len(LASTNAMES), n)]
+    ages = np.clip(np.trunc(rng.normal(45, 20, n)), 5, 95).astype(np.int32)
+    emergency = rng.random(n) < EMERGENCY_RATE
+    reasons = np.where(
+        emergency,
+        np.asarray(EMERGENCY_REASONS, dtype=object)[rng.integers(0, len(EMERGENCY_REASONS), n)],
+        np.asarray(CONSULTATION_REASONS, dtype=object)[rng.integers(0, len(CONSULTATION_REASONS), n)],
+    )
+    phones = rng.integers(1000, 10000, n)
 
-    if not doctors:
-        raise ValueError("Create doctors before seeding data.")
+    return pa.table({
+        "patient_id": pa.array(np.arange(shard.first_patient_id, shard.first_patient_id + n, dtype=np.int64)),
+        "doctor_id": pa.array(np.asarray(doctor_ids, dtype=np.int64)[rng.integers(0, len(doctor_ids), n)]),
+        "appointment_date": pa.array(dates, type=pa.date32()),
+        "start_time": pa.array(start_seconds.astype(np.int32), type=pa.time32("s")),
+        "end_time": pa.array(end_seconds.astype(np.int32), type=pa.time32("s")),
+        "patient_name": pa.array(first_names + " " + last_names, type=pa.string()),
+        "patient_phone": pa.array(np.char.add("555-", phones.astype(str)), type=pa.string()),
+        "patient_gender": pa.array(np.where(female, "FEMALE", "MALE"), type=pa.string()),
+        "patient_age": pa.array(ages),
+        "appointment_type": pa.array(np.where(emergency, "EMERGENCY", "CONSULTATION"), type=pa.string()),
+        "status": pa.array(np.full(n, "COMPLETED"), type=pa.string()),
+        "reason_for_visit": pa.array(reasons, type=pa.string()),
+    })
 
-    base_date = datetime.now() - timedelta(days=days)
 
-    for i in range(days):
-        date = base_date + timedelta(days=i)
+def shard_to_copy_text(shard: Shard, doctor_ids: Sequence[int], seed: Optional[int]) -> bytes:
+    """One shard as COPY FROM STDIN text (tab-separated, no header)."""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
 
-        for hour in range(9, 17):
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(
+        generate_shard(shard, doctor_ids, seed),
+        sink,
+        write_options=pa_csv.WriteOptions(include_header=False, delimiter="\t", quoting_style="none"),
+    )
+    return sink.getvalue().to_pybytes()
 
-            for _ in range(random.randint(5, 15)):
 
-                appointment = Appointment(
-                    patient_id=random.randint(1, 1000),
-                    doctor_id=random.choice(doctors).id,
-                    appointment_date=date.date(),
-                    start_time=datetime.strptime(f"{hour}:00", "%H:%M").time(),
-                    end_time=datetime.strptime(f"{hour+1}:00", "%H:%M").time(),
-                    patient_name="Test Patient",
-                    patient_phone="9999999999",
-                    patient_gender="Male",
-                    patient_age=random.randint(20, 70),
-                    appointment_type=random.choice(["Consultation", "Emergency"]),
-                    status="Completed",
-                    reason_for_visit="General Checkup",
-                )
+def write_shard_parquet(shard: Shard, doctor_ids: Sequence[int], seed: Optional[int], out_dir: str) -> str:
+    import pyarrow.parquet as pq
 
-                db.add(appointment)
+    path = os.path.join(out_dir, f"appointments-{shard.index:05d}.parquet")
+    pq.write_table(generate_shard(shard, doctor_ids, seed), path)
+    return path
 
-    db.commit()
-    db.close()
+
+def _ordered_results(pool: ProcessPoolExecutor, func, shards: List[Shard], *args, window: int) -> Iterator:
+    """pool.map with at most `window` shards in flight, so unconsumed results don't pile up in memory."""
+    pending = deque()
+    for shard in shards:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(func, shard, *args))
+    while pending:
+        yield pending.popleft().result()
+
+
+def resolve_seed(seed: Optional[int]) -> int:
+    """A concrete seed for the run (fresh entropy if None), so it can be reported and replayed."""
+    return int(np.random.SeedSequence(seed).entropy)
+
+
+def appointment_copy_chunks(
+    start: date,
+    days: int,
+    appointments_per_day: int,
+    doctor_ids: Sequence[int],
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Iterator[bytes]:
+    """COPY text for every shard, in date order, generated `workers` processes ahead of the consumer."""
+    seed = resolve_seed(seed)
+    shards = plan_shards(start, days, appointments_per_day, seed)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(shards)))
+    if workers == 1:
+        for shard in shards:
+            yield shard_to_copy_text(shard, doctor_ids, seed)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _ordered_results(pool, shard_to_copy_text, shards, doctor_ids, seed, window=2 * workers)
+
+
+def write_parquet(
+    out_dir: str,
+    start: date,
+    days: int,
+    appointments_per_day: int,
+    doctor_ids: Sequence[int],
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> List[str]:
+    """Write one Parquet file per shard under `out_dir`; returns the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    seed = resolve_seed(seed)
+    shards = plan_shards(start, days, appointments_per_day, seed)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(shards)))
+    if workers == 1:
+        return [write_shard_parquet(shard, doctor_ids, seed, out_dir) for shard in shards]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(_ordered_results(pool, write_shard_parquet, shards, doctor_ids, seed, out_dir, window=2 * workers))
+
+
+def seed_synthetic_data(days=90, appointments_per_day=125, seed=None, workers=None):
+    """Append `days` of synthetic appointments for the existing doctors (COPY, vectorized)."""
+    from app.core.db import SessionLocal
+    from app.ml.bulk_seeder import copy_rows
+    from app.ml.dataset_builder import reset_snapshot
+    from app.models.users import User, UserRole
+
+    db = SessionLocal()
+    try:
+        doctor_ids = [user_id for (user_id,) in db.query(User.id).filter(User.role == UserRole.DOCTOR).order_by(User.id)]
+        if not doctor_ids:
+            raise ValueError("Create doctors before seeding data.")
+
+        start = (datetime.now() - timedelta(days=days)).date()
+        chunks = appointment_copy_chunks(start, days, appointments_per_day, doctor_ids, seed, workers)
+        copy_rows(db, "appointments", APPOINTMENT_COLUMNS, chunks, label="appointments")
+        db.commit()
+    finally:
+        db.close()
+    # The new appointments are backdated into days the snapshot already holds
+    reset_snapshot()
     print("Synthetic data seeded.")
 
 
 if __name__ == "__main__":
-    seed_synthetic_data()
\ No newline at end of file
+    import argparse
+
+    from app.ml.bulk_seeder import SeedScale, doctor_ids_for
+
+    parser = argparse.ArgumentParser(description="Generate reproducible synthetic appointments as Parquet.")
+    parser.add_argument("--out", required=True, help="Output directory (one file per shard)")
+    parser.add_argument("--days", type=int, default=SeedScale.days)
+    parser.add_argument("--doctors", type=int, default=SeedScale.doctors)
+    parser.add_argument("--appointments-per-day", type=int, default=SeedScale.appointments_per_day)
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="First date (default: --days ago)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    import time as _time
+
+    seed = resolve_seed(args.seed)
+    first_day = args.start or (datetime.now() - timedelta(days=args.days)).date()
+    doctor_ids = doctor_ids_for(SeedScale(days=args.days, doctors=args.doctors))
+
+    started = _time.perf_counter()
+    paths = write_parquet(args.out, first_day, args.days, args.appointments_per_day, doctor_ids, seed, args.workers)
+    elapsed = _time.perf_counter() - started
+
+    rows = sum(shard.rows for shard in plan_shards(first_day, args.days, args.appointments_per_day, seed))
+    print(f"✅ {rows:,} appointments in {len(paths)} files under {args.out} "
+          f"in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s, seed {seed})")
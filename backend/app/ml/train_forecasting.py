@@ -1,66 +1,314 @@
 # app/ml/train_forecasting.py
 
+import json
+import os
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import joblib
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from xgboost import XGBRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
-from app.ml.dataset_builder import build_ml_dataset
-from app.ml.preprocessing import preprocess_dataset, get_features_and_target
+from app.ml.dataset_builder import build_ml_dataset, build_ml_dataset_from_snapshot
+from app.ml.preprocessing import FEATURE_COLUMNS, preprocess_dataset, get_features_and_target
 from app.ml.evaluation import evaluate_model
 
 MODEL_PATH = "app/ml/best_model.pkl"
+# Sidecar metadata: which candidate was saved and the last training date (watermark)
+MODEL_META_PATH = "app/ml/best_model.json"
 
+# Default hyperparameters for each candidate model
+CANDIDATE_PARAMS = {
+    "LinearRegression": {},
+    "RandomForest": {"n_estimators": 300},
+    "XGBoost": {"n_estimators": 300},
+}
 
-def train_models():
+TEST_FRACTION = 0.15
 
-    df = build_ml_dataset()
-    df = preprocess_dataset(df)
+# Prepared (X, y, dates) cached per process so candidates and repeated runs
+# don't rebuild the dataset from the database.
+_prepared_dataset = None
 
-    X, y = get_features_and_target(df)
+# Worker-process copies of the feature matrix, set once by _init_worker
+_worker_X = None
+_worker_y = None
+_worker_threads = 1
 
-    train_size = int(len(df) * 0.7)
-    val_size = int(len(df) * 0.15)
 
-    X_train = X[:train_size]
-    y_train = y[:train_size]
+def make_model(name: str, params: dict, n_jobs: int = 1):
+    """Instantiate a candidate model with explicit thread count."""
+    if name == "LinearRegression":
+        return Pipeline([
+            ("scaler", StandardScaler()),
+            ("model", LinearRegression(**params))
+        ])
+    if name == "RandomForest":
+        return RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params)
+    if name == "XGBoost":
+        return XGBRegressor(random_state=42, n_jobs=n_jobs, **params)
+    raise ValueError(f"Unknown candidate model: {name}")
 
-    X_val = X[train_size:train_size + val_size]
-    y_val = y[train_size:train_size + val_size]
 
-    X_test = X[train_size + val_size:]
-    y_test = y[train_size + val_size:]
+def load_prepared_dataset(refresh: bool = False, from_snapshot: bool = True, rebuild_snapshot: bool = False):
+    """
+    Build and preprocess the training dataset once.
 
-    models = {
-        "LinearRegression": Pipeline([
-            ("scaler", StandardScaler()),
-            ("model", LinearRegression())
-        ]),
-        "RandomForest": RandomForestRegressor(n_estimators=300, random_state=42),
-        "XGBoost": XGBRegressor(n_estimators=300, random_state=42),
+    Returns (X, y, dates): NumPy feature matrix and target, plus each row's
+    appointment_date so callers can tell which days a model has seen.
+
+    By default the data comes from the incrementally synced Parquet snapshot
+    rather than a full aggregate query against the production database;
+    rebuild_snapshot=True re-reads every day into the snapshot first.
+    """
+    global _prepared_dataset
+    if _prepared_dataset is None or refresh:
+        df = build_ml_dataset_from_snapshot(rebuild=rebuild_snapshot) if from_snapshot else build_ml_dataset()
+        df = preprocess_dataset(df)
+        X, y = get_features_and_target(df)
+        _prepared_dataset = (
+            np.ascontiguousarray(X.to_numpy(dtype=np.float64)),
+            y.to_numpy(dtype=np.float64),
+            df["appointment_date"].dt.date.to_numpy(),
+        )
+    return _prepared_dataset
+
+
+def time_series_folds(n_rows: int, n_folds: int = 5, min_train_fraction: float = 0.4):
+    """
+    Rolling-origin (expanding window) folds over chronologically ordered rows.
+
+    Each fold trains on everything before its origin and validates on the
+    next block, so no fold ever sees the future.
+    """
+    min_train = int(n_rows * min_train_fraction)
+    block = (n_rows - min_train) // n_folds
+    if min_train < 1 or block < 1:
+        raise ValueError("Not enough rows for time-series cross-validation.")
+
+    folds = []
+    for i in range(n_folds):
+        train_end = min_train + i * block
+        val_end = n_rows if i == n_folds - 1 else train_end + block
+        folds.append((train_end, val_end))
+    return folds
+
+
+def split_holdout(X, y, test_fraction: float = TEST_FRACTION):
+    """Split off the most recent rows as the final test set."""
+    cutoff = len(X) - int(len(X) * test_fraction)
+    return X[:cutoff], y[:cutoff], X[cutoff:], y[cutoff:]
+
+
+def pin_single_thread(model):
+    """
+    Set every n_jobs in a fitted model to 1 before it is saved.
+
+    The served model predicts inside API workers, one request at a time; a
+    model left at n_jobs=cpu_count would fan each prediction out over every core.
+    """
+    params = model.get_params()
+    pinned = {key: 1 for key in params if key == "n_jobs" or key.endswith("__n_jobs")}
+    if pinned:
+        model.set_params(**pinned)
+    return model
+
+
+def _init_worker(X, y, threads):
+    global _worker_X, _worker_y, _worker_threads
+    _worker_X = X
+    _worker_y = y
+    _worker_threads = threads
+    # Native libraries read these on first use; keep each worker to its share
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+
+def fit_and_score(name, params, train_end, val_end, X=None, y=None, threads=None):
+    """Fit one candidate on rows [:train_end] and score it on [train_end:val_end]."""
+    X = _worker_X if X is None else X
+    y = _worker_y if y is None else y
+    threads = _worker_threads if threads is None else threads
+
+    start = time.perf_counter()
+    with threadpool_limits(limits=threads):
+        model = make_model(name, params, n_jobs=threads)
+        model.fit(X[:train_end], y[:train_end])
+        val_pred = model.predict(X[train_end:val_end])
+    elapsed = time.perf_counter() - start
+
+    return evaluate_model(y[train_end:val_end], val_pred), elapsed
+
+
+def _resolve_workers(max_workers, tasks):
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(max_workers or cpus, tasks, cpus))
+    threads = max(1, cpus // workers)
+    return workers, threads
+
+
+def cross_validate_candidates(
+    X, y, candidates: dict, n_folds: int = 5, max_workers: int = None, progress=None
+):
+    """
+    Evaluate every (candidate, fold) pair in parallel across a process pool.
+
+    Returns {name: {"metrics": mean fold metrics, "fold_metrics": [...],
+    "fold_seconds": per-fold fit times, "params": params}}. `progress`, if given,
+    is called with folds_done/folds_total as fits finish.
+    """
+    folds = time_series_folds(len(X), n_folds)
+    tasks = [(name, params, fold) for name, params in candidates.items() for fold in folds]
+    workers, threads = _resolve_workers(max_workers, len(tasks))
+
+    results = {
+        name: {"params": params, "fold_metrics": [], "fold_seconds": []}
+        for name, params in candidates.items()
     }
 
-    best_model = None
-    best_rmse = float("inf")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(X, y, threads),
+    ) as pool:
+        futures = {
+            pool.submit(fit_and_score, name, params, train_end, val_end): name
+            for name, params, (train_end, val_end) in tasks
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            metrics, elapsed = future.result()
+            results[name]["fold_metrics"].append(metrics)
+            results[name]["fold_seconds"].append(elapsed)
+            if progress:
+                progress(folds_done=sum(len(r["fold_metrics"]) for r in results.values()),
+                         folds_total=len(tasks))
+
+    for result in results.values():
+        fold_metrics = result["fold_metrics"]
+        result["metrics"] = {
+            key: float(np.mean([m[key] for m in fold_metrics]))
+            for key in fold_metrics[0]
+        }
+
+    return results
+
+
+def load_model_meta() -> dict:
+    if not os.path.exists(MODEL_META_PATH):
+        return {}
+    with open(MODEL_META_PATH) as f:
+        return json.load(f)
+
+
+def save_model(model, meta: dict) -> None:
+    """Atomically replace the served model and its metadata."""
+    tmp_path = f"{MODEL_PATH}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, MODEL_PATH)
 
-    for name, model in models.items():
-        model.fit(X_train, y_train)
-        val_pred = model.predict(X_val)
+    tmp_meta = f"{MODEL_META_PATH}.tmp"
+    with open(tmp_meta, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_meta, MODEL_META_PATH)
 
-        metrics = evaluate_model(y_val, val_pred)
-        print(f"\n{name} Validation Metrics:", metrics)
 
-        if metrics["RMSE"] < best_rmse:
-            best_rmse = metrics["RMSE"]
-            best_model = model
+def train_models(
+    n_folds: int = 5,
+    max_workers: int = None,
+    refresh_dataset: bool = False,
+    search: bool = False,
+    time_budget_seconds: float = 600,
+    progress=None,
+):
+    """
+    Cross-validate the candidates, refit the best on the training split and save it.
 
-    test_pred = best_model.predict(X_test)
-    print("\nFinal Test Metrics:", evaluate_model(y_test, test_pred))
+    refresh_dataset=True rebuilds the Parquet snapshot from the database
+    instead of only appending new days. `progress`, if given, is called with
+    stage=... and the fold counts from cross_validate_candidates (the jobs
+    API polls these).
+    """
+    def report(**fields):
+        if progress:
+            progress(**fields)
 
-    joblib.dump(best_model, MODEL_PATH)
+    report(stage="loading_dataset")
+    X, y, dates = load_prepared_dataset(refresh=refresh_dataset, rebuild_snapshot=refresh_dataset)
+    report(stage="loaded", rows=len(X))
+    X_train, y_train, X_test, y_test = split_holdout(X, y)
+
+    candidates = CANDIDATE_PARAMS
+    if search:
+        report(stage="hyperparameter_search")
+        from app.ml.hyperparameter_search import search_hyperparameters
+
+        candidates = search_hyperparameters(
+            X_train, y_train,
+            time_budget_seconds=time_budget_seconds,
+            n_folds=n_folds,
+            max_workers=max_workers,
+        )
+        print("\nSearched hyperparameters:", candidates)
+
+    report(stage="cross_validation")
+    started = time.perf_counter()
+    results = cross_validate_candidates(
+        X_train, y_train, candidates, n_folds=n_folds, max_workers=max_workers, progress=progress
+    )
+    print(f"\nCross-validation ({n_folds} rolling-origin folds) took {time.perf_counter() - started:.1f}s")
+
+    for name, result in results.items():
+        print(f"\n{name} CV Metrics:", result["metrics"])
+        # Folds run concurrently, so their sum is fit effort, not elapsed time
+        print(f"{name} fold fit time: {sum(result['fold_seconds']):.2f}s total, "
+              f"{max(result['fold_seconds']):.2f}s slowest")
+
+    best_name = min(results, key=lambda name: results[name]["metrics"]["RMSE"])
+    print(f"\nBest model: {best_name}")
+
+    report(stage="refit", best_model=best_name)
+    # Refit on named columns so the saved model accepts ForecastService's DataFrames
+    threads = os.cpu_count() or 1
+    with threadpool_limits(limits=threads):
+        best_model = make_model(best_name, candidates[best_name], n_jobs=threads)
+        best_model.fit(pd.DataFrame(X_train, columns=FEATURE_COLUMNS), y_train)
+        test_pred = best_model.predict(pd.DataFrame(X_test, columns=FEATURE_COLUMNS))
+    test_metrics = evaluate_model(y_test, test_pred)
+    print("\nFinal Test Metrics:", test_metrics)
+
+    save_model(pin_single_thread(best_model), {
+        "model": best_name,
+        "params": candidates[best_name],
+        "watermark": dates[len(X_train) - 1].isoformat(),
+        "test_metrics": {key: float(value) for key, value in test_metrics.items()},
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "method": "full",
+    })
     print("Best model saved.")
 
+    return results
+
 
 if __name__ == "__main__":
-    train_models()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train demand forecasting models.")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--search", action="store_true", help="Run hyperparameter search first")
+    parser.add_argument("--budget", type=float, default=600, help="Search time budget in seconds")
+    args = parser.parse_args()
+
+    train_models(
+        n_folds=args.folds,
+        max_workers=args.workers,
+        search=args.search,
+        time_budget_seconds=args.budget,
+    )
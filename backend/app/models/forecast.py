@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Date, Float, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.db import Base
+
+
+class ForecastHorizon(Base):
+    """Precomputed demand forecast for one hour, per model version (app/ml/forecast_horizon.py)."""
+    __tablename__ = "forecast_horizon"
+
+    model_version = Column(String(16), primary_key=True)  # ForecastService.model_version
+    forecast_date = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    predicted_demand = Column(Float, nullable=False)
+    doctor_count = Column(Integer, nullable=False)
+    avg_patient_age = Column(Float, nullable=False)
+    emergency_count = Column(Integer, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Pruning past days across versions
+        Index("ix_forecast_horizon_forecast_date", "forecast_date"),
+    )
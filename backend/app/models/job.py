@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Enum, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.db import Base
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+class Job(Base):
+    """Background job, queued in the database and run by app.workers."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task = Column(String(64), nullable=False)
+    params = Column(JSON, nullable=False, default=dict)
+    status = Column(Enum(JobStatus, name="jobstatus"), nullable=False, default=JobStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # not before
+    schedule = Column(String(64), nullable=True)  # name of the schedule that queued it
+    worker = Column(String(128), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    progress = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    # Plain user id, no FK: the seeders TRUNCATE users ... CASCADE, which would empty the queue
+    created_by = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Claim query: oldest due PENDING job
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        # A scheduled run is queued once even with several workers
+        UniqueConstraint("schedule", "run_at", name="uq_jobs_schedule_run_at"),
+    )
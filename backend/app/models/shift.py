@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, Time, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Date, Time, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.db import Base
@@ -16,7 +16,7 @@ class Shift(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=True)  # Changed from shift_name to match database
-    start_time = Column(DateTime, nullable=False)  # Changed to DateTime to match database TIMESTAMP
+    start_time = Column(DateTime, nullable=False, index=True)  # Changed to DateTime to match database TIMESTAMP
     end_time = Column(DateTime, nullable=False)  # Changed to DateTime to match database TIMESTAMP
     type = Column(Enum(ShiftName, name='shifttype'), nullable=False)  # Use existing PostgreSQL enum
     # Fields below don't exist in database - commented out:
@@ -40,9 +40,13 @@ class AssignmentStatus(str, enum.Enum):
 
 class StaffShiftAssignment(Base):
     __tablename__ = "staff_shift_assignments"
+    __table_args__ = (
+        # Workload query joins by shift and reads staff_id from the index alone
+        Index("ix_staff_shift_assignments_shift_id_staff_id", "shift_id", "staff_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    staff_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    staff_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     shift_id = Column(Integer, ForeignKey("shifts.id", ondelete="CASCADE"), nullable=False)
     status = Column(Enum(AssignmentStatus, name='shiftassignmentstatus'), default=AssignmentStatus.ASSIGNED, nullable=True)
     target_staff_id = Column(Integer, nullable=True)  # Actual column name in DB (not swap_requested_to)
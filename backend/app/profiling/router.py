@@ -0,0 +1,173 @@
+import os
+import tracemalloc
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core import deps
+from app.core.log import audit
+from app.core.timing import TimedRoute
+from app.models.users import User, UserRole
+from app.profiling import sampler
+from app.schemas import profiling as schemas
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post("/cpu", response_class=PlainTextResponse)
+def profile_cpu(
+    seconds: float = Query(10, gt=0, le=sampler.MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    include_idle: bool = False,
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Sample this worker's threads for `seconds` and return collapsed stacks (Admin only).
+
+    Feed the result to flamegraph.pl or open it in speedscope. Idle threads
+    (thread pool waiting for work, event loop in select) are left out unless
+    include_idle=true. Only one profile runs per worker at a time.
+    """
+    audit("profiling.cpu", actor_id=current_user.id, seconds=seconds)
+    try:
+        counts, samples = sampler.sample_stacks(seconds, interval_ms / 1000, include_idle)
+    except sampler.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    filename = f"profile-{os.getpid()}-{datetime.now():%Y%m%d-%H%M%S}.collapsed"
+    return PlainTextResponse(
+        sampler.collapsed(counts),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(samples),
+            "X-Worker-Pid": str(os.getpid()),
+        },
+    )
+
+
+def _status() -> schemas.TracingStatus:
+    current, peak = tracemalloc.get_traced_memory()
+    return schemas.TracingStatus(
+        worker_pid=os.getpid(),
+        tracing=tracemalloc.is_tracing(),
+        frames=tracemalloc.get_traceback_limit(),
+        traced_current_kb=round(current / 1024, 1),
+        traced_peak_kb=round(peak / 1024, 1),
+        snapshots=sampler.snapshot_ids(),
+    )
+
+
+@router.get("/memory", response_model=schemas.TracingStatus)
+def memory_status(
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Whether tracemalloc is tracing in this worker, and the stored snapshot ids (Admin only).
+    """
+    return _status()
+
+
+@router.post("/memory/start", response_model=schemas.TracingStatus)
+def start_memory_tracing(
+    frames: int = Query(25, ge=1, le=100),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Start tracing allocations in this worker (Admin only).
+
+    Tracing slows allocation-heavy code noticeably; stop it when done.
+    """
+    sampler.start_tracing(frames)
+    audit("profiling.memory_start", actor_id=current_user.id, frames=frames)
+    return _status()
+
+
+@router.post("/memory/stop", response_model=schemas.TracingStatus)
+def stop_memory_tracing(
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Stop tracing and drop stored snapshots (Admin only).
+    """
+    sampler.stop_tracing()
+    audit("profiling.memory_stop", actor_id=current_user.id)
+    return _status()
+
+
+@router.post("/memory/snapshot", response_model=schemas.MemorySnapshot)
+def take_memory_snapshot(
+    top: int = Query(20, ge=1, le=200),
+    depth: int = Query(5, ge=1, le=50),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Take a snapshot and return the largest allocation sites (Admin only).
+
+    The last few snapshots are kept for GET /profiling/memory/diff.
+    """
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=409, detail="Memory tracing is not running; POST /profiling/memory/start first")
+
+    snapshot_id, taken_at, snapshot = sampler.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    stats = snapshot.statistics("traceback")[:top]
+    return schemas.MemorySnapshot(
+        id=snapshot_id,
+        worker_pid=os.getpid(),
+        taken_at=taken_at,
+        traced_current_kb=round(current / 1024, 1),
+        traced_peak_kb=round(peak / 1024, 1),
+        top=[
+            schemas.MemoryStat(
+                location=sampler.format_traceback(stat.traceback, depth),
+                size_kb=round(stat.size / 1024, 1),
+                count=stat.count,
+            )
+            for stat in stats
+        ],
+    )
+
+
+@router.get("/memory/diff", response_model=schemas.MemoryDiff)
+def diff_memory_snapshots(
+    from_id: int,
+    to_id: Optional[int] = Query(None, description="Default: take a new snapshot now"),
+    top: int = Query(20, ge=1, le=200),
+    depth: int = Query(5, ge=1, le=50),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN])),
+) -> Any:
+    """
+    Allocation sites that grew the most between two snapshots (Admin only).
+    """
+    before = sampler.get_snapshot(from_id)
+    if before is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    if to_id is None:
+        if not tracemalloc.is_tracing():
+            raise HTTPException(status_code=409, detail="Memory tracing is not running")
+        to_id, _, after_snapshot = sampler.take_snapshot()
+    else:
+        after = sampler.get_snapshot(to_id)
+        if after is None:
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+        after_snapshot = after[1]
+
+    stats = after_snapshot.compare_to(before[1], "traceback")
+    return schemas.MemoryDiff(
+        worker_pid=os.getpid(),
+        from_id=from_id,
+        to_id=to_id,
+        size_diff_kb=round(sum(stat.size_diff for stat in stats) / 1024, 1),
+        top=[
+            schemas.MemoryStat(
+                location=sampler.format_traceback(stat.traceback, depth),
+                size_kb=round(stat.size / 1024, 1),
+                count=stat.count,
+                size_diff_kb=round(stat.size_diff / 1024, 1),
+                count_diff=stat.count_diff,
+            )
+            for stat in stats[:top]
+        ],
+    )
@@ -0,0 +1,151 @@
+"""
+Low-overhead sampling profiler and tracemalloc snapshots for a running worker.
+
+The sampling loop runs in the requesting thread: every `interval` seconds it
+reads every other thread's current stack with sys._current_frames() and
+counts it.
+The profiled code isn't instrumented at all, so the cost is one stack walk
+per thread per sample. Output is the collapsed-stack format read by
+flamegraph.pl, speedscope and similar tools:
+
+    MainThread;uvicorn/main.py:run;...;app/ml/router.py:optimize_shift 42
+
+Snapshots are per process: with several uvicorn workers, each request hits
+whichever worker accepts it (the responses include its pid).
+"""
+
+import itertools
+import os
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+MAX_PROFILE_SECONDS = 120
+MAX_SNAPSHOTS = 5
+
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+# Leaf frames of threads that are parked, not working (thread pool idle, event loop select)
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+}
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+_profile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    return f"{_short_path(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+
+def sample_stacks(seconds: float, interval: float = 0.01, include_idle: bool = False) -> Tuple[Counter, int]:
+    """Sample all other threads' stacks for `seconds`; returns (collapsed stack counts, samples taken)."""
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    try:
+        seconds = min(seconds, MAX_PROFILE_SECONDS)
+        me = threading.get_ident()
+        counts: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (not include_idle and _is_idle(frame)):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[";".join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+        return counts, samples
+    finally:
+        _profile_lock.release()
+
+
+def collapsed(counts: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+# ─── tracemalloc ──────────────────────────────────────────
+
+_snapshots: Dict[int, Tuple[datetime, tracemalloc.Snapshot]] = {}
+_snapshot_ids = itertools.count(1)
+_snapshots_lock = threading.Lock()
+
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def start_tracing(frames: int = 25) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing() -> None:
+    tracemalloc.stop()
+    with _snapshots_lock:
+        _snapshots.clear()
+
+
+def snapshot_ids() -> List[int]:
+    with _snapshots_lock:
+        return sorted(_snapshots)
+
+
+def take_snapshot() -> Tuple[int, datetime, tracemalloc.Snapshot]:
+    """Take and keep a snapshot (the oldest is dropped beyond MAX_SNAPSHOTS)."""
+    snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+    taken_at = datetime.now()
+    with _snapshots_lock:
+        snapshot_id = next(_snapshot_ids)
+        _snapshots[snapshot_id] = (taken_at, snapshot)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            del _snapshots[min(_snapshots)]
+    return snapshot_id, taken_at, snapshot
+
+
+def get_snapshot(snapshot_id: int) -> Optional[Tuple[datetime, tracemalloc.Snapshot]]:
+    with _snapshots_lock:
+        return _snapshots.get(snapshot_id)
+
+
+def format_traceback(traceback: tracemalloc.Traceback, depth: int) -> str:
+    # Most recent frame first, e.g. "app/ml/forecast_service.py:158 <- app/ml/router.py:101"
+    frames = list(traceback)[::-1][:depth]
+    return " <- ".join(f"{_short_path(frame.filename)}:{frame.lineno}" for frame in frames)
+
+
+def _short_path(path: str) -> str:
+    """Package-relative path (app/..., <package>/... under site-packages, stdlib modules by name)."""
+    for marker in ("site-packages" + os.sep, os.sep + "app" + os.sep):
+        index = path.rfind(marker)
+        if index != -1:
+            return path[index + len(marker):] if marker.startswith("site") else path[index + 1:]
+    if path.startswith(_STDLIB):
+        return path[len(_STDLIB):]
+    return path
@@ -1,3 +1,4 @@
+import logging
 from typing import List, Any
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -5,13 +6,17 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.core import deps
+from app.core.log import audit
+from app.core.timing import TimedRoute
 # from app.core.conflict_detection import validate_ot_availability, validate_ot_slot_overlap  # Commented out
 from app.models.room import Room, RoomType
 # OTSlot, OTBooking, OTSlotStatus, OTBookingStatus are commented out in models
 from app.models.users import User, UserRole
 from app.schemas import room as schemas
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+logger = logging.getLogger(__name__)
 
 
 # ─── Room CRUD ────────────────────────────────────────────
@@ -35,6 +40,7 @@ def create_room(
     db.add(room)
     db.commit()
     db.refresh(room)
+    audit("room.create", actor_id=current_user.id, room_number=room.room_number)
     return room
 
 
@@ -97,6 +103,7 @@ def update_room(
     db.add(room)
     db.commit()
     db.refresh(room)
+    audit("room.update", actor_id=current_user.id, room_number=room_number, fields=sorted(update_data))
     return room
 
 
@@ -129,13 +136,14 @@ def delete_room(
         )
         
         db.commit()
+        audit("room.delete", actor_id=current_user.id, room_number=room_number)
         return {"detail": f"Room {room_number} deleted successfully"}
     
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        print(f"Error deleting room {room_number}: {e}")
+        logger.exception("Error deleting room", extra={"room_number": room_number})
         raise HTTPException(
             status_code=500,
             detail=f"Failed to delete room: {str(e)}"
@@ -6,11 +6,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.core import deps
 from app.core.conflict_detection import validate_doctor_availability
+from app.core.timing import TimedRoute
 from app.models.appointment import Appointment, AppointmentStatus, DoctorAvailability
 from app.models.users import User, UserRole
 from app.schemas import appointment as schemas
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/", response_model=schemas.Appointment)
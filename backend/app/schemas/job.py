@@ -0,0 +1,46 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.models.job import JobStatus
+
+
+class JobCreate(BaseModel):
+    task: str = Field(..., description="Registered task name, e.g. train_models or export_dataset")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Task parameters")
+    run_at: Optional[datetime] = Field(None, description="Don't start before this time (default: now)")
+
+
+class Job(BaseModel):
+    id: int
+    task: str
+    params: Dict[str, Any]
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    schedule: Optional[str] = None
+    worker: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TaskInfo(BaseModel):
+    name: str
+    description: str
+    cpu_bound: bool
+    max_attempts: int
+
+
+class TaskList(BaseModel):
+    tasks: List[TaskInfo]
@@ -1,5 +1,5 @@
-from typing import List
-from datetime import date as DateType
+from typing import List, Optional
+from datetime import date as DateType, datetime
 from pydantic import BaseModel, Field
 
 
@@ -16,6 +16,7 @@ class ForecastResponse(BaseModel):
     hour: int = Field(..., description="Requested hour")
     predicted_demand: float = Field(..., description="Predicted number of appointments")
     features_used: dict = Field(..., description="Features extracted from database")
+    source: str = Field("live", description="'precomputed' (forecast_horizon table) or 'live'")
 
 
 # Shift Optimization Schemas (Simplified - Auto-fetch staff from DB)
@@ -42,3 +43,63 @@ class ShiftOptimizeResponse(BaseModel):
     staff_details: List[StaffPriority] = Field(..., description="Detailed staff information")
     recommendation_text: str = Field(..., description="Human-readable recommendation")
 
+
+
+# Week Roster Schemas (Integer-program roster engine)
+class RosterOptimizeRequest(BaseModel):
+    """Request schema for planning a roster horizon."""
+    start_date: DateType = Field(..., description="First day of the horizon (YYYY-MM-DD)")
+    days: int = Field(7, ge=1, le=14, description="Number of days to plan")
+
+
+class RosterAssignment(BaseModel):
+    """One proposed staff-to-shift assignment."""
+    staff_id: int = Field(..., description="Staff user id")
+    shift_id: Optional[int] = Field(None, description="Existing shift id (null if the shift must be created)")
+    shift_type: str = Field(..., description="MORNING, AFTERNOON or NIGHT")
+    start_time: datetime = Field(..., description="Shift start")
+    end_time: datetime = Field(..., description="Shift end")
+
+
+class RosterSlot(BaseModel):
+    """Coverage summary for one shift in the horizon."""
+    shift_id: Optional[int] = Field(None, description="Existing shift id (null if not created yet)")
+    shift_type: str = Field(..., description="MORNING, AFTERNOON or NIGHT")
+    start_time: datetime = Field(..., description="Shift start")
+    end_time: datetime = Field(..., description="Shift end")
+    required: int = Field(..., description="Staff required from forecast demand")
+    existing_staff_ids: List[int] = Field(..., description="Staff already assigned")
+    new_staff_ids: List[int] = Field(..., description="Staff proposed by the solver")
+    shortfall: int = Field(..., description="Required staff that could not be covered")
+
+
+class RosterOptimizeResponse(BaseModel):
+    """Response schema for roster planning."""
+    start_date: DateType = Field(..., description="First day of the horizon")
+    days: int = Field(..., description="Number of days planned")
+    status: str = Field(..., description="Solver status")
+    solve_seconds: float = Field(..., description="Time spent building and solving the model")
+    slots: List[RosterSlot] = Field(..., description="Per-shift coverage")
+    assignments: List[RosterAssignment] = Field(..., description="New assignments to apply")
+    max_monthly_assignments: int = Field(..., description="Highest monthly shift count after applying")
+    min_monthly_assignments: int = Field(..., description="Lowest monthly shift count after applying")
+
+
+# Coverage Gap Schemas
+class CoverageHour(BaseModel):
+    """Forecast demand vs assigned staff for one hour."""
+    hour: datetime = Field(..., description="Start of the hour")
+    predicted_demand: float = Field(..., description="Predicted number of appointments")
+    required_staff: int = Field(..., description="Staff needed (1 per 5 patients, at least 1)")
+    assigned_staff: int = Field(..., description="Staff on shifts covering this hour")
+    shortfall: int = Field(..., description="Required minus assigned, if positive")
+
+
+class CoverageGapsResponse(BaseModel):
+    """Response schema for coverage gap analysis."""
+    start_date: DateType = Field(..., description="First day analysed")
+    end_date: DateType = Field(..., description="Last day analysed (inclusive)")
+    hours: int = Field(..., description="Number of hours analysed")
+    understaffed_hours: int = Field(..., description="Hours with a shortfall")
+    total_shortfall: int = Field(..., description="Sum of shortfall over all hours (staff-hours)")
+    gaps: List[CoverageHour] = Field(..., description="Understaffed hours (or every hour with include_all)")
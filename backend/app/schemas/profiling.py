@@ -0,0 +1,38 @@
+from typing import List
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class MemoryStat(BaseModel):
+    location: str = Field(..., description="Allocation site, most recent frame first")
+    size_kb: float
+    count: int
+    size_diff_kb: float = 0.0
+    count_diff: int = 0
+
+
+class TracingStatus(BaseModel):
+    worker_pid: int
+    tracing: bool
+    frames: int
+    traced_current_kb: float
+    traced_peak_kb: float
+    snapshots: List[int]
+
+
+class MemorySnapshot(BaseModel):
+    id: int
+    worker_pid: int
+    taken_at: datetime
+    traced_current_kb: float
+    traced_peak_kb: float
+    top: List[MemoryStat]
+
+
+class MemoryDiff(BaseModel):
+    worker_pid: int
+    from_id: int
+    to_id: int
+    size_diff_kb: float = Field(..., description="Net change in traced memory between the snapshots")
+    top: List[MemoryStat]
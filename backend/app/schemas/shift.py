@@ -1,7 +1,7 @@
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime, time
 
-from pydantic import BaseModel, PositiveInt, constr, field_validator
+from pydantic import BaseModel, Field, PositiveInt, constr, field_validator
 
 from app.models.shift import AssignmentStatus  # Removed ShiftName import as it's not used
 
@@ -66,7 +66,8 @@ class ShiftAssignmentBase(BaseModel):
 
 
 class ShiftAssignmentCreate(ShiftAssignmentBase):
-    pass
+    # Validated, so no status can slip past the shift rules
+    status: AssignmentStatus = AssignmentStatus.ASSIGNED
 
 
 class ShiftAssignment(ShiftAssignmentBase):
@@ -82,3 +83,122 @@ class ShiftAssignment(ShiftAssignmentBase):
 class ShiftSwapRequest(BaseModel):
     assignment_id: int
     target_staff_id: int
+
+
+class RosterAdjustment(BaseModel):
+    action: str  # "assign" or "unassign"
+    staff_id: int
+    shift_id: Optional[int] = None
+    start_time: datetime
+    shift_type: str
+
+
+class FairnessDelta(BaseModel):
+    staff_id: int
+    monthly_before: int
+    monthly_after: int
+
+
+class SwapImpact(BaseModel):
+    assignment_id: int
+    from_staff_id: int
+    to_staff_id: Optional[int] = None
+    feasible: bool
+    violations: List[str]
+    adjustments: List[RosterAdjustment]
+    required_staff: int
+    assigned_after: int
+    fairness: List[FairnessDelta]
+    repair_ms: float
+
+
+class SwapCandidate(BaseModel):
+    staff_id: int
+    name: Optional[str] = None
+    role: str
+    monthly_assignments: int
+    recent_assignments: int
+    week_assignments: int
+
+
+class ShiftTemplate(BaseModel):
+    type: constr(max_length=9)  # MORNING, AFTERNOON, NIGHT
+    start: time
+    hours: float = Field(8.0, gt=0, le=24)
+    name: Optional[str] = None
+
+
+class ShiftGenerateRequest(BaseModel):
+    start_date: date
+    end_date: date = Field(..., description="Inclusive")
+    # Defaults to the standard NIGHT 00:00 / MORNING 08:00 / AFTERNOON 16:00 layout
+    templates: Optional[List[ShiftTemplate]] = None
+
+    @field_validator("end_date")
+    @classmethod
+    def validate_range(cls, v: date, info):  # type: ignore[override]
+        start = info.data.get("start_date")
+        if start is not None and v < start:
+            raise ValueError("end_date must not be before start_date")
+        if start is not None and (v - start).days >= 366:
+            raise ValueError("date range must be at most 366 days")
+        return v
+
+
+class ShiftGenerateItem(BaseModel):
+    type: str
+    start_time: datetime
+    end_time: datetime
+    shift_id: int
+    outcome: str  # "created" or "exists"
+
+
+class ShiftGenerateResponse(BaseModel):
+    created: int
+    existing: int
+    items: List[ShiftGenerateItem]
+
+
+class BulkAssignRequest(BaseModel):
+    assignments: List[ShiftAssignmentCreate] = Field(..., max_length=10000)
+    # Reject the whole batch if any item fails validation
+    atomic: bool = False
+
+
+class BulkAssignItem(BaseModel):
+    index: int
+    staff_id: int
+    shift_id: int
+    outcome: str  # "assigned", "rejected" or "skipped" (atomic batch with rejections)
+    assignment_id: Optional[int] = None
+    errors: List[str] = []
+
+
+class BulkAssignResponse(BaseModel):
+    assigned: int
+    rejected: int
+    items: List[BulkAssignItem]
+
+
+class RosterMatrix(BaseModel):
+    """
+    Staff x day grid in columnar form.
+
+    codes[i * len(dates) + j] is the shifts staff_ids[i] works on dates[j],
+    as a bitmask of shift_codes (0 = off).
+    """
+    start_date: date
+    end_date: date
+    staff_ids: List[int]
+    staff_names: List[Optional[str]]
+    dates: List[date]
+    shift_codes: dict
+    codes: List[int]
+
+
+class MyShift(ShiftAssignment):
+    """Assignment with its shift's details inline."""
+    shift_name: Optional[str] = None
+    shift_type: str
+    start_time: datetime
+    end_time: datetime
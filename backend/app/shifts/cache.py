@@ -0,0 +1,49 @@
+import threading
+import time as _time
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+
+class PerUserCache:
+    """
+    Small in-process cache of per-user responses.
+
+    Entries are dropped when the user's assignments change (invalidate), and
+    expire after `ttl_seconds` so changes made through another API worker
+    are picked up too.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_keys_per_user: int = 8):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys_per_user = max_keys_per_user
+        self._entries: Dict[int, Dict[Hashable, tuple]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(user_id, {}).get(key)
+            if entry is None or _time.monotonic() - entry[0] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id: int, key: Hashable, value: Any) -> None:
+        with self._lock:
+            entries = self._entries.setdefault(user_id, {})
+            if key not in entries and len(entries) >= self.max_keys_per_user:
+                entries.pop(next(iter(entries)))
+            entries[key] = (_time.monotonic(), value)
+
+    def invalidate(self, user_ids: Iterable[Optional[int]]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+my_shifts_cache = PerUserCache()
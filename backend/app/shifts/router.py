@@ -1,17 +1,42 @@
-from typing import List, Any
-from datetime import datetime
+import hashlib
+import json
+from typing import List, Any, Optional
+from datetime import date, datetime, time, timedelta
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.core import deps
 from app.core.conflict_detection import validate_shift_overlap
-from app.models.shift import Shift, StaffShiftAssignment, AssignmentStatus
+from app.core.shift_timeline import (
+    ACTIVE_STATUSES,
+    SHIFT_ROLES,
+    ShiftTimelineIndex,
+    StaffTimeline,
+    check_batch,
+    get_timeline_index,
+    invalidate_timeline_index,
+    is_night,
+    load_shift_rows,
+    record_assignment,
+    release_assignment,
+)
+from app.core.timing import TimedRoute
+from app.models.shift import Shift, StaffShiftAssignment, AssignmentStatus, ShiftName
 from app.models.users import User, UserRole
+from app.ml.roster_engine import SHIFT_TEMPLATES, RosterState, cached_state
 from app.schemas import shift as schemas
+from app.shifts.cache import my_shifts_cache
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# Bit per shift type in the roster matrix
+SHIFT_CODES = {"NIGHT": 1, "MORNING": 2, "AFTERNOON": 4}
+MAX_ROSTER_DAYS = 92
 
 
 @router.post("/", response_model=schemas.Shift)
@@ -67,6 +92,8 @@ def update_shift(
     db.add(shift)
     db.commit()
     db.refresh(shift)
+    invalidate_timeline_index()
+    my_shifts_cache.clear()
     return shift
 
 
@@ -89,9 +116,21 @@ def delete_shift(
     
     db.delete(shift)
     db.commit()
+    invalidate_timeline_index()
+    my_shifts_cache.clear()
     return {"detail": "Shift deleted"}
 
 
+def _check_shift_rules(db: Session, staff_id: int, shift: Shift, who: str) -> None:
+    timeline = StaffTimeline.load(db, staff_id, shift.start_time, shift.end_time)
+    violations = timeline.violations(shift.start_time, shift.end_time, is_night(shift.type))
+    if violations:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{who} cannot take this shift: {'; '.join(violations)}",
+        )
+
+
 @router.post("/assign", response_model=schemas.ShiftAssignment)
 def assign_shift(
     *,
@@ -106,16 +145,10 @@ def assign_shift(
     if not shift:
         raise HTTPException(status_code=404, detail="Shift not found")
 
-    # Note: Skipping overlap validation as shift_date column doesn't exist in current schema
-    # is_valid = validate_shift_overlap(
-    #     db,
-    #     assignment_in.staff_id,
-    #     shift.shift_date,
-    #     shift.start_time,
-    #     shift.end_time,
-    # )
-    # if not is_valid:
-    #     raise HTTPException(status_code=400, detail="Staff has overlapping shift.")
+    # Overlap, rest, consecutive-night and weekly rules (app/core/shift_rules.py),
+    # skipped only for assignments recorded as already finished or handed over
+    if assignment_in.status not in (AssignmentStatus.COMPLETED, AssignmentStatus.SWAPPED):
+        _check_shift_rules(db, assignment_in.staff_id, shift, "Staff")
 
     # Check if shift.required_staff_count exists (it doesn't in current DB schema)
     # Skipping capacity check as required_staff_count column doesn't exist
@@ -134,21 +167,338 @@ def assign_shift(
     db.add(assignment)
     db.commit()
     db.refresh(assignment)
+    if assignment.status in (AssignmentStatus.ASSIGNED, AssignmentStatus.SWAP_REQUESTED):
+        record_assignment(assignment.staff_id, shift)
+        _sync_roster_state(shift, assign=[assignment.staff_id])
+    my_shifts_cache.invalidate([assignment.staff_id])
     return assignment
 
 
-@router.get("/my-shifts", response_model=List[schemas.ShiftAssignment])
+@router.post("/generate", response_model=schemas.ShiftGenerateResponse)
+def generate_shifts(
+    *,
+    db: Session = Depends(deps.get_db),
+    request: schemas.ShiftGenerateRequest,
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.HR])),
+) -> Any:
+    """
+    Create shifts for every day in a date range from a template (HR/Admin only).
+    Shifts that already exist with the same start time and type are reported, not duplicated.
+    """
+    templates = request.templates or [
+        schemas.ShiftTemplate(
+            type=shift_type,
+            start=time(start_hour),
+            hours=duration.total_seconds() / 3600,
+            name=shift_type.title(),
+        )
+        for shift_type, (start_hour, duration) in sorted(SHIFT_TEMPLATES.items(), key=lambda t: t[1][0])
+    ]
+    valid_types = {shift_type.value for shift_type in ShiftName}
+    for template in templates:
+        if template.type not in valid_types:
+            raise HTTPException(status_code=400, detail=f"Unknown shift type: {template.type}")
+
+    wanted = []
+    day = request.start_date
+    while day <= request.end_date:
+        for template in templates:
+            start = datetime.combine(day, template.start)
+            wanted.append({
+                "name": template.name or template.type.title(),
+                "start_time": start,
+                "end_time": start + timedelta(hours=template.hours),
+                "type": ShiftName(template.type),
+            })
+        day += timedelta(days=1)
+
+    first = min(row["start_time"] for row in wanted)
+    last = max(row["start_time"] for row in wanted)
+    existing = {
+        (start_time, getattr(shift_type, "value", shift_type)): (shift_id, end_time)
+        for shift_id, start_time, end_time, shift_type in db.query(
+            Shift.id, Shift.start_time, Shift.end_time, Shift.type
+        ).filter(Shift.start_time >= first, Shift.start_time <= last)
+    }
+
+    new_rows = [row for row in wanted if (row["start_time"], row["type"].value) not in existing]
+    new_ids = []
+    if new_rows:
+        new_ids = db.execute(
+            insert(Shift).returning(Shift.id, sort_by_parameter_order=True),
+            new_rows,
+        ).scalars().all()
+        db.commit()
+    created = dict(zip(((row["start_time"], row["type"].value) for row in new_rows), new_ids))
+
+    items = []
+    for row in wanted:
+        key = (row["start_time"], row["type"].value)
+        if key in created:
+            items.append(schemas.ShiftGenerateItem(
+                type=key[1], start_time=row["start_time"], end_time=row["end_time"],
+                shift_id=created[key], outcome="created",
+            ))
+        else:
+            shift_id, end_time = existing[key]
+            items.append(schemas.ShiftGenerateItem(
+                type=key[1], start_time=row["start_time"], end_time=end_time,
+                shift_id=shift_id, outcome="exists",
+            ))
+    return schemas.ShiftGenerateResponse(
+        created=len(created),
+        existing=len(items) - len(created),
+        items=items,
+    )
+
+
+@router.post("/assign/bulk", response_model=schemas.BulkAssignResponse)
+def assign_shifts_bulk(
+    *,
+    db: Session = Depends(deps.get_db),
+    request: schemas.BulkAssignRequest,
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.HR])),
+) -> Any:
+    """
+    Assign many staff to shifts in one transaction (HR/Admin only).
+
+    Shifts, staff, existing assignments and nearby shifts are loaded with one
+    query each. The whole batch is then checked against the same rules as
+    /assign with check_batch: one vectorised validate_roster pass, then staff
+    members with any violation are re-checked item by item, in request order,
+    to decide which of their items to reject. Valid items are inserted
+    together; with atomic=true nothing is inserted if any item fails.
+    """
+    requested = request.assignments
+    staff_ids = {item.staff_id for item in requested}
+    shift_ids = {item.shift_id for item in requested}
+
+    shifts = {shift.id: shift for shift in db.query(Shift).filter(Shift.id.in_(shift_ids))}
+    known_staff = {user_id for (user_id,) in db.query(User.id).filter(User.id.in_(staff_ids))}
+    taken = set(
+        db.query(StaffShiftAssignment.staff_id, StaffShiftAssignment.shift_id).filter(
+            StaffShiftAssignment.staff_id.in_(staff_ids),
+            StaffShiftAssignment.shift_id.in_(shift_ids),
+            StaffShiftAssignment.status.in_(ACTIVE_STATUSES),
+        )
+    )
+    existing = []
+    if shifts:
+        existing = load_shift_rows(
+            db,
+            staff_ids,
+            min(shift.start_time for shift in shifts.values()),
+            max(shift.end_time for shift in shifts.values()),
+        )
+
+    errors = [[] for _ in requested]
+    proposed, new_rows = [], []  # active items that still need the shift rules
+    for index, item in enumerate(requested):
+        shift = shifts.get(item.shift_id)
+        if shift is None:
+            errors[index].append("Shift not found")
+        if item.staff_id not in known_staff:
+            errors[index].append("Staff not found")
+        if not errors[index] and item.status in ACTIVE_STATUSES:
+            proposed.append(index)
+            new_rows.append((item.staff_id, shift.start_time, shift.end_time, is_night(shift.type)))
+
+    rule_errors = check_batch(existing, new_rows)
+
+    # A repeated item is rejected as a duplicate only once an earlier copy was accepted
+    for index, problems in zip(proposed, rule_errors):
+        item = requested[index]
+        if (item.staff_id, item.shift_id) in taken:
+            errors[index].append("Staff already assigned to this shift")
+        else:
+            errors[index].extend(problems)
+        if not errors[index]:
+            taken.add((item.staff_id, item.shift_id))
+
+    items, accepted = [], []
+    for index, item in enumerate(requested):
+        if not errors[index]:
+            accepted.append((index, {"staff_id": item.staff_id, "shift_id": item.shift_id, "status": item.status}))
+        items.append(schemas.BulkAssignItem(
+            index=index,
+            staff_id=item.staff_id,
+            shift_id=item.shift_id,
+            outcome="rejected" if errors[index] else "assigned",
+            errors=errors[index],
+        ))
+
+    rejected = len(items) - len(accepted)
+    if request.atomic and rejected:
+        for index, _ in accepted:
+            items[index].outcome = "skipped"
+        return schemas.BulkAssignResponse(assigned=0, rejected=rejected, items=items)
+
+    if accepted:
+        ids = db.execute(
+            insert(StaffShiftAssignment).returning(StaffShiftAssignment.id, sort_by_parameter_order=True),
+            [row for _, row in accepted],
+        ).scalars().all()
+        db.commit()
+        for (index, row), assignment_id in zip(accepted, ids):
+            items[index].assignment_id = assignment_id
+            if row["status"] in ACTIVE_STATUSES:
+                record_assignment(row["staff_id"], shifts[row["shift_id"]])
+                _sync_roster_state(shifts[row["shift_id"]], assign=[row["staff_id"]])
+        my_shifts_cache.invalidate({row["staff_id"] for _, row in accepted})
+
+    return schemas.BulkAssignResponse(assigned=len(accepted), rejected=rejected, items=items)
+
+
+@router.get("/roster", response_model=schemas.RosterMatrix)
+def read_roster(
+    db: Session = Depends(deps.get_db),
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(deps.require_role([UserRole.ADMIN, UserRole.HR])),
+) -> Any:
+    """
+    Staff x day roster grid for [from, to] (Admin/HR only).
+
+    Returned column-wise: staff ids, dates and one int per cell, a bitmask of
+    shift_codes. Carries an ETag; a matching If-None-Match gets 304.
+    """
+    days = (to_date - from_date).days + 1
+    if days < 1 or days > MAX_ROSTER_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must be 1-{MAX_ROSTER_DAYS} days")
+
+    staff = db.query(User.id, User.full_name).filter(
+        User.role.in_(SHIFT_ROLES), User.is_active.is_(True)
+    ).order_by(User.id).all()
+    rows = db.query(StaffShiftAssignment.staff_id, Shift.start_time, Shift.type).join(
+        Shift, Shift.id == StaffShiftAssignment.shift_id
+    ).filter(
+        Shift.start_time >= datetime.combine(from_date, time(0, 0)),
+        Shift.start_time < datetime.combine(to_date + timedelta(days=1), time(0, 0)),
+        StaffShiftAssignment.status != AssignmentStatus.SWAPPED,
+    ).all()
+
+    # Staff with shifts in the range are shown even if no longer active
+    staff_ids = np.array(sorted({user_id for user_id, _ in staff} | {row[0] for row in rows}), dtype=np.int64)
+    names = dict(staff)
+    grid = np.zeros((len(staff_ids), days), dtype=np.int64)
+    if rows:
+        row_staff = np.searchsorted(staff_ids, [row[0] for row in rows])
+        row_day = [(row[1].date() - from_date).days for row in rows]
+        row_code = [SHIFT_CODES.get(getattr(row[2], "value", row[2]), 0) for row in rows]
+        np.bitwise_or.at(grid, (row_staff, row_day), row_code)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{from_date}:{to_date}:".encode())
+    digest.update(staff_ids.tobytes())
+    digest.update(grid.tobytes())
+    staff_names = [names.get(int(i)) for i in staff_ids]
+    digest.update(json.dumps(staff_names).encode())
+    etag = f'"{digest.hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if if_none_match and etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(
+        content={
+            "start_date": from_date.isoformat(),
+            "end_date": to_date.isoformat(),
+            "staff_ids": staff_ids.tolist(),
+            "staff_names": staff_names,
+            "dates": [(from_date + timedelta(days=j)).isoformat() for j in range(days)],
+            "shift_codes": SHIFT_CODES,
+            "codes": grid.ravel().tolist(),
+        },
+        headers=headers,
+    )
+
+
+@router.get("/my-shifts", response_model=List[schemas.MyShift])
 def read_my_shifts(
     db: Session = Depends(deps.get_db),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    View personal shifts.
+    View personal shifts with their times, from 30 days ago to 90 days ahead
+    unless from/to (inclusive) are given.
     """
-    assignments = db.query(StaffShiftAssignment).filter(
-        StaffShiftAssignment.staff_id == current_user.id
-    ).all()
-    return assignments
+    today = datetime.now(ZoneInfo("Asia/Kolkata")).date()
+    from_date = from_date or today - timedelta(days=30)
+    to_date = to_date or today + timedelta(days=90)
+    if to_date < from_date or (to_date - from_date).days >= 366:
+        raise HTTPException(status_code=400, detail="Range must be 1-366 days")
+
+    cached = my_shifts_cache.get(current_user.id, (from_date, to_date))
+    if cached is not None:
+        return cached
+
+    rows = db.query(StaffShiftAssignment, Shift.name, Shift.type, Shift.start_time, Shift.end_time).join(
+        Shift, Shift.id == StaffShiftAssignment.shift_id
+    ).filter(
+        StaffShiftAssignment.staff_id == current_user.id,
+        Shift.start_time >= datetime.combine(from_date, time(0, 0)),
+        Shift.start_time < datetime.combine(to_date + timedelta(days=1), time(0, 0)),
+    ).order_by(Shift.start_time).all()
+
+    shifts = [
+        schemas.MyShift(
+            id=assignment.id,
+            staff_id=assignment.staff_id,
+            shift_id=assignment.shift_id,
+            status=getattr(assignment.status, "value", assignment.status),
+            target_staff_id=assignment.target_staff_id,
+            created_at=assignment.created_at,
+            updated_at=assignment.updated_at,
+            shift_name=name,
+            shift_type=getattr(shift_type, "value", shift_type),
+            start_time=start_time,
+            end_time=end_time,
+        )
+        for assignment, name, shift_type, start_time, end_time in rows
+    ]
+    my_shifts_cache.set(current_user.id, (from_date, to_date), shifts)
+    return shifts
+
+
+@router.get("/swap/candidates/{assignment_id}", response_model=List[schemas.SwapCandidate])
+def swap_candidates(
+    *,
+    db: Session = Depends(deps.get_db),
+    assignment_id: int,
+    limit: int = 20,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Staff who can take this shift without an overlap, a short rest gap or
+    going over the weekly limit, least loaded first (owner or HR/Admin).
+    """
+    assignment = db.query(StaffShiftAssignment).filter(
+        StaffShiftAssignment.id == assignment_id
+    ).first()
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+
+    if assignment.staff_id != current_user.id and current_user.role not in (UserRole.HR, UserRole.ADMIN):
+        raise HTTPException(status_code=403, detail="Not your shift")
+
+    shift = db.query(Shift).filter(Shift.id == assignment.shift_id).first()
+    if not shift:
+        raise HTTPException(status_code=404, detail="Associated shift not found")
+
+    index = get_timeline_index(db)
+    if not index.covers(shift.start_time):
+        # Past shifts, or ones beyond the shared index's horizon, get a one-off index of their month
+        index = ShiftTimelineIndex.build(db, shift.start_time.date(), horizon_days=0)
+    return index.swap_candidates(
+        shift.start_time,
+        shift.end_time,
+        night=is_night(shift.type),
+        exclude=assignment.staff_id,
+        limit=limit,
+    )
 
 
 @router.post("/swap", response_model=schemas.ShiftAssignment)
@@ -181,9 +531,101 @@ def request_swap(
 
     db.commit()
     db.refresh(assignment)
+    my_shifts_cache.invalidate([assignment.staff_id])
     return assignment
 
 
+def _roster_state_for(shift: Shift) -> RosterState:
+    """Cached roster covering the shift; planning it is left to /ml/roster-optimize."""
+    state = cached_state(shift.start_time)
+    if state is None:
+        raise HTTPException(
+            status_code=409,
+            detail="No planned roster covers this shift; plan it with POST /ml/roster-optimize first",
+        )
+    return state
+
+
+def _sync_roster_state(shift: Shift, assign=(), unassign=()) -> None:
+    """Mirror committed assignment changes into the cached roster covering the shift, if any."""
+    state = cached_state(shift.start_time)
+    if state is None:
+        return
+    k = state.slot_for(shift.id, shift.start_time)
+    if k is not None:
+        state.sync(k, assign=assign, unassign=unassign)
+
+
+@router.get("/swap/impact/{assignment_id}", response_model=schemas.SwapImpact)
+def swap_impact(
+    *,
+    db: Session = Depends(deps.get_db),
+    assignment_id: int,
+    target_staff_id: Optional[int] = None,
+    current_user: User = Depends(deps.require_role([UserRole.HR, UserRole.ADMIN])),
+) -> Any:
+    """
+    Preview the effect of a requested swap on the planned roster (HR/Admin).
+
+    Only the affected shift and staff are rechecked against the rest and weekly
+    rules; if the swap breaks coverage or a rule, the minimal set of extra
+    assignment changes that repairs it is proposed, with each touched staff
+    member's monthly total before and after. Without target_staff_id, the
+    assignment's requested target is used; if none, a replacement is proposed.
+    Returns 409 if no roster covering the shift has been planned in this process.
+    """
+    assignment = db.query(StaffShiftAssignment).filter(
+        StaffShiftAssignment.id == assignment_id
+    ).first()
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+
+    shift = db.query(Shift).filter(Shift.id == assignment.shift_id).first()
+    if not shift:
+        raise HTTPException(status_code=404, detail="Associated shift not found")
+
+    if assignment.status not in ACTIVE_STATUSES:
+        raise HTTPException(status_code=400, detail="Only assigned or swap-requested shifts can be swapped")
+
+    state = _roster_state_for(shift)
+    k = state.slot_for(shift.id, shift.start_time)
+    if k is None:
+        raise HTTPException(status_code=400, detail="Shift is not part of a planned roster")
+    # An assignment made after the roster was planned is previewed on a copy;
+    # the shared state only changes when the write endpoints commit something.
+    if assignment.staff_id not in state.slot_staff[k]:
+        state = state.copy()
+        state.sync(k, assign=[assignment.staff_id])
+
+    to_staff_id = target_staff_id or assignment.target_staff_id
+    result = state.propose_swap(k, assignment.staff_id, to_staff_id)
+
+    return schemas.SwapImpact(
+        assignment_id=assignment.id,
+        from_staff_id=result.from_staff_id,
+        to_staff_id=result.to_staff_id,
+        feasible=result.feasible,
+        violations=result.violations,
+        adjustments=[
+            schemas.RosterAdjustment(
+                action=adjustment.action,
+                staff_id=adjustment.staff_id,
+                shift_id=state.slots[adjustment.slot_index].shift_id,
+                start_time=state.slots[adjustment.slot_index].start_time,
+                shift_type=state.slots[adjustment.slot_index].shift_type,
+            )
+            for adjustment in result.adjustments
+        ],
+        required_staff=result.required,
+        assigned_after=result.assigned_after,
+        fairness=[
+            schemas.FairnessDelta(staff_id=staff_id, monthly_before=before, monthly_after=after)
+            for staff_id, (before, after) in sorted(result.fairness_delta.items())
+        ],
+        repair_ms=result.repair_seconds * 1000,
+    )
+
+
 @router.post("/swap/approve/{assignment_id}", response_model=schemas.ShiftAssignment)
 def approve_swap(
     *,
@@ -209,17 +651,8 @@ def approve_swap(
     if not shift:
         raise HTTPException(status_code=404, detail="Associated shift not found")
 
-    # Validate target staff has no overlapping shift
-    # Note: shift_date doesn't exist in current schema, using start_time/end_time directly
-    # is_valid = validate_shift_overlap(
-    #     db,
-    #     assignment.target_staff_id,
-    #     shift.shift_date,
-    #     shift.start_time,
-    #     shift.end_time,
-    # )
-    # if not is_valid:
-    #     raise HTTPException(status_code=400, detail="Target staff has overlapping shift. Cannot approve swap.")
+    # Validate target staff can take the shift under the working-time rules
+    _check_shift_rules(db, assignment.target_staff_id, shift, "Target staff")
 
     # Mark original assignment as swapped
     assignment.status = "SWAPPED"  # Use correct database enum value
@@ -233,4 +666,10 @@ def approve_swap(
     db.add(new_assignment)
     db.commit()
     db.refresh(new_assignment)
+    release_assignment(assignment.staff_id, shift)
+    record_assignment(new_assignment.staff_id, shift)
+    my_shifts_cache.invalidate([assignment.staff_id, new_assignment.staff_id])
+
+    # Keep the cached roster in step so later swap previews see this change
+    _sync_roster_state(shift, assign=[new_assignment.staff_id], unassign=[assignment.staff_id])
     return new_assignment
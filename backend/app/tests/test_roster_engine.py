@@ -0,0 +1,249 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import math
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from app.core.shift_rules import ShiftRules, violates_rest
+from app.ml.roster_engine import (
+    RosterAdjustment,
+    RosterSolution,
+    RosterState,
+    StaffWorkload,
+    apply_hourly_demand,
+    horizon_weeks,
+    solve_roster,
+    week_slots,
+)
+
+RULES = ShiftRules(min_rest_hours=11, max_shifts_per_week=5, max_consecutive_nights=3, max_hours_per_week=48)
+MONDAY = date(2024, 1, 1)
+
+
+def staff_of(count, monthly=()):
+    return [
+        StaffWorkload(staff_id=100 + i, name=f"Staff {i}", monthly_assignments=dict(monthly).get(100 + i, 0))
+        for i in range(count)
+    ]
+
+
+def slots_of(days, required):
+    slots = week_slots(MONDAY, days)
+    for slot in slots:
+        slot.required = required
+    return slots
+
+
+def shifts_by_staff(solution):
+    worked = {member.staff_id: [] for member in solution.staff}
+    for s, k in solution.assignments:
+        worked[solution.staff[s].staff_id].append(k)
+    return worked
+
+
+def assert_rules_hold(solution, rules=RULES):
+    slots = solution.slots
+    week_of = horizon_weeks(slots)
+    for staff_id, worked in shifts_by_staff(solution).items():
+        worked.sort(key=lambda k: slots[k].start_time)
+
+        # Minimum rest (and no overlap) between any two of their shifts
+        for i, a in enumerate(worked):
+            for b in worked[i + 1:]:
+                assert not violates_rest(
+                    slots[a].start_time, slots[a].end_time, slots[b].start_time, slots[b].end_time, rules
+                ), (staff_id, slots[a].start_time, slots[b].start_time)
+
+        # Weekly cap per 7-day block of the horizon
+        per_week = Counter(week_of[k] for k in worked)
+        assert max(per_week.values(), default=0) <= rules.max_shifts_per_week, (staff_id, per_week)
+
+        # Consecutive nights
+        night_days = sorted(slots[k].day for k in worked if slots[k].shift_type == "NIGHT")
+        run = longest = 0
+        for i, day in enumerate(night_days):
+            run = run + 1 if i and day - night_days[i - 1] == timedelta(days=1) else 1
+            longest = max(longest, run)
+        assert longest <= rules.max_consecutive_nights, (staff_id, night_days)
+
+
+def test_solution_covers_demand_within_rules():
+    # Two weeks, two staff per shift: 84 shifts for 10 people who can work 100
+    slots = slots_of(14, required=2)
+    solution = solve_roster(slots, staff_of(10), rules=RULES)
+
+    assert solution.status == "optimal"
+    assert solution.shortfall == [0] * len(slots)
+    for k, slot in enumerate(slots):
+        assert len(solution.staff_for_slot(k)) >= slot.required
+    assert_rules_hold(solution)
+
+
+def test_fairness_ceiling_is_minimised():
+    # Staff 100 starts the month well ahead; the rest should be levelled up to
+    # the lowest ceiling that can absorb all 84 shifts
+    staff = staff_of(10, monthly={100: 8})
+    slots = slots_of(14, required=2)
+    solution = solve_roster(slots, staff, rules=RULES)
+
+    totals = solution.monthly_totals()
+    ceiling = math.ceil((sum(member.monthly_assignments for member in staff) + 84) / len(staff))
+    assert max(totals.values()) == ceiling
+    assert totals[100] <= ceiling
+    assert_rules_hold(solution)
+
+
+def test_existing_assignments_count_towards_coverage_and_rules():
+    slots = slots_of(7, required=1)
+    staff = staff_of(6)
+    # Staff 100 already works Monday's afternoon (slot 2): it counts as cover,
+    # and Tuesday's night and morning are too close to it
+    existing = [(100, slots[2].start_time, slots[2].end_time, 2)]
+    solution = solve_roster(slots, staff, existing, rules=RULES)
+
+    assert solution.fixed == [(100, 2)]
+    assert solution.staff_for_slot(2) == []
+    worked = shifts_by_staff(solution)[100]
+    assert 3 not in worked and 4 not in worked
+    assert solution.shortfall == [0] * len(slots)
+
+
+def test_shortfall_when_demand_exceeds_staff():
+    slots = slots_of(2, required=1)
+    slots[1].required = 4  # Monday morning needs four, only three people exist
+    solution = solve_roster(slots, staff_of(3), rules=RULES)
+
+    # Total shortfall is what the three of them can't cover, reported per slot
+    demand = sum(slot.required for slot in slots)
+    assert sum(solution.shortfall) == demand - len(solution.assignments)
+    for k, slot in enumerate(slots):
+        assert len(solution.staff_for_slot(k)) + solution.shortfall[k] == slot.required
+    assert solution.shortfall[1] >= 1
+    assert_rules_hold(solution)
+
+
+def test_uncovered_hours_default_to_one():
+    slots = week_slots(MONDAY, 1)
+    night_start = datetime.combine(MONDAY, datetime.min.time())
+    # Forecast only for two night hours; the other shifts have no prediction
+    apply_hourly_demand(slots, {night_start: 12.0, night_start + timedelta(hours=3): 24.0})
+
+    assert [slot.required for slot in slots] == [4, 1, 1]
+
+
+# ─── Local repair ─────────────────────────────────────────
+
+NIGHT, MORNING, AFTERNOON = 0, 1, 2
+
+
+def slot(day, shift):
+    return day * 3 + shift
+
+
+def planned_state():
+    """
+    One week, one person per shift: staff 1 on mornings and staff 2 on
+    afternoons Mon-Fri, staff 3 on nights Mon-Wed, staff 4 free.
+    """
+    slots = slots_of(7, required=1)
+    staff = staff_of(0) + [StaffWorkload(staff_id=i, name=f"Staff {i}") for i in (1, 2, 3, 4)]
+    index = {member.staff_id: s for s, member in enumerate(staff)}
+    assignments = (
+        [(index[1], slot(d, MORNING)) for d in range(5)]
+        + [(index[2], slot(d, AFTERNOON)) for d in range(5)]
+        + [(index[3], slot(d, NIGHT)) for d in range(3)]
+    )
+    solution = RosterSolution(slots, staff, assignments, [0] * len(slots), "optimal", 0.0)
+    return RosterState(solution, RULES)
+
+
+def state_solution(state):
+    """The state's current membership as a RosterSolution, for assert_rules_hold."""
+    staff = [state.staff[staff_id] for staff_id in sorted(state.staff)]
+    index = {member.staff_id: s for s, member in enumerate(staff)}
+    assignments = [(index[staff_id], k) for k, members in enumerate(state.slot_staff) for staff_id in members]
+    return RosterSolution(state.slots, staff, assignments, [], "optimal", 0.0)
+
+
+def test_propose_swap_finds_replacement_within_rules():
+    state = planned_state()
+    k = slot(0, MORNING)
+
+    # Staff 1 drops Monday morning: staff 3 works Monday night, so staff 4 covers
+    result = state.propose_swap(k, 1, None)
+    assert result.feasible
+    assert result.adjustments == [RosterAdjustment("unassign", 1, k), RosterAdjustment("assign", 4, k)]
+    assert result.assigned_after == result.required == 1
+    assert result.fairness_delta == {1: (5, 4), 4: (0, 1)}
+
+    state.apply(result.adjustments)
+    assert state.slot_staff[k] == {4}
+    assert_rules_hold(state_solution(state))
+
+
+def test_propose_swap_hands_over_the_targets_clashing_shift():
+    state = planned_state()
+    k = slot(0, MORNING)
+    coverage = [len(members) for members in state.slot_staff]
+
+    # Staff 2 takes Monday morning and gives up Monday afternoon; staff 1
+    # can't have it back (8h before their Tuesday morning), so staff 4 does
+    result = state.propose_swap(k, 1, 2)
+    assert result.feasible, result.violations
+    assert result.adjustments == [
+        RosterAdjustment("unassign", 1, k),
+        RosterAdjustment("assign", 2, k),
+        RosterAdjustment("unassign", 2, slot(0, AFTERNOON)),
+        RosterAdjustment("assign", 4, slot(0, AFTERNOON)),
+    ]
+
+    state.apply(result.adjustments)
+    assert [len(members) for members in state.slot_staff] == coverage
+    assert_rules_hold(state_solution(state))
+
+
+def test_propose_swap_rejects_target_over_the_rules():
+    state = planned_state()
+    # Staff 3 already works Mon-Wed nights; a Thursday night would be the fourth
+    result = state.propose_swap(slot(3, NIGHT), 4, 3)
+    assert not result.feasible
+    assert result.adjustments == []
+
+
+def test_copy_leaves_the_original_untouched():
+    state = planned_state()
+    membership = [set(members) for members in state.slot_staff]
+    monthly = dict(state.monthly)
+
+    preview = state.copy()
+    preview.sync(slot(6, MORNING), assign=[4])
+    preview.apply(preview.propose_swap(slot(0, MORNING), 1, None).adjustments)
+
+    assert preview.slot_staff[slot(0, MORNING)] == {4}
+    assert state.slot_staff == membership
+    assert state.monthly == monthly
+    assert state.staff_slots[4] == set()
+
+
+def test_sync_keeps_plan_consistent():
+    state = planned_state()
+    k = slot(5, MORNING)
+
+    state.sync(k, assign=[4])
+    state.sync(k, assign=[4])  # already reflected: not counted twice
+    assert state.slot_staff[k] == {4}
+    assert state.staff_slots[4] == {k}
+    assert state.monthly[4] == 1
+
+    state.sync(slot(0, MORNING), unassign=[1])
+    state.sync(slot(0, MORNING), unassign=[1])
+    assert 1 not in state.slot_staff[slot(0, MORNING)]
+    assert state.monthly[1] == 4
+
+    # Later checks see the synced membership: staff 4 now works Saturday morning
+    problems = state.violations_for(4, slot(5, AFTERNOON))
+    assert problems and "less than 11h rest or same day" in problems[0]
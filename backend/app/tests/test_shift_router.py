@@ -0,0 +1,148 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.core.shift_rules import check_assignment
+from app.core.shift_timeline import StaffTimeline, invalidate_timeline_index
+from app.ml import roster_engine
+from app.ml.roster_engine import RosterSolution, StaffWorkload, remember_solution, week_slots
+from app.models.shift import AssignmentStatus, Shift, ShiftName, StaffShiftAssignment
+from app.models.users import User, UserRole
+from app.schemas.shift import BulkAssignRequest, ShiftAssignmentCreate
+from app.shifts.router import assign_shifts_bulk, swap_impact
+
+# Monday; templates as in the seeder: NIGHT 00-08, MORNING 08-16, AFTERNOON 16-24
+MONDAY = datetime(2024, 1, 1)
+HOURS = {ShiftName.NIGHT: 0, ShiftName.MORNING: 8, ShiftName.AFTERNOON: 16}
+
+
+@pytest.fixture
+def db():
+    # In-memory SQLite with just the tables the shift endpoints touch
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[User.__table__, Shift.__table__, StaffShiftAssignment.__table__],
+    )
+    session = sessionmaker(bind=engine)()
+    invalidate_timeline_index()
+    roster_engine._roster_states.clear()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+        roster_engine._roster_states.clear()
+
+
+def add_staff(db, count):
+    users = [
+        User(email=f"staff{i}@test.com", hashed_password="pw", full_name=f"Staff {i}", role=UserRole.STAFF)
+        for i in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+def add_shift(db, day, shift_type):
+    start = MONDAY + timedelta(days=day, hours=HOURS[shift_type])
+    shift = Shift(name=shift_type.value.title(), start_time=start, end_time=start + timedelta(hours=8), type=shift_type)
+    db.add(shift)
+    db.commit()
+    return shift
+
+
+def assign(db, staff_id, shift):
+    assignment = StaffShiftAssignment(staff_id=staff_id, shift_id=shift.id, status=AssignmentStatus.ASSIGNED)
+    db.add(assignment)
+    db.commit()
+    return assignment
+
+
+def test_bulk_assign_matches_one_by_one_with_existing_violations(db):
+    nurse, busy, fresh = add_staff(db, 3)
+
+    # Already over the limits: four nights in a row, six mornings in a week
+    nights = [add_shift(db, d, ShiftName.NIGHT) for d in range(6)]
+    mornings = [add_shift(db, d, ShiftName.MORNING) for d in range(8)]
+    for shift in nights[:4]:
+        assign(db, nurse, shift)
+    for shift in mornings[:6]:
+        assign(db, busy, shift)
+
+    requested = [
+        (nurse, nights[4]),     # fifth consecutive night
+        (busy, mornings[6]),    # seventh shift in the week
+        (fresh, nights[0]),
+        (fresh, nights[1]),
+        (fresh, mornings[0]),   # no rest after the night before
+        (busy, mornings[0]),    # already assigned
+    ]
+
+    # What /assign says to each item, accepting items as they pass
+    timelines = {staff_id: StaffTimeline() for staff_id in (nurse, busy, fresh)}
+    for staff_id, shifts in ((nurse, nights[:4]), (busy, mornings[:6])):
+        for shift in shifts:
+            timelines[staff_id].add(shift.start_time, shift.end_time, shift.type == ShiftName.NIGHT)
+    expected = []
+    for staff_id, shift in requested[:-1]:
+        night = shift.type == ShiftName.NIGHT
+        problems = check_assignment(timelines[staff_id], shift.start_time, shift.end_time, night)
+        if not problems:
+            timelines[staff_id].add(shift.start_time, shift.end_time, night)
+        expected.append("rejected" if problems else "assigned")
+    assert expected == ["rejected", "rejected", "assigned", "assigned", "rejected"]
+
+    response = assign_shifts_bulk(
+        db=db,
+        request=BulkAssignRequest(assignments=[
+            ShiftAssignmentCreate(staff_id=staff_id, shift_id=shift.id) for staff_id, shift in requested
+        ]),
+        current_user=None,
+    )
+
+    assert [item.outcome for item in response.items] == expected + ["rejected"]
+    assert response.items[0].errors == ["5 consecutive nights (max 3)"]
+    assert response.items[-1].errors == ["Staff already assigned to this shift"]
+    assert response.assigned == 2
+    assert db.query(StaffShiftAssignment).filter(StaffShiftAssignment.staff_id == nurse).count() == 4
+
+
+
+def test_swap_impact_needs_a_planned_roster(db):
+    nurse, _ = add_staff(db, 2)
+    assignment = assign(db, nurse, add_shift(db, 0, ShiftName.MORNING))
+
+    with pytest.raises(HTTPException) as error:
+        swap_impact(db=db, assignment_id=assignment.id, target_staff_id=None, current_user=None)
+    assert error.value.status_code == 409
+
+
+def test_swap_impact_previews_without_changing_the_cached_plan(db):
+    planned, late, spare = add_staff(db, 3)
+    morning = add_shift(db, 0, ShiftName.MORNING)
+
+    # The week was planned with `planned` on Monday morning; `late` was assigned afterwards
+    slots = week_slots(MONDAY.date(), 7)
+    slots[1].shift_id = morning.id
+    staff = [StaffWorkload(staff_id=staff_id, name=f"Staff {staff_id}") for staff_id in (planned, late, spare)]
+    state = remember_solution(RosterSolution(slots, staff, [(0, 1)], [0] * len(slots), "optimal", 0.0))
+    assignment = assign(db, late, morning)
+
+    impact = swap_impact(db=db, assignment_id=assignment.id, target_staff_id=spare, current_user=None)
+
+    assert impact.feasible
+    assert [(a.action, a.staff_id) for a in impact.adjustments] == [("unassign", late), ("assign", spare)]
+    assert state.slot_staff[1] == {planned}
+    assert state.monthly == {planned: 1, late: 0, spare: 0}
@@ -0,0 +1,179 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from datetime import datetime, timedelta
+from app.core.shift_rules import ShiftRules, check_assignment, validate_roster
+from app.core.shift_timeline import ShiftTimelineIndex, StaffTimeline, check_batch
+
+RULES = ShiftRules(min_rest_hours=11, max_shifts_per_week=5, max_consecutive_nights=3, max_hours_per_week=48)
+
+# Monday; templates as in the seeder: NIGHT 00-08, MORNING 08-16, AFTERNOON 16-24
+MONDAY = datetime(2024, 1, 1)
+
+
+def night(day):
+    start = MONDAY + timedelta(days=day)
+    return start, start + timedelta(hours=8)
+
+
+def morning(day):
+    start = MONDAY + timedelta(days=day, hours=8)
+    return start, start + timedelta(hours=8)
+
+
+def afternoon(day):
+    start = MONDAY + timedelta(days=day, hours=16)
+    return start, start + timedelta(hours=8)
+
+
+def timeline_of(*shifts, nights=()):
+    timeline = StaffTimeline()
+    for start, end in shifts:
+        timeline.add(start, end, (start, end) in nights)
+    return timeline
+
+
+def test_rest_across_midnight():
+    timeline = timeline_of(afternoon(0))
+
+    # Afternoon ends at midnight: the next night starts straight away, the next morning after 8h
+    assert "less than 11h rest from another shift" in check_assignment(timeline, *night(1), True, RULES)
+    assert "less than 11h rest from another shift" in check_assignment(timeline, *morning(1), False, RULES)
+    assert check_assignment(timeline, *afternoon(1), False, RULES) == []
+
+    # Touching is not overlapping, but leaves no rest
+    assert check_assignment(timeline_of(night(3)), *morning(3), False, RULES) == [
+        "less than 11h rest from another shift"
+    ]
+
+
+def test_fourth_consecutive_night():
+    nights = [night(d) for d in range(3)]
+    timeline = timeline_of(*nights, nights=nights)
+    assert check_assignment(timeline, *night(3), True, RULES) == ["4 consecutive nights (max 3)"]
+    # A gap day resets the run
+    assert check_assignment(timeline, *night(4), True, RULES) == []
+
+    # Filling a one-day gap joins two runs
+    nights = [night(0), night(1), night(3)]
+    timeline = timeline_of(*nights, nights=nights)
+    assert check_assignment(timeline, *night(2), True, RULES) == ["4 consecutive nights (max 3)"]
+
+
+def test_rolling_48_hours():
+    rules = ShiftRules(min_rest_hours=11, max_shifts_per_week=7, max_consecutive_nights=3, max_hours_per_week=48)
+
+    # Five 8h mornings (40h) plus a sixth is exactly 48h
+    timeline = timeline_of(*(morning(d) for d in range(5)))
+    assert check_assignment(timeline, *morning(5), False, rules) == []
+
+    # A seventh morning in the same 7 days is 56h, found from the window that
+    # starts at an earlier shift, not at the new one
+    timeline = timeline_of(*(morning(d) for d in range(1, 7)))
+    problems = check_assignment(timeline, *morning(0), False, rules)
+    assert problems == ["56h in the 7 days from 2024-01-01 08:00 (max 48h)"]
+    problems = check_assignment(timeline, *morning(7), False, rules)
+    assert problems == ["56h in the 7 days from 2024-01-02 08:00 (max 48h)"]
+
+    # A week later the window has moved on
+    assert check_assignment(timeline, *morning(14), False, rules) == []
+
+
+def test_weekly_shift_count_spans_calendar_weeks():
+    # Wednesday to Sunday: five shifts, none in the following calendar week
+    timeline = timeline_of(*(morning(d) for d in range(2, 7)))
+
+    # Monday is a new calendar week, but Wed-Tue is still a 7-day block with five shifts
+    assert check_assignment(timeline, *morning(7), False, RULES) == ["6 shifts in the 7 days from 2024-01-02 (max 5)"]
+    assert timeline.max_week_count(morning(7)[0]) == 5
+    # From the following Wednesday the block no longer reaches back to the first one
+    assert check_assignment(timeline, *morning(9), False, RULES) == []
+
+
+def test_swap_candidates_apply_weekly_count():
+    index = ShiftTimelineIndex(MONDAY - timedelta(days=30), MONDAY + timedelta(days=60))
+    index.staff = {1: ("Busy", "staff"), 2: ("Free", "staff")}
+    index.timelines = {1: timeline_of(*(morning(d) for d in range(2, 7))), 2: StaffTimeline()}
+
+    candidates = index.swap_candidates(*morning(7), rules=RULES)
+    assert [c["staff_id"] for c in candidates] == [2]
+
+
+def test_validate_roster_batch():
+    shifts = [
+        (1, *afternoon(0), False),
+        (1, *night(1), True),       # 0h rest after the afternoon
+        (2, *night(0), True),
+        (2, *night(1), True),
+        (2, *night(2), True),
+        (2, *night(3), True),       # fourth night in a row
+        (3, *morning(0), False),
+        (3, *afternoon(0), False),  # back to back, no rest
+        (3, *morning(1), False),
+    ]
+    for d in range(2, 7):
+        shifts.append((4, *morning(d), False))
+    shifts.append((4, *morning(7), False))  # sixth shift in Wed-Tue
+
+    staff_ids, starts, ends, nights = zip(*shifts)
+    found = {(v["staff_id"], v["rule"], v["index"]) for v in validate_roster(staff_ids, starts, ends, nights, RULES)}
+
+    assert (1, "min_rest", 1) in found
+    assert (2, "max_consecutive_nights", 2) in found
+    assert (3, "min_rest", 7) in found
+    assert (4, "max_shifts_per_week", 9) in found
+    assert not any(staff_id == 4 and rule != "max_shifts_per_week" for staff_id, rule, _ in found)
+
+
+def test_validate_roster_accepts_valid_roster():
+    shifts = [(1, *morning(d), False) for d in range(5)] + [(2, *night(d), True) for d in range(3)]
+    staff_ids, starts, ends, nights = zip(*shifts)
+    assert validate_roster(staff_ids, starts, ends, nights, RULES) == []
+
+
+def one_by_one(existing, proposed):
+    """What /assign would say to each proposed row, accepting rows as they pass."""
+    timelines = {}
+    for staff_id, start, end, is_night in existing:
+        timelines.setdefault(staff_id, StaffTimeline()).add(start, end, is_night)
+    results = []
+    for staff_id, start, end, is_night in proposed:
+        timeline = timelines.setdefault(staff_id, StaffTimeline())
+        problems = check_assignment(timeline, start, end, is_night, RULES)
+        if not problems:
+            timeline.add(start, end, is_night)
+        results.append(problems)
+    return results
+
+
+def test_check_batch_with_existing_violations():
+    # Staff 1 already works four nights in a row, staff 2 six mornings in a week
+    # and staff 3 an afternoon followed by a night: the baseline never enforced the rules
+    existing = [(1, *night(d), True) for d in range(4)]
+    existing += [(2, *morning(d), False) for d in range(6)]
+    existing += [(3, *afternoon(0), False), (3, *night(1), True)]
+    proposed = [
+        (1, *night(4), True),        # fifth night
+        (1, *morning(10), False),    # fine
+        (2, *morning(6), False),     # seventh shift in the week
+        (2, *morning(14), False),    # fine
+        (3, *morning(3), False),     # fine despite the existing rest violation
+        (4, *night(0), True),        # new staff member, fine
+        (4, *morning(0), False),     # back to back with the previous item
+    ]
+
+    errors = check_batch(existing, proposed, RULES)
+    assert errors == one_by_one(existing, proposed)
+    assert errors[0] == ["5 consecutive nights (max 3)"]
+    assert "7 shifts in the 7 days from 2024-01-01 (max 5)" in errors[2]
+    assert [bool(e) for e in errors] == [True, False, True, False, False, False, True]
+
+
+def test_check_batch_clean_roster():
+    existing = [(1, *morning(d), False) for d in range(3)]
+    proposed = [(1, *morning(3), False), (2, *night(0), True), (2, *night(1), True)]
+    assert check_batch(existing, proposed, RULES) == [[], [], []]
+    assert check_batch(existing, [], RULES) == []
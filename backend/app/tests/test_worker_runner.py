@@ -0,0 +1,56 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from concurrent.futures import Future
+
+import pytest
+
+from app.workers import runner
+from app.workers.runner import Worker
+
+
+class FlakyWorker(Worker):
+    """Worker whose polls fail a few times before succeeding, then stops itself."""
+
+    def __init__(self, failures, **kwargs):
+        super().__init__(processes=1, threads=1, poll_interval=0.01, schedules=[], **kwargs)
+        self.failures = failures
+        self.ticks = 0
+
+    def tick(self):
+        self.ticks += 1
+        if self.ticks <= self.failures:
+            raise ConnectionError("server closed the connection unexpectedly")
+        self.stop()
+
+
+def test_run_survives_failed_polls():
+    worker = FlakyWorker(failures=3)
+    worker.run()
+    assert worker.ticks == 4
+
+
+def test_finished_job_stays_in_flight_until_recorded(monkeypatch):
+    worker = Worker(processes=1, threads=1, schedules=[])
+    future = Future()
+    future.set_result({"rows": 1})
+    worker.in_flight[7] = (future, False)
+
+    def database_down(db, job_id, result):
+        raise ConnectionError("server closed the connection unexpectedly")
+
+    monkeypatch.setattr(runner.queue, "complete", database_down)
+    with pytest.raises(ConnectionError):
+        worker._collect_finished(db=None)
+    assert 7 in worker.in_flight
+
+    recorded = []
+    monkeypatch.setattr(runner.queue, "complete", lambda db, job_id, result: recorded.append((job_id, result)))
+    worker._collect_finished(db=None)
+    assert recorded == [(7, {"rows": 1})]
+    assert worker.in_flight == {}
+    worker.process_pool.shutdown()
+    worker.thread_pool.shutdown()
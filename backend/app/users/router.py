@@ -2,11 +2,13 @@ from typing import List, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.core import deps
+from app.core.log import audit
 from app.core.security import get_password_hash
+from app.core.timing import TimedRoute
 from app.models.users import User, UserRole
 from app.schemas.users import User as UserSchema, UserCreate, UserUpdate
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/", response_model=List[UserSchema])
@@ -65,6 +67,8 @@ def update_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    # Field names only; values may include the password hash
+    audit("user.update", actor_id=current_user.id, target_user_id=user.id, fields=sorted(update_data))
     return user
 
 
@@ -86,4 +90,5 @@ def deactivate_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    audit("user.deactivate", actor_id=current_user.id, target_user_id=user.id)
     return user
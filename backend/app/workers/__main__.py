@@ -0,0 +1,22 @@
+import argparse
+
+from app.core import log
+from app.core.config import settings
+from app.workers.runner import Worker
+
+parser = argparse.ArgumentParser(description="Run background jobs from the jobs table.")
+parser.add_argument("--processes", type=int, default=None, help="Process pool size for CPU-bound tasks")
+parser.add_argument("--threads", type=int, default=4, help="Thread pool size for light tasks")
+parser.add_argument("--poll", type=float, default=5.0, help="Seconds between queue polls")
+parser.add_argument("--no-schedule", action="store_true", help="Don't queue scheduled runs from this worker")
+parser.add_argument("--once", action="store_true", help="Run jobs that are due now, then exit")
+args = parser.parse_args()
+
+log.configure_logging(settings.LOG_LEVEL, settings.LOG_FILE)
+
+Worker(
+    processes=args.processes,
+    threads=args.threads,
+    poll_interval=args.poll,
+    schedules=[] if args.no_schedule else None,
+).run(once=args.once)
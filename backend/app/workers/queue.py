@@ -0,0 +1,174 @@
+"""
+Database-backed job queue.
+
+Jobs are rows in the `jobs` table. Workers claim the oldest due PENDING job
+with SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker processes
+can share the table without a broker.
+"""
+
+import json
+import traceback
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.job import Job, JobStatus
+
+# Retry delay after the n-th failed attempt: RETRY_BASE_SECONDS * 2 ** (n - 1), capped
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+# RUNNING jobs without a heartbeat for this long are assumed lost (worker killed)
+STALE_AFTER = timedelta(minutes=10)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(
+    db: Session,
+    task: str,
+    params: Optional[dict] = None,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+    created_by: Optional[int] = None,
+    schedule: Optional[str] = None,
+) -> Optional[Job]:
+    """
+    Add a job. Returns None if `schedule` already queued a run for `run_at`.
+    """
+    from app.workers.registry import get_task
+
+    spec = get_task(task)
+    job = Job(
+        task=task,
+        params=params or {},
+        status=JobStatus.PENDING,
+        run_at=run_at or utcnow(),
+        max_attempts=max_attempts or spec.max_attempts,
+        created_by=created_by,
+        schedule=schedule,
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        if schedule is None:
+            raise
+        return None
+    db.refresh(job)
+    return job
+
+
+def claim_next(db: Session, worker: str, tasks: Optional[Iterable[str]] = None) -> Optional[Job]:
+    """Mark the oldest due PENDING job (optionally limited to `tasks`) as RUNNING and return it."""
+    now = utcnow()
+    query = db.query(Job).filter(Job.status == JobStatus.PENDING, Job.run_at <= now)
+    if tasks is not None:
+        query = query.filter(Job.task.in_(list(tasks)))
+    job = query.order_by(Job.run_at, Job.id).with_for_update(skip_locked=True).limit(1).first()
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = JobStatus.RUNNING
+    job.attempts += 1
+    job.worker = worker
+    job.started_at = now
+    job.heartbeat_at = now
+    job.error = None
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def heartbeat(db: Session, job_ids: Iterable[int]) -> None:
+    job_ids = list(job_ids)
+    if not job_ids:
+        return
+    db.query(Job).filter(Job.id.in_(job_ids), Job.status == JobStatus.RUNNING).update(
+        {Job.heartbeat_at: utcnow()}, synchronize_session=False
+    )
+    db.commit()
+
+
+def set_progress(db: Session, job_id: int, progress: dict) -> None:
+    db.query(Job).filter(Job.id == job_id).update(
+        {Job.progress: to_json(progress), Job.heartbeat_at: utcnow()}, synchronize_session=False
+    )
+    db.commit()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "tolist"):  # numpy scalars and arrays
+        return value.tolist()
+    return str(value)
+
+
+def to_json(value):
+    """Task results and progress as plain JSON types (numpy values, dates and the like converted)."""
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+def complete(db: Session, job_id: int, result) -> None:
+    db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.RUNNING).update(
+        {Job.status: JobStatus.SUCCEEDED, Job.result: to_json(result), Job.finished_at: utcnow()},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS))
+
+
+def fail(db: Session, job_id: int, error: BaseException) -> Optional[Job]:
+    """Record a failure; requeue with exponential backoff while attempts remain."""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job is None or job.status != JobStatus.RUNNING:
+        db.rollback()
+        return job
+
+    job.error = "".join(traceback.format_exception(type(error), error, error.__traceback__))[-4000:]
+    if job.attempts < job.max_attempts:
+        job.status = JobStatus.PENDING
+        job.run_at = utcnow() + retry_delay(job.attempts)
+    else:
+        job.status = JobStatus.FAILED
+        job.finished_at = utcnow()
+    db.commit()
+    return job
+
+
+def requeue_stale(db: Session, stale_after: timedelta = STALE_AFTER) -> int:
+    """Return lost RUNNING jobs to the queue (or fail them if out of attempts)."""
+    cutoff = utcnow() - stale_after
+    stale = db.query(Job).filter(
+        Job.status == JobStatus.RUNNING, Job.heartbeat_at < cutoff
+    ).with_for_update(skip_locked=True).all()
+    for job in stale:
+        job.error = f"Worker {job.worker} stopped sending heartbeats"
+        if job.attempts < job.max_attempts:
+            job.status = JobStatus.PENDING
+            job.run_at = utcnow() + retry_delay(job.attempts)
+        else:
+            job.status = JobStatus.FAILED
+            job.finished_at = utcnow()
+    db.commit()
+    return len(stale)
+
+
+def cancel(db: Session, job_id: int) -> Optional[Job]:
+    """Cancel a job that hasn't started yet."""
+    job = db.query(Job).filter(Job.id == job_id).with_for_update().first()
+    if job is not None and job.status == JobStatus.PENDING:
+        job.status = JobStatus.CANCELLED
+        job.finished_at = utcnow()
+    db.commit()
+    return job
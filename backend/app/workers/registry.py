@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    func: Callable  # func(params: dict, progress: Callable[..., None]) -> JSON-serialisable result
+    cpu_bound: bool = True  # run in the process pool rather than a thread
+    max_attempts: int = 3
+    description: str = ""
+
+
+TASKS: Dict[str, TaskSpec] = {}
+
+
+def task(name: str, cpu_bound: bool = True, max_attempts: int = 3, description: str = ""):
+    """Register a function as a background task under `name`."""
+    def register(func: Callable) -> Callable:
+        TASKS[name] = TaskSpec(name, func, cpu_bound, max_attempts, description or (func.__doc__ or "").strip())
+        return func
+    return register
+
+
+def get_task(name: str) -> TaskSpec:
+    # Importing the task modules registers them
+    import app.workers.tasks  # noqa: F401
+
+    if name not in TASKS:
+        raise KeyError(f"Unknown task: {name}")
+    return TASKS[name]
@@ -0,0 +1,226 @@
+"""
+Job runner: polls the jobs table, runs CPU-bound tasks in a process pool
+and light ones in a thread pool, records results, retries failures and
+queues scheduled runs.
+
+Run as many runner processes (on as many machines) as needed:
+
+    python -m app.workers --processes 4
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time as _time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from app.core.db import SessionLocal
+from app.workers import queue
+from app.workers.registry import TASKS, get_task
+from app.workers.schedule import SCHEDULES, Schedule, enqueue_due
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress writes from a running task
+PROGRESS_INTERVAL = 1.0
+# How often in-flight jobs get their heartbeat refreshed
+HEARTBEAT_INTERVAL = 30.0
+# Longest wait between retries after a failed poll (database down, failover)
+MAX_RETRY_DELAY = 60.0
+
+
+class ProgressReporter:
+    """Callable given to tasks: progress(rows=..., folds_done=...) merges and saves (throttled)."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.state: Dict = {}
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, force: bool = False, **fields) -> None:
+        with self._lock:
+            self.state.update(fields)
+            now = _time.monotonic()
+            if not force and now - self._last_write < PROGRESS_INTERVAL:
+                return
+            self._last_write = now
+            state = dict(self.state)
+        db = SessionLocal()
+        try:
+            queue.set_progress(db, self.job_id, state)
+        finally:
+            db.close()
+
+
+def _init_process() -> None:
+    # Forked/spawned pool processes must not reuse the parent's pooled connections
+    from app.core import log
+    from app.core.config import settings
+    from app.core.db import engine
+
+    engine.dispose(close=False)
+    # Spawned processes start with no handlers; without this, task logs are dropped
+    log.configure_logging(settings.LOG_LEVEL, settings.LOG_FILE)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def execute_job(job_id: int, task_name: str, params: dict):
+    """Run one job's task (in a pool process or thread) and return its result."""
+    spec = get_task(task_name)
+    progress = ProgressReporter(job_id)
+    result = spec.func(params or {}, progress)
+    if progress.state:
+        progress(force=True)
+    return result
+
+
+class Worker:
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        threads: int = 4,
+        poll_interval: float = 5.0,
+        schedules: Optional[List[Schedule]] = None,
+        worker_id: Optional[str] = None,
+    ):
+        self.processes = processes or max(1, (os.cpu_count() or 2) // 2)
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.schedules = SCHEDULES if schedules is None else schedules
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.in_flight: Dict[int, tuple] = {}  # job_id -> (future, cpu_bound)
+        self._stopping = threading.Event()
+        self._last_schedule_check = queue.utcnow()
+        self._last_heartbeat = 0.0
+
+        import app.workers.tasks  # noqa: F401  (registers the built-in tasks)
+        self.cpu_tasks = [name for name, spec in TASKS.items() if spec.cpu_bound]
+        self.io_tasks = [name for name, spec in TASKS.items() if not spec.cpu_bound]
+
+        self.process_pool = self._new_process_pool()
+        self.thread_pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job")
+
+    def _new_process_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process,
+        )
+
+    def stop(self, *_) -> None:
+        self._stopping.set()
+
+    def _free_slots(self, cpu_bound: bool) -> int:
+        busy = sum(1 for _, is_cpu in self.in_flight.values() if is_cpu == cpu_bound)
+        return (self.processes if cpu_bound else self.threads) - busy
+
+    def _claim_and_submit(self, db) -> int:
+        started = 0
+        for cpu_bound, tasks, pool in (
+            (True, self.cpu_tasks, self.process_pool),
+            (False, self.io_tasks, self.thread_pool),
+        ):
+            while tasks and self._free_slots(cpu_bound) > 0:
+                job = queue.claim_next(db, self.worker_id, tasks)
+                if job is None:
+                    break
+                logger.info("Job started", extra={"job_id": job.id, "task": job.task, "attempt": job.attempts})
+                future = pool.submit(execute_job, job.id, job.task, job.params)
+                self.in_flight[job.id] = (future, cpu_bound)
+                started += 1
+        return started
+
+    def _collect_finished(self, db) -> None:
+        for job_id, (future, _) in list(self.in_flight.items()):
+            if not future.done():
+                continue
+            # Stays in flight until its outcome is recorded, so a failed write is retried next tick
+            error = future.exception()
+            if error is None:
+                queue.complete(db, job_id, future.result())
+                del self.in_flight[job_id]
+                logger.info("Job succeeded", extra={"job_id": job_id})
+            else:
+                job = queue.fail(db, job_id, error)
+                del self.in_flight[job_id]
+                state = job.status.value if job is not None else "missing"
+                logger.error("Job failed", exc_info=error, extra={"job_id": job_id, "job_status": state})
+                if isinstance(error, BrokenProcessPool):
+                    # A pool process died (e.g. OOM-killed); every job in it failed too
+                    self.process_pool.shutdown(wait=False, cancel_futures=True)
+                    self.process_pool = self._new_process_pool()
+
+    def tick(self) -> None:
+        db = SessionLocal()
+        try:
+            self._collect_finished(db)
+
+            now = queue.utcnow()
+            if self.schedules:
+                enqueue_due(db, self.schedules, self._last_schedule_check, now)
+                self._last_schedule_check = now
+
+            if _time.monotonic() - self._last_heartbeat > HEARTBEAT_INTERVAL:
+                queue.heartbeat(db, self.in_flight)
+                queue.requeue_stale(db)
+                self._last_heartbeat = _time.monotonic()
+
+            if not self._stopping.is_set():
+                self._claim_and_submit(db)
+        finally:
+            db.close()
+
+    def run(self, once: bool = False) -> None:
+        """
+        Poll until stopped (SIGINT/SIGTERM); in-flight jobs are finished before exiting.
+
+        A failed poll (e.g. the database dropping the connection) is logged and
+        retried with exponential backoff up to MAX_RETRY_DELAY; running jobs
+        keep running and are recorded once the database is back.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+        logger.info("Worker running", extra={
+            "worker_id": self.worker_id, "processes": self.processes, "threads": self.threads,
+        })
+        failures = 0
+        try:
+            while True:
+                try:
+                    self.tick()
+                    failures = 0
+                except Exception:
+                    if once and not self.in_flight:
+                        raise
+                    if self._stopping.is_set() and not self.in_flight:
+                        break
+                    failures += 1
+                    delay = min(self.poll_interval * 2 ** (failures - 1), MAX_RETRY_DELAY)
+                    logger.exception("Poll failed, retrying", extra={
+                        "worker_id": self.worker_id, "failures": failures, "retry_in_seconds": delay,
+                    })
+                    if self._stopping.is_set():
+                        # Draining: in-flight results can only be recorded once the database is back
+                        _time.sleep(delay)
+                    else:
+                        self._stopping.wait(delay)
+                    continue
+                if once and not self.in_flight:
+                    break
+                if self._stopping.is_set() and not self.in_flight:
+                    break
+                self._stopping.wait(self.poll_interval if not once else 0.2)
+                if self._stopping.is_set() and self.in_flight:
+                    # Keep collecting results while draining
+                    _time.sleep(min(self.poll_interval, 1.0))
+        finally:
+            self.process_pool.shutdown(wait=True)
+            self.thread_pool.shutdown(wait=True)
+            logger.info("Worker stopped", extra={"worker_id": self.worker_id})
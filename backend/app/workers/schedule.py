@@ -0,0 +1,104 @@
+"""
+Cron-style schedules for recurring jobs.
+
+Expressions use the usual five fields (minute hour day-of-month month
+day-of-week, Sunday = 0) with *, lists, ranges and steps, evaluated in
+hospital local time (IST).
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Set
+from zoneinfo import ZoneInfo
+
+LOCAL_TZ = ZoneInfo("Asia/Kolkata")
+
+_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def _parse_field(expr: str, low: int, high: int) -> Set[int]:
+    values = set()
+    for part in expr.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-"))
+        else:
+            start = end = int(part)
+            if step != 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field '{expr}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_field(text, low, high) for text, (low, high) in zip(fields, _FIELD_RANGES)
+        )
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def matches(self, moment: datetime) -> bool:
+        local = moment.astimezone(LOCAL_TZ)
+        if local.minute not in self.minutes or local.hour not in self.hours or local.month not in self.months:
+            return False
+        day_ok = local.day in self.days
+        weekday_ok = (local.isoweekday() % 7) in self.weekdays
+        # Standard cron: if both day fields are restricted, either may match
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def runs_between(self, after: datetime, until: datetime) -> List[datetime]:
+        """Matching minutes in (after, until], as UTC datetimes."""
+        moment = after.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        runs = []
+        while moment <= until:
+            if self.matches(moment):
+                runs.append(moment)
+            moment += timedelta(minutes=1)
+        return runs
+
+
+@dataclass
+class Schedule:
+    name: str
+    cron: str
+    task: str
+    params: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.cron_schedule = CronSchedule(self.cron)
+
+
+SCHEDULES = [
+    Schedule("nightly-snapshot", "15 1 * * *", "sync_snapshot"),
+    Schedule("nightly-model-update", "0 2 * * *", "update_model"),
+    Schedule("weekly-retrain", "0 3 * * 0", "train_models"),
+    Schedule("hourly-forecasts", "5 * * * *", "precompute_forecasts"),
+    # After the nightly batch jobs, before the 08:00 shift change and clinic hours
+    Schedule("morning-cache-warm", "45 7 * * *", "warm_caches"),
+]
+
+
+def enqueue_due(db, schedules: List[Schedule], after: datetime, until: datetime) -> int:
+    """Queue every scheduled run in (after, until]; runs already queued by another worker are skipped."""
+    from app.workers.queue import enqueue
+
+    queued = 0
+    for schedule in schedules:
+        for run_at in schedule.cron_schedule.runs_between(after, until):
+            if enqueue(db, schedule.task, schedule.params, run_at=run_at, schedule=schedule.name):
+                queued += 1
+    return queued
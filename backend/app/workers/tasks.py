@@ -0,0 +1,176 @@
+"""
+Built-in background tasks.
+
+Each task takes (params, progress) and returns a JSON-serialisable result.
+`progress(**fields)` records progress on the job row (throttled).
+"""
+
+from app.workers.registry import task
+
+
+def _refresh_forecasts() -> None:
+    """Queue a precompute_forecasts run so stored forecasts follow a new model."""
+    from app.core.db import SessionLocal
+    from app.workers.queue import enqueue
+
+    db = SessionLocal()
+    try:
+        enqueue(db, "precompute_forecasts")
+    finally:
+        db.close()
+
+
+@task("train_models", description="Full cross-validated retrain; saves the best model")
+def train_models_task(params: dict, progress) -> dict:
+    from app.ml.train_forecasting import load_model_meta, train_models
+
+    results = train_models(
+        n_folds=params.get("folds", 5),
+        max_workers=params.get("workers"),
+        refresh_dataset=True,
+        search=params.get("search", False),
+        time_budget_seconds=params.get("budget", 600),
+        progress=progress,
+    )
+    meta = load_model_meta()
+    _refresh_forecasts()
+    return {
+        "model": meta.get("model"),
+        "test_metrics": meta.get("test_metrics"),
+        "cv_metrics": {name: result["metrics"] for name, result in results.items()},
+    }
+
+
+@task("update_model", description="Incremental update from days newer than the model's watermark")
+def update_model_task(params: dict, progress) -> dict:
+    from app.ml.incremental_update import update_model
+
+    result = update_model(
+        holdout_fraction=params.get("holdout_fraction", 0.3),
+        tolerance=params.get("tolerance", 0.02),
+    )
+    if result.get("status") == "promoted":
+        _refresh_forecasts()
+    return result
+
+
+@task("sync_snapshot", description="Append completed days to the Parquet training snapshot")
+def sync_snapshot_task(params: dict, progress) -> dict:
+    """params: {"rebuild": true} to rebuild the snapshot from scratch."""
+    from app.ml.dataset_builder import read_watermark, sync_snapshot
+
+    rows = sync_snapshot(rebuild=params.get("rebuild", False))
+    progress(rows=rows)
+    watermark = read_watermark()
+    return {"rows": rows, "watermark": watermark.isoformat() if watermark else None}
+
+
+@task("precompute_forecasts", cpu_bound=False,
+      description="Store the next FORECAST_HORIZON_DAYS days of hourly forecasts for /ml/forecast")
+def precompute_forecasts_task(params: dict, progress) -> dict:
+    from app.core.db import SessionLocal
+    from app.ml.forecast_horizon import precompute_horizon
+    from app.ml.forecast_service import ForecastService
+
+    db = SessionLocal()
+    try:
+        return precompute_horizon(db, ForecastService(), days=params.get("days"))
+    finally:
+        db.close()
+
+
+# Tables behind the hot read endpoints (my-shifts, roster, swap candidates, forecast, availability)
+WARM_TABLES = ("users", "shifts", "staff_shift_assignments", "appointments", "doctor_availability", "forecast_horizon")
+
+
+@task("warm_caches", cpu_bound=False,
+      description="Load the tables behind the hot read endpoints into the database cache")
+def warm_caches_task(params: dict, progress) -> dict:
+    """
+    The API's own caches (my-shifts, timeline index, roster plans) live inside
+    each API process, so a runner can't fill them; this warms the database
+    pages they are built from instead. Uses pg_prewarm (tables and their
+    indexes, into shared buffers) when the extension is installed, otherwise
+    a full read of each table, which at least warms the OS page cache.
+    """
+    from sqlalchemy import text
+
+    from app.core.db import SessionLocal
+
+    tables = params.get("tables") or WARM_TABLES
+    db = SessionLocal()
+    try:
+        prewarm = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm'")).first() is not None
+        warmed = {}
+        for done, table in enumerate(tables, start=1):
+            if table not in WARM_TABLES:
+                raise ValueError(f"Not a warmable table: {table}")
+            if prewarm:
+                relations = [table] + [
+                    name for (name,) in db.execute(
+                        text("SELECT indexname FROM pg_indexes WHERE tablename = :table"), {"table": table}
+                    )
+                ]
+                warmed[table] = sum(
+                    db.execute(text("SELECT pg_prewarm(CAST(:relation AS regclass))"), {"relation": relation}).scalar()
+                    for relation in relations
+                )
+            else:
+                warmed[table] = db.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            progress(tables_done=done, tables_total=len(tables))
+        db.rollback()
+    finally:
+        db.close()
+
+    return {"method": "pg_prewarm" if prewarm else "sequential_read",
+            "unit": "blocks" if prewarm else "rows", "tables": warmed}
+
+
+@task("seed_database", max_attempts=1, description="Truncate and reseed all tables with synthetic data")
+def seed_database_task(params: dict, progress) -> dict:
+    """params: {"bulk": true, "scale", "days", "doctors", "staff", "appointments_per_day", "seed", "workers"} for the COPY seeder."""
+    if params.get("bulk"):
+        from dataclasses import replace
+
+        from app.ml.bulk_seeder import SeedScale, run_bulk_seed
+
+        scale = SeedScale().scaled(params.get("scale", 1.0))
+        overrides = {key: params[key] for key in ("days", "doctors", "staff", "appointments_per_day") if key in params}
+        return run_bulk_seed(replace(scale, **overrides), seed=params.get("seed"),
+                             progress=progress, workers=params.get("workers"))
+
+    from app.ml.production_data_seeder import run_full_seed
+
+    run_full_seed(progress=progress)
+    return {"status": "seeded"}
+
+
+@task("export_dataset", description="Write the hourly training dataset to app/ml/exports (csv or parquet)")
+def export_dataset_task(params: dict, progress) -> dict:
+    import os
+    from datetime import datetime
+
+    from app.ml.dataset_builder import EXPORT_DIR, build_ml_dataset_from_snapshot
+
+    fmt = params.get("format", "csv")
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    progress(stage="syncing_snapshot", force=True)
+    df = build_ml_dataset_from_snapshot()
+    progress(stage="writing", rows=len(df))
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, f"appointments_hourly-{datetime.now():%Y%m%dT%H%M%S}.{fmt}")
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False)
+
+    return {
+        "path": path,
+        "format": fmt,
+        "rows": len(df),
+        "first_date": df["appointment_date"].min().date().isoformat(),
+        "last_date": df["appointment_date"].max().date().isoformat(),
+    }
@@ -0,0 +1,64 @@
+"""
+Add the indexes used by the windowed staff workload query.
+Creates: shifts(start_time), staff_shift_assignments(shift_id, staff_id), staff_shift_assignments(staff_id)
+Drops ix_staff_shift_assignments_shift_id (from earlier runs), which the composite index covers.
+Run: python scripts/add_workload_indexes.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.db.db import engine
+
+INDEXES = [
+    ("ix_shifts_start_time", "shifts", "start_time"),
+    ("ix_staff_shift_assignments_shift_id_staff_id", "staff_shift_assignments", "shift_id, staff_id"),
+    ("ix_staff_shift_assignments_staff_id", "staff_shift_assignments", "staff_id"),
+]
+
+# Redundant index -> the index that covers it (dropped only once that one exists)
+REDUNDANT_INDEXES = {"ix_staff_shift_assignments_shift_id": "ix_staff_shift_assignments_shift_id_staff_id"}
+
+
+def add_workload_indexes():
+    """Create the indexes concurrently so the tables stay writable."""
+    print("="*60)
+    print("WORKLOAD QUERY INDEXES")
+    print("="*60)
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    created = set()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for i, (name, table, column) in enumerate(INDEXES, start=1):
+            print(f"\n{i}. Creating {name} on {table}({column})...")
+            try:
+                conn.execute(text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column})"
+                ))
+                print(f"   ✅ Index {name} ready")
+                created.add(name)
+            except Exception as e:
+                print(f"   ❌ Failed to create {name}: {e}")
+
+        for name, covered_by in REDUNDANT_INDEXES.items():
+            if covered_by not in created:
+                print(f"\nKeeping {name}: {covered_by} was not created")
+                continue
+            print(f"\nDropping redundant {name}...")
+            try:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                print(f"   ✅ Index {name} dropped")
+            except Exception as e:
+                print(f"   ❌ Failed to drop {name}: {e}")
+
+        conn.execute(text("ANALYZE shifts"))
+        conn.execute(text("ANALYZE staff_shift_assignments"))
+
+    print("\n" + "="*60)
+    print("✅ INDEXES COMPLETE")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    add_workload_indexes()
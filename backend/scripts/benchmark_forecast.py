@@ -0,0 +1,84 @@
+"""
+Single-row forecast latency microbenchmark.
+
+Compares the pandas path (ForecastService.predict on a one-row DataFrame)
+with the compiled NumPy path (ForecastService.predict_one), checks that both
+return identical values, and reports p50/p99 latency for each.
+
+Run from backend/:  python scripts/benchmark_forecast.py [iterations]
+"""
+import sys
+import os
+import time
+import random
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from app.ml.forecast_service import ForecastService
+
+
+def make_features(count, seed=42):
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    rows = []
+    for _ in range(count):
+        moment = base + timedelta(days=rng.randint(0, 364), hours=rng.randint(0, 23))
+        rows.append({
+            "appointment_date": moment,
+            "hour": moment.hour,
+            "doctor_count": rng.randint(2, 8),
+            "avg_patient_age": round(rng.gauss(45, 10), 2),
+            "emergency_count": rng.randint(1, 5),
+        })
+    return rows
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_calls(fn, rows):
+    samples = []
+    for features in rows:
+        start = time.perf_counter_ns()
+        fn(features)
+        samples.append((time.perf_counter_ns() - start) / 1000)  # µs
+    return samples
+
+
+def run_benchmark(iterations=2000):
+    service = ForecastService()
+    rows = make_features(iterations)
+
+    mismatches = sum(
+        1 for features in rows
+        if service.predict_one(features) != service.predict(pd.DataFrame([features]))[0]
+    )
+
+    # Warm up both paths before timing
+    time_calls(lambda f: service.predict(pd.DataFrame([f])), rows[:50])
+    time_calls(service.predict_one, rows[:50])
+
+    pandas_samples = time_calls(lambda f: service.predict(pd.DataFrame([f])), rows)
+    fast_samples = time_calls(service.predict_one, rows)
+
+    print("=" * 60)
+    print(f"FORECAST INFERENCE BENCHMARK ({type(service.model).__name__}, {iterations} rows)")
+    print("=" * 60)
+    print(f"Compiled path available: {service.has_fast_path}")
+    print(f"Mismatches vs pandas path: {mismatches}")
+    print(f"{'path':<12}{'p50 (µs)':>12}{'p99 (µs)':>12}")
+    for name, samples in (("pandas", pandas_samples), ("compiled", fast_samples)):
+        print(f"{name:<12}{percentile(samples, 50):>12.1f}{percentile(samples, 99):>12.1f}")
+
+    return mismatches
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    sys.exit(1 if run_benchmark(iterations) else 0)
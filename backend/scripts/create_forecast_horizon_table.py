@@ -0,0 +1,27 @@
+"""
+Create the forecast_horizon table holding precomputed forecasts (app/ml/forecast_horizon.py).
+Run: python scripts/create_forecast_horizon_table.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.db import engine, Base
+from app.models.forecast import ForecastHorizon
+
+
+def create_forecast_horizon_table():
+    print("="*60)
+    print("FORECAST HORIZON TABLE")
+    print("="*60)
+
+    try:
+        Base.metadata.create_all(bind=engine, tables=[ForecastHorizon.__table__])
+        print("\n✅ forecast_horizon table ready")
+    except Exception as e:
+        print(f"\n❌ Failed to create forecast_horizon table: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    create_forecast_horizon_table()
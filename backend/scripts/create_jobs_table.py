@@ -0,0 +1,27 @@
+"""
+Create the jobs table used by the background worker (app/workers).
+Run: python scripts/create_jobs_table.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.db import engine, Base
+from app.models.job import Job
+
+
+def create_jobs_table():
+    print("="*60)
+    print("BACKGROUND JOBS TABLE")
+    print("="*60)
+
+    try:
+        Base.metadata.create_all(bind=engine, tables=[Job.__table__])
+        print("\n✅ jobs table ready")
+    except Exception as e:
+        print(f"\n❌ Failed to create jobs table: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    create_jobs_table()
@@ -0,0 +1,346 @@
+"""
+Load test: run a weighted mix of realistic scenarios against a running API.
+
+Closed loop (N virtual users, each starting its next scenario when the last
+one finishes) measures capacity; open loop (scenarios start at a fixed
+arrival rate whether or not earlier ones finished) measures latency at a
+given load without coordinated omission.
+
+Run against a local server on a seeded database (app.ml.bulk_seeder):
+
+    python scripts/load_test.py --users 50 --duration 60
+    python scripts/load_test.py --mode open --rate 200 --duration 60 --label rate200
+    python scripts/load_test.py --mix forecast=5,list_rooms=1 --compare scripts/load_results/<earlier>.json
+
+Reports throughput, p50/p95/p99 latency and error rates per endpoint, and
+saves the run as JSON under scripts/load_results/.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time, timedelta
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # dev-only dependency
+    print("❌ load_test.py needs httpx: pip install httpx")
+    sys.exit(1)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_results")
+
+DEFAULT_MIX = {
+    "login": 5,
+    "book": 15,
+    "reschedule": 10,
+    "cancel": 5,
+    "list_rooms": 20,
+    "forecast": 25,
+    "shift_optimize": 10,
+    "swap": 10,
+}
+
+
+class Stats:
+    """Latencies and outcomes per endpoint, recorded after the warm-up."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.recording = False
+
+    def record(self, endpoint: str, seconds: float, status) -> None:
+        if self.recording:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            ms = np.asarray(latencies) * 1000
+            statuses = self.statuses[endpoint]
+            count = len(latencies)
+            errors = sum(n for status, n in statuses.items() if status == "error" or int(status) >= 500)
+            rejected = sum(n for status, n in statuses.items() if status != "error" and 400 <= int(status) < 500)
+            endpoints[endpoint] = {
+                "count": count,
+                "rps": count / elapsed,
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max()),
+                "error_rate": errors / count,
+                "rejected_rate": rejected / count,
+                "statuses": {str(status): n for status, n in statuses.items()},
+            }
+        total = sum(e["count"] for e in endpoints.values())
+        return {"elapsed_seconds": elapsed, "requests": total, "rps": total / elapsed, "endpoints": endpoints}
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args, stats: Stats):
+        self.client = client
+        self.args = args
+        self.stats = stats
+        self.admin_headers = {}
+        self.staff_headers = []
+        self.doctor_ids = []
+        # Appointments booked by this run, available to reschedule/cancel
+        self.booked = []
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(endpoint, time.perf_counter() - started, "error")
+            return None
+        self.stats.record(endpoint, time.perf_counter() - started, response.status_code)
+        return response
+
+    async def login(self, email: str, password: str, endpoint: str = "POST /login/access-token"):
+        response = await self.request(
+            endpoint, "POST", "/api/v1/login/access-token",
+            data={"username": email, "password": password},
+        )
+        if response is None or response.status_code != 200:
+            return None
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def setup(self) -> None:
+        self.admin_headers = await self.login(self.args.admin_email, self.args.admin_password, "setup")
+        if self.admin_headers is None:
+            raise SystemExit(f"❌ Could not log in as {self.args.admin_email}")
+
+        response = await self.client.get("/api/v1/users/", params={"limit": 10_000}, headers=self.admin_headers)
+        response.raise_for_status()
+        users = response.json()
+        self.doctor_ids = [u["id"] for u in users if u["role"] == "doctor"]
+        staff_emails = [u["email"] for u in users if u["role"] == "staff"][: self.args.staff_logins]
+        for email in staff_emails:
+            headers = await self.login(email, self.args.staff_password, "setup")
+            if headers is not None:
+                self.staff_headers.append(headers)
+        print(f"  ✓ {len(self.doctor_ids)} doctors, {len(self.staff_headers)} staff logged in")
+
+    # ─── Scenarios ────────────────────────────────────────
+
+    def _future_slot(self):
+        """A 30-minute slot inside the seeded morning availability (08:00-13:00) on a coming weekday."""
+        day = date.today() + timedelta(days=random.randint(1, 60))
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        start = datetime.combine(day, dt_time(8, 0)) + timedelta(minutes=30 * random.randrange(10))
+        return day, start.time(), (start + timedelta(minutes=30)).time()
+
+    async def scenario_login(self):
+        await self.login(self.args.admin_email, self.args.admin_password)
+
+    async def scenario_book(self):
+        day, start, end = self._future_slot()
+        response = await self.request("POST /appointments/", "POST", "/api/v1/appointments/", headers=self.admin_headers, json={
+            "patient_id": random.randint(1, 1_000_000),
+            "doctor_id": random.choice(self.doctor_ids),
+            "appointment_date": day.isoformat(),
+            "start_time": start.isoformat(),
+            "end_time": end.isoformat(),
+            "patient_name": "Load Test",
+            "patient_phone": f"555-{random.randint(1000, 9999)}",
+            "patient_gender": random.choice(["Male", "Female"]),
+            "patient_age": random.randint(5, 95),
+            "appointment_type": "Emergency" if random.random() < 0.175 else "Consultation",
+            "reason_for_visit": "Load test",
+        })
+        if response is not None and response.status_code == 200:
+            self.booked.append(response.json()["id"])
+
+    async def scenario_reschedule(self):
+        if not self.booked:
+            return await self.scenario_book()
+        day, start, end = self._future_slot()
+        await self.request(
+            "PUT /appointments/{id}", "PUT", f"/api/v1/appointments/{random.choice(self.booked)}",
+            headers=self.admin_headers,
+            json={"appointment_date": day.isoformat(), "start_time": start.isoformat(), "end_time": end.isoformat()},
+        )
+
+    async def scenario_cancel(self):
+        if not self.booked:
+            return await self.scenario_book()
+        appointment_id = self.booked.pop(random.randrange(len(self.booked)))
+        await self.request("DELETE /appointments/{id}", "DELETE", f"/api/v1/appointments/{appointment_id}",
+                           headers=self.admin_headers)
+
+    async def scenario_list_rooms(self):
+        await self.request("GET /rooms/", "GET", "/api/v1/rooms/", headers=self.admin_headers)
+
+    async def scenario_forecast(self):
+        day = date.today() + timedelta(days=random.randint(0, 20))
+        await self.request("POST /ml/forecast", "POST", "/api/v1/ml/forecast", headers=self.admin_headers,
+                           json={"date": day.isoformat(), "hour": random.randint(0, 23)})
+
+    async def scenario_shift_optimize(self):
+        day = date.today() + timedelta(days=random.randint(0, 13))
+        await self.request("POST /ml/shift-optimize", "POST", "/api/v1/ml/shift-optimize", headers=self.admin_headers,
+                           json={"date": day.isoformat(), "hour": random.choice([9, 14, 20, 2])})
+
+    async def scenario_swap(self):
+        """Staff member looks at their shifts, asks for swap candidates and requests a swap."""
+        if not self.staff_headers:
+            return
+        headers = random.choice(self.staff_headers)
+        response = await self.request("GET /shifts/my-shifts", "GET", "/api/v1/shifts/my-shifts", headers=headers)
+        if response is None or response.status_code != 200:
+            return
+        upcoming = [s for s in response.json() if s["status"] == "ASSIGNED" and s["start_time"] > datetime.now().isoformat()]
+        if not upcoming:
+            return
+        assignment_id = random.choice(upcoming)["id"]
+        response = await self.request("GET /shifts/swap/candidates/{id}", "GET",
+                                      f"/api/v1/shifts/swap/candidates/{assignment_id}", headers=headers)
+        if response is None or response.status_code != 200 or not response.json():
+            return
+        await self.request("POST /shifts/swap", "POST", "/api/v1/shifts/swap", headers=headers, json={
+            "assignment_id": assignment_id,
+            "target_staff_id": response.json()[0]["staff_id"],
+        })
+
+    # ─── Drivers ──────────────────────────────────────────
+
+    async def run_scenario(self, names, weights) -> None:
+        name = random.choices(names, weights=weights)[0]
+        started = time.perf_counter()
+        try:
+            await getattr(self, f"scenario_{name}")()
+        except Exception:  # noqa: BLE001  (unexpected response shape; keep the run going)
+            self.stats.record(f"scenario {name}", time.perf_counter() - started, "error")
+
+    async def closed_loop(self, names, weights, deadline: float) -> None:
+        async def user():
+            while time.perf_counter() < deadline:
+                await self.run_scenario(names, weights)
+                if self.args.think_ms:
+                    await asyncio.sleep(random.expovariate(1000 / self.args.think_ms))
+
+        await asyncio.gather(*(user() for _ in range(self.args.users)))
+
+    async def open_loop(self, names, weights, deadline: float) -> None:
+        """Poisson arrivals at --rate scenarios/s; arrivals are never delayed by slow responses."""
+        in_flight = set()
+        next_start = time.perf_counter()
+        while next_start < deadline:
+            delay = next_start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(self.run_scenario(names, weights))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            next_start += random.expovariate(self.args.rate)
+        if in_flight:
+            await asyncio.wait(in_flight)
+
+
+def parse_mix(text: str) -> dict:
+    mix = dict(DEFAULT_MIX)
+    if text:
+        mix = {}
+        for part in text.split(","):
+            name, _, weight = part.partition("=")
+            if name not in DEFAULT_MIX:
+                raise SystemExit(f"❌ Unknown scenario '{name}' (known: {', '.join(DEFAULT_MIX)})")
+            mix[name] = float(weight or 1)
+    return mix
+
+
+def print_summary(summary: dict, baseline: dict = None) -> None:
+    print(f"\n{'endpoint':36} {'count':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6} {'4xx%':>6}")
+    for endpoint, e in summary["endpoints"].items():
+        line = (f"{endpoint:36} {e['count']:>7} {e['rps']:>8.1f} {e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} "
+                f"{e['p99_ms']:>8.1f} {e['error_rate'] * 100:>6.2f} {e['rejected_rate'] * 100:>6.2f}")
+        before = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if before:
+            line += f"   p95 {e['p95_ms'] - before['p95_ms']:+.1f}ms, rps {e['rps'] - before['rps']:+.1f}"
+        print(line)
+    print(f"\nTotal: {summary['requests']} requests in {summary['elapsed_seconds']:.1f}s ({summary['rps']:.1f} req/s)")
+    if baseline:
+        print(f"Baseline: {baseline['requests']} requests ({baseline['rps']:.1f} req/s)")
+
+
+async def main(args) -> dict:
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        test = LoadTest(client, args, stats)
+        print("Setting up...")
+        await test.setup()
+
+        driver = test.closed_loop if args.mode == "closed" else test.open_loop
+        load = f"{args.users} users" if args.mode == "closed" else f"{args.rate}/s arrivals"
+        print(f"Running {args.mode} loop ({load}) for {args.warmup}s warm-up + {args.duration}s...")
+
+        run = asyncio.create_task(driver(names, weights, time.perf_counter() + args.warmup + args.duration))
+        await asyncio.sleep(args.warmup)
+        stats.recording = True
+        started = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        stats.recording = False
+        elapsed = time.perf_counter() - started
+        await run
+
+    return {
+        "label": args.label,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "url": args.url, "mode": args.mode, "users": args.users, "rate": args.rate,
+            "duration": args.duration, "warmup": args.warmup, "think_ms": args.think_ms, "mix": mix,
+        },
+        **stats.summary(elapsed),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API with a weighted scenario mix.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--users", type=int, default=20, help="Virtual users (closed loop)")
+    parser.add_argument("--rate", type=float, default=50.0, help="Scenario arrivals per second (open loop)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before recording")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean think time between scenarios (closed loop)")
+    parser.add_argument("--mix", default="", help="e.g. forecast=5,list_rooms=1 (default: realistic mix)")
+    parser.add_argument("--admin-email", default="admin@hospital.com")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--staff-password", default="password123")
+    parser.add_argument("--staff-logins", type=int, default=10, help="Staff accounts used for swap scenarios")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("API LOAD TEST")
+    print("=" * 60)
+
+    results = asyncio.run(main(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_summary(results, baseline)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%dT%H%M%S}-{args.label}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Results saved to {path}")
@@ -0,0 +1,433 @@
+"""
+Microbenchmarks for the hot functions, with a baseline regression check.
+
+Covers conflict detection (check_time_overlap, validate_doctor_availability),
+FeatureBuilder.build_features, ForecastService.predict / predict_one (and
+checks both return identical values), preprocess_dataset, the batch shift
+rule check (validate_roster), the week roster MILP (solve_roster), Pydantic
+serialization of schemas.Appointment lists and JWT create/decode.
+
+Run from backend/ against a local database:
+
+    python scripts/microbench.py                                  # current data
+    python scripts/microbench.py --reseed --scales 1,4,16         # TRUNCATES and bulk-seeds each scale first
+    python scripts/microbench.py --save-baseline                  # store results as the baseline
+    python scripts/microbench.py --threshold 0.2                  # exit 1 if any benchmark is >20% slower than baseline
+    python scripts/microbench.py --no-db --filter jwt             # pure-Python benchmarks only, by name
+
+Timings are per call: each benchmark is run in repeats of at least
+--min-time seconds and the median repeat is reported.
+"""
+import argparse
+import functools
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+class Bench:
+    """A named benchmark: `setup()` returns the callable that is timed."""
+
+    def __init__(self, name: str, setup: Callable[[], Callable[[], object]], needs_db: bool = False):
+        self.name = name
+        self.setup = setup
+        self.needs_db = needs_db
+
+
+def measure(fn: Callable[[], object], repeats: int, min_time: float) -> Dict:
+    # Calibrate loops so one repeat takes at least min_time (like timeit.autorange)
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed < min_time / 10 else 1 + int(min_time / max(elapsed, 1e-9))
+
+    per_call = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()  # as timeit does, so a collection doesn't land in one repeat
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            per_call.append((time.perf_counter() - started) / loops * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "median_us": statistics.median(per_call),
+        "min_us": min(per_call),
+        "stdev_us": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "loops": loops,
+    }
+
+
+# ─── Benchmarks ───────────────────────────────────────────
+
+def _feature_rows(count: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    rows = []
+    for _ in range(count):
+        moment = base + timedelta(days=rng.randint(0, 364), hours=rng.randint(0, 23))
+        rows.append({
+            "appointment_date": moment,
+            "hour": moment.hour,
+            "doctor_count": rng.randint(2, 8),
+            "avg_patient_age": round(rng.gauss(45, 10), 2),
+            "emergency_count": rng.randint(1, 5),
+        })
+    return rows
+
+
+def _cycle(items):
+    """Callable returning the next item on each call, so repeated calls don't hit one cached input."""
+    state = {"i": 0}
+
+    def next_item():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+    return next_item
+
+
+def bench_check_time_overlap():
+    from app.core.conflict_detection import check_time_overlap
+
+    rng = random.Random(1)
+    pairs = []
+    for _ in range(1000):
+        a, b = sorted(rng.sample(range(8 * 60, 20 * 60), 2))
+        c, d = sorted(rng.sample(range(8 * 60, 20 * 60), 2))
+        pairs.append(tuple(dt_time(m // 60, m % 60) for m in (a, b, c, d)))
+    next_pair = _cycle(pairs)
+    return lambda: check_time_overlap(*next_pair())
+
+
+# Sessions opened by benchmark setups; closed after each benchmark so none
+# sits idle in a transaction holding locks (a reseed's TRUNCATE would wait on them)
+_open_sessions = []
+
+
+def _db_session():
+    from app.core.db import SessionLocal
+
+    db = SessionLocal()
+    _open_sessions.append(db)
+    return db
+
+
+def close_db_sessions() -> None:
+    while _open_sessions:
+        db = _open_sessions.pop()
+        db.rollback()
+        db.close()
+
+
+def _sample_doctor_slots(db, count: int = 200):
+    from app.models.users import User, UserRole
+
+    doctor_ids = [user_id for (user_id,) in db.query(User.id).filter(User.role == UserRole.DOCTOR)]
+    if not doctor_ids:
+        raise RuntimeError("No doctors in the database; seed it first (python -m app.ml.bulk_seeder)")
+    rng = random.Random(2)
+    slots = []
+    for _ in range(count):
+        day = date.today() - timedelta(days=rng.randint(0, 90))
+        start = rng.randrange(16, 26) * 30  # 08:00-12:30
+        slots.append((rng.choice(doctor_ids), day, dt_time(start // 60, start % 60),
+                      dt_time((start + 30) // 60, (start + 30) % 60)))
+    return slots
+
+
+def bench_validate_doctor_availability():
+    from app.core.conflict_detection import validate_doctor_availability
+
+    db = _db_session()
+    next_slot = _cycle(_sample_doctor_slots(db))
+    return lambda: validate_doctor_availability(db, *next_slot())
+
+
+def bench_build_features():
+    from app.ml.feature_builder import FeatureBuilder
+
+    db = _db_session()
+    builder = FeatureBuilder(db)
+    rng = random.Random(3)
+    next_slot = _cycle([(date.today() + timedelta(days=rng.randint(-30, 14)), rng.randint(0, 23)) for _ in range(200)])
+    return lambda: builder.build_features(*next_slot())
+
+
+@functools.lru_cache(maxsize=None)
+def _forecast_service():
+    from app.ml.forecast_service import ForecastService
+
+    return ForecastService()
+
+
+def bench_forecast_predict():
+    import pandas as pd
+
+    service = _forecast_service()
+    next_row = _cycle(_feature_rows(500))
+    return lambda: service.predict(pd.DataFrame([next_row()]))
+
+
+def bench_forecast_predict_one():
+    import pandas as pd
+
+    service = _forecast_service()
+    rows = _feature_rows(500)
+    mismatches = sum(1 for f in rows if service.predict_one(f) != service.predict(pd.DataFrame([f]))[0])
+    if mismatches:
+        raise RuntimeError(f"predict_one differs from predict on {mismatches} of {len(rows)} rows")
+    next_row = _cycle(rows)
+    return lambda: service.predict_one(next_row())
+
+
+def _hourly_frame(rows: int):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(4)
+    moments = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(rows), unit="h")
+    return pd.DataFrame({
+        "appointment_date": moments,
+        "hour": moments.hour,
+        "appointment_count": rng.integers(0, 30, rows),
+        "doctor_count": rng.integers(2, 9, rows),
+        "avg_patient_age": rng.normal(45, 10, rows),
+        "emergency_count": rng.integers(0, 6, rows),
+    })
+
+
+def bench_preprocess_dataset(rows: int):
+    def setup():
+        from app.ml.preprocessing import preprocess_dataset
+
+        df = _hourly_frame(rows)
+        return lambda: preprocess_dataset(df.copy())
+    return setup
+
+
+def bench_serialize_appointments(count: int):
+    def setup():
+        from pydantic import TypeAdapter
+
+        from app.models.appointment import Appointment, AppointmentStatus, AppointmentType, PatientGender
+        from app.schemas.appointment import Appointment as AppointmentSchema
+
+        adapter = TypeAdapter(List[AppointmentSchema])
+        now = datetime.now()
+        rng = random.Random(5)
+        # Transient ORM rows, as the list endpoints hand them to the response model
+        records = [
+            Appointment(
+                id=i, patient_id=1000 + i, doctor_id=rng.randint(1, 8),
+                appointment_date=date(2024, 1, 1) + timedelta(days=i % 365),
+                start_time=dt_time(9, 0), end_time=dt_time(9, 30),
+                patient_name="Mary Smith", patient_phone="555-1234", patient_email=None,
+                patient_gender=PatientGender.FEMALE, patient_age=rng.randint(5, 95),
+                appointment_type=AppointmentType.CONSULTATION, status=AppointmentStatus.COMPLETED,
+                reason_for_visit="Annual checkup", notes=None, created_at=now, updated_at=now,
+            )
+            for i in range(count)
+        ]
+        return lambda: adapter.dump_json(adapter.validate_python(records, from_attributes=True))
+    return setup
+
+
+def bench_validate_roster(rows: int):
+    """Batch rule check as /shifts/assign/bulk runs it: a month of shifts, ~20 per staff member."""
+    def setup():
+        from app.core.shift_rules import validate_roster
+
+        rng = random.Random(6)
+        base = datetime(2024, 1, 1)
+        staff_ids, starts, ends, nights = [], [], [], []
+        for _ in range(rows):
+            start = base + timedelta(days=rng.randint(0, 29), hours=rng.choice((0, 8, 16)))
+            staff_ids.append(rng.randint(1, max(1, rows // 20)))
+            starts.append(start)
+            ends.append(start + timedelta(hours=8))
+            nights.append(start.hour == 0)
+        return lambda: validate_roster(staff_ids, starts, ends, nights)
+    return setup
+
+
+def bench_solve_roster(staff_count: int):
+    """Week plan as /ml/roster-optimize solves it: 21 template shifts, 4-40 staff each."""
+    def setup():
+        from app.ml.roster_engine import StaffWorkload, solve_roster, week_slots
+
+        rng = random.Random(7)
+        slots = week_slots(date(2024, 1, 1), 7)
+        for slot in slots:
+            slot.required = rng.randint(4, 40)
+        staff = [
+            StaffWorkload(staff_id=i, name=f"Staff {i}", monthly_assignments=rng.randint(0, 20),
+                          recent_assignments=rng.randint(0, 5))
+            for i in range(staff_count)
+        ]
+        return lambda: solve_roster(slots, staff)
+    return setup
+
+
+def bench_jwt_create():
+    from app.core.security import create_access_token
+
+    return lambda: create_access_token("doctor1@hospital.com")
+
+
+def bench_jwt_decode():
+    from jose import jwt
+
+    from app.core.config import settings
+    from app.core.security import create_access_token
+
+    token = create_access_token("doctor1@hospital.com")
+    return lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+BENCHMARKS = [
+    Bench("check_time_overlap", bench_check_time_overlap),
+    Bench("validate_doctor_availability", bench_validate_doctor_availability, needs_db=True),
+    Bench("FeatureBuilder.build_features", bench_build_features, needs_db=True),
+    Bench("ForecastService.predict (1 row)", bench_forecast_predict),
+    Bench("ForecastService.predict_one", bench_forecast_predict_one),
+    Bench("preprocess_dataset (2,880 rows)", bench_preprocess_dataset(2_880)),
+    Bench("preprocess_dataset (87,600 rows)", bench_preprocess_dataset(87_600)),
+    Bench("serialize Appointment x100", bench_serialize_appointments(100)),
+    Bench("serialize Appointment x1000", bench_serialize_appointments(1000)),
+    Bench("validate_roster (1,000 rows)", bench_validate_roster(1_000)),
+    Bench("validate_roster (10,000 rows)", bench_validate_roster(10_000)),
+    Bench("solve_roster (50 staff x 21 shifts)", bench_solve_roster(50)),
+    Bench("solve_roster (500 staff x 21 shifts)", bench_solve_roster(500)),
+    Bench("create_access_token", bench_jwt_create),
+    Bench("jwt.decode", bench_jwt_decode),
+]
+
+
+# ─── Running and comparing ────────────────────────────────
+
+def run_suite(benchmarks: List[Bench], scale_label: str, repeats: int, min_time: float) -> Dict[str, Dict]:
+    results = {}
+    for bench in benchmarks:
+        key = f"{bench.name} @ {scale_label}" if bench.needs_db else bench.name
+        try:
+            fn = bench.setup()
+            fn()  # warm-up (imports, caches, first query)
+            results[key] = measure(fn, repeats, min_time)
+            print(f"  {key:<52} {results[key]['median_us']:>12.2f} µs  (±{results[key]['stdev_us']:.2f})")
+        except Exception as e:  # noqa: BLE001
+            print(f"  ❌ {key}: {e}")
+            results[key] = {"error": str(e)}
+        finally:
+            close_db_sessions()
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Names of benchmarks slower than baseline by more than `threshold` (fraction)."""
+    print(f"\n{'benchmark':<54} {'baseline':>12} {'now':>12} {'change':>8}")
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if not before or "median_us" not in before or "median_us" not in result:
+            continue
+        change = result["median_us"] / before["median_us"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  ❌ regression"
+        print(f"{key:<54} {before['median_us']:>12.2f} {result['median_us']:>12.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run microbenchmarks and compare with a stored baseline.")
+    parser.add_argument("--scales", default="", help="Comma-separated SeedScale factors (with --reseed)")
+    parser.add_argument("--reseed", action="store_true",
+                        help="Truncate and bulk-seed the database at each scale before its DB benchmarks")
+    parser.add_argument("--seed", type=int, default=1, help="Data seed used with --reseed")
+    parser.add_argument("--no-db", action="store_true", help="Skip benchmarks that need the database")
+    parser.add_argument("--filter", default="", help="Only benchmarks whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per repeat")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--output", default=None, help="Also write results JSON here")
+    args = parser.parse_args()
+
+    selected = [b for b in BENCHMARKS if args.filter.lower() in b.name.lower() and not (args.no_db and b.needs_db)]
+    pure = [b for b in selected if not b.needs_db]
+    with_db = [b for b in selected if b.needs_db]
+
+    print("=" * 60)
+    print("MICROBENCHMARKS")
+    print("=" * 60)
+
+    results = {}
+    if pure:
+        print("\nIn-process:")
+        results.update(run_suite(pure, "", args.repeats, args.min_time))
+
+    if with_db:
+        if args.reseed:
+            from app.ml.bulk_seeder import SeedScale, run_bulk_seed
+
+            for factor in [float(s) for s in (args.scales or "1").split(",")]:
+                print(f"\nScale x{factor:g} (reseeding):")
+                run_bulk_seed(SeedScale().scaled(factor), seed=args.seed)
+                results.update(run_suite(with_db, f"x{factor:g}", args.repeats, args.min_time))
+        else:
+            print("\nDatabase (current data):")
+            results.update(run_suite(with_db, "current", args.repeats, args.min_time))
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = [key for key, result in results.items() if "error" in result]
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Baseline saved to {args.baseline}")
+
+    if failed:
+        print(f"\n❌ {len(failed)} benchmark(s) failed to run")
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+    elif not failed:
+        print("\n✅ No regressions")
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())